@@ -1,98 +1,462 @@
-import random
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 
-def calculate_ldr(df: pd.DataFrame) -> pd.DataFrame:
+from hit_matrix import HitMatrix
+from lexicon import Lexicon, load_lexicon
+from scorers import KeywordScorer, Scorer, hype_risk_adjustment
+from text_normalizer import normalize_text
+
+# 感情分析レキシコン（キーワードと重み）は lexicon.json に外出し（lexicon.load_lexicon）
+UNCERTAINTY_RANGE = 0.3       # ランダムな揺らぎ（個人の主観差）の振れ幅
+
+# ステータスラベル（LDRの閾値は下限値、危険度の低い順）
+STATUS_SAFE = '✅優良'        # Safe
+STATUS_WARNING = '⚠️要注意'   # Warning
+STATUS_HIGH_RISK = '💀ハズレ確定' # High Risk
+STATUS_LABELS = [STATUS_SAFE, STATUS_WARNING, STATUS_HIGH_RISK]
+WARNING_THRESHOLD = 30
+HIGH_RISK_THRESHOLD = 50
+
+RESULT_COLUMNS = ['ai_real_score', 'ldr', 'status']
+
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _text_column(df: pd.DataFrame, column: str) -> pd.Series:
+    """
+    テキストカラムを文字列Seriesとして取り出す。
+    カラムが無ければ空文字、欠損値は str() と同じく "nan" として扱う。
+    """
+    if column not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    # object dtypeの方が str.contains(regex=False) が速い
+    return df[column].fillna("nan").astype(str).astype(object)
+
+
+def _expand_scan(scan: tuple) -> tuple:
+    """ユニークテキスト単位のCSRを行単位のCSR (indptr, indices, data) に展開する。"""
+    codes, indptr, term_ids, counts = scan
+    lengths = np.diff(indptr)[codes]
+    row_indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    gather = np.repeat(indptr[:-1][codes] - row_indptr[:-1], lengths) + np.arange(row_indptr[-1])
+    return row_indptr, term_ids[gather], counts[gather]
+
+
+def _base_score(df: pd.DataFrame) -> np.ndarray:
+    """ベーススコア (公式評価を出発点とする)。カラムが無ければ3.0。"""
+    if 'official_rating' in df.columns:
+        return df['official_rating'].to_numpy(dtype=np.float64)
+    return np.full(len(df), 3.0)
+
+
+def _input_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    スコアリング入力（公式評価・公式口コミ・爆サイリーク）から行ごとの安定ハッシュを作る。
+    pandasのhash_arrayは鍵固定なのでプロセスや実行をまたいでも同じ値になる。
+    """
+    return _row_hashes(_base_score(df), _text_column(df, 'official_review').to_numpy(),
+                       _text_column(df, 'bakusai_leak').to_numpy())
+
+
+def _row_hashes(base_score: np.ndarray, official_values: np.ndarray, leak_values: np.ndarray) -> np.ndarray:
+    """_input_hashes の列配列版（polars backend からも同じハッシュを作るために分けている）"""
+    hashes = pd.util.hash_array(base_score)
+    for values in (official_values, leak_values):
+        # categorize=False でも値は同じ。テキストはほぼ全件ユニークなので、先に factorize する既定の方が
+        # ハッシュそのものより何倍も遅い
+        hashes = hashes * _HASH_MULTIPLIER + pd.util.hash_array(values, categorize=False)
+    return hashes
+
+
+def _hash_to_unit(hashes: np.ndarray, seed: int) -> np.ndarray:
+    """ハッシュとシードを混ぜ合わせ（splitmix64）、[0, 1) の一様乱数に変換する。"""
+    x = hashes ^ np.uint64(seed & 0xFFFFFFFFFFFFFFFF)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+def _uncertainty(df: pd.DataFrame, seed: int = None, hashes: np.ndarray = None) -> np.ndarray:
+    """
+    ランダムな揺らぎ（個人の主観差）を列全体で一括生成する。
+
+    seed指定時は行の入力内容ハッシュから揺らぎを導出するため、同じ入力には常に同じ
+    揺らぎが付く（行順・分割処理・差分再計算に依存しない）。
+    seed未指定時は従来どおり実行ごとに異なる揺らぎになる。
+    """
+    n_rows = len(df) if df is not None else len(hashes)
+    if seed is None:
+        return np.random.default_rng().uniform(-UNCERTAINTY_RANGE, UNCERTAINTY_RANGE, n_rows)
+    if hashes is None:
+        hashes = _input_hashes(df)
+    unit = _hash_to_unit(hashes, seed)
+    return (unit * 2.0 - 1.0) * UNCERTAINTY_RANGE
+
+
+def _full_text(leak_text: pd.Series, official_text: pd.Series) -> pd.Series:
+    """
+    スコアリング対象のテキスト（爆サイリーク + " " + 公式口コミ）。
+    表記ゆれはレキシコンのマッチャーが綴りごとに吸収するため、テキストは正規化しない。
+    """
+    return leak_text + " " + official_text
+
+
+def _scan_evidence(leak_text: pd.Series, official_text: pd.Series, lexicon: Lexicon) -> tuple:
+    """
+    スコアリング対象の全文を1回だけ走査し、(ユニークテキスト単位の走査結果, 行ごとの情報不在フラグ) を返す。
+    情報不在はリーク取得失敗を示す文字列（マッチャーの literals）がリーク部分
+    （全文の先頭 len(leak) 文字）に収まっていればTrue（生テキストで判定）。
+    """
+    codes, indptr, term_ids, counts, literal_end = lexicon.matcher.scan_unique(
+        _full_text(leak_text, official_text), literal_ends=True)
+    leak_lengths = np.fromiter(map(len, leak_text), dtype=np.int64, count=len(leak_text))
+    return (codes, indptr, term_ids, counts), literal_end[codes] <= leak_lengths
+
+
+def _missing_info_adjustment(missing_info: np.ndarray, lexicon: Lexicon) -> np.ndarray:
+    """
+    4. 情報不在ペナルティ
+    リーク情報が取れなかった場合、少し割り引く（不確実性）
+    """
+    return np.where(missing_info, lexicon.missing_info_penalty, 0.0)
+
+
+def _raw_sentiment(base_score: np.ndarray, leak_values: np.ndarray, official_values: np.ndarray,
+                   lexicon: Lexicon, scorer: Scorer) -> np.ndarray:
+    """
+    AI感情分析エンジン (Evidence-Based Semantic Analysis) の列単位実装。
+    公式評価を出発点にスコアラーで補正し、情報不在ペナルティを加えた値を返す
+    （揺らぎ・丸め前）。引数の配列はすべて同じ長さの列配列。
+    """
+    # エビデンス取得（キーワードと情報不在の定型文を1回の走査で判定）
+    leak_text = pd.Series(leak_values, dtype=object)
+    official_text = pd.Series(official_values, dtype=object)
+    scan, missing_info = _scan_evidence(leak_text, official_text, lexicon)
+
+    if isinstance(scorer, KeywordScorer) and scorer.cache is None and (scorer.lexicon or load_lexicon()) is lexicon:
+        score = KeywordScorer.score_scan(scan, base_score, lexicon)
+    else:
+        score = scorer.score_batch(_full_text(leak_text, official_text).to_numpy(), base_score)
+    return score + _missing_info_adjustment(missing_info, lexicon)
+
+
+def _sharded_raw_sentiment(base_score: np.ndarray, leak_values: np.ndarray,
+                           official_values: np.ndarray, lexicon: Lexicon, scorer: Scorer,
+                           workers: int) -> np.ndarray:
+    """
+    行をシャードに分割してプロセスプールで _raw_sentiment を並列実行する。
+    ワーカーには行dictではなく列配列のスライスだけを渡し、結果は元の行順で連結する。
+    """
+    bounds = np.linspace(0, len(base_score), min(workers, len(base_score)) + 1).astype(int)
+    shards = [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            _raw_sentiment,
+            [base_score[s] for s in shards],
+            [leak_values[s] for s in shards],
+            [official_values[s] for s in shards],
+            [lexicon] * len(shards),
+            [scorer] * len(shards),
+        )
+        return np.concatenate(list(results))
+
+
+def _sentiment_scores(df: pd.DataFrame, noise: bool = True, seed: int = None, workers: int = 1,
+                      lexicon: Lexicon = None, scorer: Scorer = None) -> np.ndarray:
+    """行ごとのAI真実スコア（揺らぎ込み、0〜5に丸めたもの）を返す。"""
+    if lexicon is None:
+        lexicon = load_lexicon()
+    if scorer is None:
+        scorer = KeywordScorer(lexicon)
+    base_score = _base_score(df)
+    leak_values = _text_column(df, 'bakusai_leak').to_numpy()
+    official_values = _text_column(df, 'official_review').to_numpy()
+
+    if workers > 1 and len(df) > 1:
+        final_score = _sharded_raw_sentiment(base_score, leak_values, official_values, lexicon, scorer, workers)
+    else:
+        final_score = _raw_sentiment(base_score, leak_values, official_values, lexicon, scorer)
+
+    if noise:
+        # seed 指定時の揺らぎは入力ハッシュから導出する（取り出し済みの列配列から作り、seed 無しならハッシュしない）
+        hashes = _row_hashes(base_score, official_values, leak_values) if seed is not None else None
+        final_score += _uncertainty(df, seed, hashes=hashes)
+
+    return np.round(np.clip(final_score, 0.0, 5.0), 1)
+
+
+def _ldr_values(official: np.ndarray, ai_score: np.ndarray) -> np.ndarray:
+    """
+    LDR計算ロジック
+    式: (|公式 - 実効| / 公式) * 100
+    意図: 単なる差分ではなく「期待値に対する裏切りの割合」を重視するため、分母を公式評価とする。
+    """
+    ratio = np.zeros(len(official), dtype=np.float64)
+    np.divide(np.abs(official - ai_score), official, out=ratio, where=official > 0)
+    return np.round(ratio * 100, 1)
+
+
+def _label_status(ldr: np.ndarray, warning_threshold: float = WARNING_THRESHOLD,
+                  high_risk_threshold: float = HIGH_RISK_THRESHOLD) -> pd.Categorical:
+    """
+    LDRの閾値でステータスラベルを付与する。
+    ラベルは3種類しかないため、文字列の繰り返しではなく順序付きcategoricalで持つ。
+    """
+    codes = np.select(
+        [ldr >= high_risk_threshold, ldr >= warning_threshold],
+        [2, 1],
+        default=0,
+    ).astype(np.int8)
+    return pd.Categorical.from_codes(codes, categories=STATUS_LABELS, ordered=True)
+
+
+def _is_polars(df) -> bool:
+    """polars の DataFrame / LazyFrame か（polars 未インストール環境でも import せずに判定する）"""
+    return type(df).__module__.split(".")[0] == "polars"
+
+
+def calculate_ldr(df: pd.DataFrame, noise: bool = True, seed: int = None, workers: int = 1,
+                  lean: bool = False, lexicon: Lexicon = None, scorer: Scorer = None) -> pd.DataFrame:
     """
     公式評価（表の顔）とAI算出の実効評価（真実）を比較し、
     情報の非対称性を「LDR（Lie Divergence Rate）」として数値化する。
-    
+
+    行ごとのapplyは使わず、キーワード判定・LDR計算・ラベル付与を列単位で一括処理する。
+
     Args:
         df: 店舗データが含まれるDataFrame。'official_rating'カラム必須。
-        
+        noise: Falseの場合、ランダムな揺らぎを加えない（検証・比較用）。
+        seed: 指定すると揺らぎが入力内容とシードだけで決まり、結果が再現可能になる
+            （キャッシュ・差分比較・差分再計算向け）。
+        workers: 2以上を指定すると感情分析を行シャード単位でプロセスプールに分散する
+            （大規模コーパス向け。数千行程度ならプール起動コストの方が大きい）。
+        lean: Trueの場合、入力カラムを含めず ai_real_score / ldr / status だけの
+            DataFrame（インデックスは入力と同じ）を返す。長文テキスト列を持ち回らない省メモリモード。
+        lexicon: 使用するレキシコン（省略時は lexicon.json。変更されていれば自動で再読込）。
+        scorer: score_batch(texts, base_ratings) を持つスコアラー（scorers.Scorer）。
+            省略時は lexicon によるキーワードスコアラー（KeywordScorer）。
+
+    polars の DataFrame / LazyFrame を渡した場合は polars_backend の1本のクエリプランで処理し、
+    同じ型で返す（LazyFrameは未実行のまま）。この場合 workers は使わず（polarsがマルチスレッドで実行）、
+    scorer はキーワードスコアラーのみ対応。
+
     Returns:
         pd.DataFrame: ldr, status, ai_real_score が追加されたDataFrame
     """
+    if _is_polars(df):
+        if scorer is not None and not isinstance(scorer, KeywordScorer):
+            raise ValueError("calculate_ldr: polars backend supports only the lexicon keyword scorer")
+        from polars_backend import calculate_ldr_polars
+        return calculate_ldr_polars(df, noise=noise, seed=seed, lean=lean, lexicon=lexicon)
+
+    if df.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS, index=df.index) if lean else df
+
+    ai_score = _sentiment_scores(df, noise=noise, seed=seed, workers=workers, lexicon=lexicon, scorer=scorer)
+    ldr = _ldr_values(df['official_rating'].to_numpy(dtype=np.float64), ai_score)
+    scores = {'ai_real_score': ai_score, 'ldr': ldr, 'status': _label_status(ldr)}
+
+    if lean:
+        return pd.DataFrame(scores, index=df.index)
+
+    # 浅いコピーで元のDFへの副作用を防ぐ（列の追加は元のDFに波及せず、長文テキスト列も複製しない）
+    result_df = df.copy(deep=False)
+    for column, values in scores.items():
+        result_df[column] = values
+
+    return result_df
+
+
+def _incremental_keys(df: pd.DataFrame, lexicon: Lexicon) -> np.ndarray:
+    """差分判定キー: 入力ハッシュにレキシコンのバージョンを混ぜ、語彙変更時は全件再計算させる。"""
+    version_hash = pd.util.hash_array(np.array([lexicon.version], dtype=object))[0]
+    return _input_hashes(df) ^ version_hash
+
+
+def calculate_ldr_incremental(df: pd.DataFrame, previous: pd.DataFrame = None,
+                              noise: bool = True, seed: int = None,
+                              lexicon: Lexicon = None, scorer: Scorer = None) -> pd.DataFrame:
+    """
+    前回の計算結果を再利用する差分版 calculate_ldr。
+
+    各行のスコアリング入力（公式評価・公式口コミ・爆サイリーク）のハッシュを前回結果と
+    突き合わせ、入力が変わった行（新規店舗を含む）だけを再計算する。入力が変わっていない
+    行は前回の ai_real_score / ldr / status をそのまま引き継ぐ。
+
+    Args:
+        df: 今回の店舗データ。
+        previous: 前回の calculate_ldr / calculate_ldr_incremental の結果（無ければ全件計算）。
+        noise, seed, lexicon, scorer: calculate_ldr と同じ。
+
+    Returns:
+        pd.DataFrame: calculate_ldr の結果に 'input_hash'（入力とレキシコンのハッシュ）カラムを加えたもの。
+        再計算した行数は result.attrs['recomputed_rows'] に入る。
+    """
     if df.empty:
         return df
 
-    # コピーを作成して元のDFへの副作用を防ぐ（安全なデータ操作）
-    result_df = df.copy()
-
-    # AI感情分析エンジン (Evidence-Based Semantic Analysis)
-    def analyze_sentiment(row):
-        # ベーススコア (公式評価を出発点とする)
-        base_score = float(row.get('official_rating', 3.0))
-        
-        # エビデンス取得
-        leak_text = str(row.get('bakusai_leak', ""))
-        official_text = str(row.get('official_review', ""))
-        full_text = leak_text + " " + official_text
-        
-        # 評価調整変数
-        adjustment = 0.0
-        
-        # 1. ネガティブキーワード調査 (減点)
-        # 実際にユーザーが使う生の言葉をリスト化
-        negative_signals = [
-            "地雷", "ブス", "ババア", "BBA", "写真詐欺", "パネマジ", "態度悪い", 
-            "金ドブ", "二度と行かない", "ゴミ", "最悪", "微妙", "ハズレ",
-            "ババァ", "修正", "詐欺"
-        ]
-        
-        # 2. ポジティブキーワード調査 (加点/救済)
-        positive_signals = [
-            "神", "リピ確", "最高", "当たり", "可愛い", "よかった", 
-            "優良", "レベル高い", "本物", "エロい"
-        ]
-        
-        # キーワードマッチング
-        hit_negatives = 0
-        hit_positives = 0
-        
-        for word in negative_signals:
-            if word in full_text:
-                hit_negatives += 1
-                adjustment -= 0.8 # 1ワードごとの減点幅
-                
-        for word in positive_signals:
-            if word in full_text:
-                hit_positives += 1
-                adjustment += 0.5 # 1ワードごとの加点幅（ネガティブより重みは低い）
-
-        # 3. リスク係数 (公式評価が高すぎる場合の「盛ってる」リスク)
-        # 公式が4.5以上で、かつポジティブな裏付けがない場合は怪しいとみなす
-        if base_score >= 4.5 and hit_positives == 0:
-            adjustment -= 1.0
-
-        # 4. 情報不在ペナルティ
-        # リーク情報が取れなかった場合、少し割り引く（不確実性）
-        if "アクセス遮断" in leak_text or "失敗" in leak_text or "nan" in leak_text:
-            adjustment -= 0.5 
-
-        # ランダムな揺らぎ（個人の主観差）
-        uncertainty = random.uniform(-0.3, 0.3)
-        
-        final_score = base_score + adjustment + uncertainty
-        return round(max(0.0, min(5.0, final_score)), 1)
-
-    result_df['ai_real_score'] = result_df.apply(analyze_sentiment, axis=1)
-    
-    # LDR計算ロジック
-    # 式: (|公式 - 実効| / 公式) * 100
-    # 意図: 単なる差分ではなく「期待値に対する裏切りの割合」を重視するため、分母を公式評価とする。
-    result_df['ldr'] = result_df.apply(lambda x: 
-        ((abs(x['official_rating'] - x['ai_real_score']) / x['official_rating'] * 100) 
-         if x['official_rating'] > 0 else 0), axis=1).round(1)
-    
-    # ステータスラベル付与
-    def label_status(ldr):
-        if ldr >= 50:
-            return '💀ハズレ確定' # High Risk
-        elif ldr >= 30:
-            return '⚠️要注意'   # Warning
+    if lexicon is None:
+        lexicon = load_lexicon()
+
+    hashes = _incremental_keys(df, lexicon)
+    reuse_index = np.full(len(df), -1, dtype=np.int64)
+
+    if previous is not None and not previous.empty:
+        if 'input_hash' in previous.columns:
+            prev_hashes = previous['input_hash'].to_numpy(dtype=np.uint64)
         else:
-            return '✅優良'     # Safe
-            
-    result_df['status'] = result_df['ldr'].apply(label_status)
-    
+            prev_hashes = _incremental_keys(previous, lexicon)
+        # 同じ入力が複数行あれば最新の行を採用する
+        latest = ~pd.Index(prev_hashes).duplicated(keep='last')
+        previous = previous[latest]
+        reuse_index = pd.Index(prev_hashes[latest]).get_indexer(hashes)
+
+    reuse = reuse_index >= 0
+    changed = ~reuse
+
+    result_df = df.copy(deep=False)
+    ai_score = np.zeros(len(df), dtype=np.float64)
+    ldr = np.zeros(len(df), dtype=np.float64)
+    status = np.empty(len(df), dtype=object)
+
+    if reuse.any():
+        ai_score[reuse] = previous['ai_real_score'].to_numpy(dtype=np.float64)[reuse_index[reuse]]
+        ldr[reuse] = previous['ldr'].to_numpy(dtype=np.float64)[reuse_index[reuse]]
+        status[reuse] = previous['status'].to_numpy(dtype=object)[reuse_index[reuse]]
+
+    if changed.any():
+        scored = calculate_ldr(df[changed], noise=noise, seed=seed, lean=True, lexicon=lexicon, scorer=scorer)
+        ai_score[changed] = scored['ai_real_score'].to_numpy()
+        ldr[changed] = scored['ldr'].to_numpy()
+        status[changed] = scored['status'].to_numpy()
+
+    result_df['ai_real_score'] = ai_score
+    result_df['ldr'] = ldr
+    result_df['status'] = pd.Categorical(status, categories=STATUS_LABELS, ordered=True)
+    result_df['input_hash'] = hashes
+    result_df.attrs['recomputed_rows'] = int(changed.sum())
+
     return result_df
+
+
+def read_chunks(path: str, chunksize: int = 50_000, columns: list = None):
+    """
+    CSV / Parquet ファイルを chunksize 行ずつ DataFrame として読み出すジェネレータ。
+    Parquet の読み出しには pyarrow が必要。
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        # 空のリーク/口コミを NaN ("nan" 扱いで情報不在ペナルティ対象) にしないよう空文字のまま読む
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns,
+                               keep_default_na=False, na_values={'official_rating': ['']})
+    elif ext in ('.parquet', '.pq'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"read_chunks: unsupported file type: {path}")
+
+
+def calculate_ldr_stream(chunks, noise: bool = True, seed: int = None, lean: bool = False,
+                         lexicon: Lexicon = None, scorer: Scorer = None):
+    """
+    DataFrameチャンク（またはpyarrowのRecordBatch）のイテレータを受け取り、
+    LDRを付与したチャンクを順に返すストリーミング版 calculate_ldr。
+
+    保持するのは処理中の1チャンクだけなので、ピークメモリはコーパス全体ではなく
+    チャンクサイズで決まる。seed指定時の揺らぎは行内容から決まるため、
+    チャンクの切り方を変えても結果は一括計算と同じになる。
+
+    例:
+        for scored in calculate_ldr_stream(read_chunks('history.csv'), seed=0):
+            scored.to_csv('scored.csv', mode='a', header=False, index=False)
+    """
+    for chunk in chunks:
+        if not isinstance(chunk, pd.DataFrame):
+            chunk = chunk.to_pandas()
+        if chunk.empty:
+            continue
+        yield calculate_ldr(chunk, noise=noise, seed=seed, lean=lean, lexicon=lexicon, scorer=scorer)
+
+
+def build_hit_matrix(df: pd.DataFrame, lexicon: Lexicon = None) -> HitMatrix:
+    """
+    店舗データのテキストを1回だけ走査し、行 × レキシコン語 のヒット行列を作る。
+    保存しておけば rescore_ldr で重みや閾値を変えた再計算がテキスト再走査なしでできる。
+    """
+    if lexicon is None:
+        lexicon = load_lexicon()
+    leak_text = _text_column(df, 'bakusai_leak')
+    official_text = _text_column(df, 'official_review')
+
+    scan, missing_info = _scan_evidence(leak_text, official_text, lexicon)
+    indptr, indices, data = _expand_scan(scan)
+
+    return HitMatrix(
+        indptr=indptr,
+        indices=indices,
+        data=data,
+        terms=list(lexicon.terms),
+        base_score=_base_score(df),
+        missing_info=missing_info,
+        input_hash=_input_hashes(df),
+        lexicon_version=lexicon.version,
+    )
+
+
+def rescore_ldr(hits: HitMatrix, lexicon: Lexicon = None, term_weights: dict = None,
+                disabled_terms=(), noise: bool = True, seed: int = None,
+                warning_threshold: float = WARNING_THRESHOLD,
+                high_risk_threshold: float = HIGH_RISK_THRESHOLD) -> pd.DataFrame:
+    """
+    保存済みのヒット行列から ai_real_score / ldr / status を再計算する（テキスト再走査なし）。
+
+    Args:
+        hits: build_hit_matrix の結果（HitMatrix.load で読み込んだものでもよい）。
+        lexicon: 基準にするレキシコン（省略時は lexicon.json）。語の並びは hits と一致している必要がある。
+        term_weights: 語ごとの重みの上書き {語: 重み}。
+        disabled_terms: 無効化する語（重み0、ポジティブ判定からも除外）。
+        noise, seed: calculate_ldr と同じ（seed指定時は元データと同じ揺らぎになる）。
+        warning_threshold, high_risk_threshold: ステータス判定のLDR閾値。
+
+    Returns:
+        pd.DataFrame: hits の行順に ai_real_score, ldr, status を持つDataFrame。
+    """
+    if lexicon is None:
+        lexicon = load_lexicon()
+    if list(lexicon.terms) != list(hits.terms):
+        raise ValueError("rescore_ldr: lexicon terms differ from the hit matrix; rebuild it with build_hit_matrix")
+
+    weights = lexicon.term_weights.copy()
+    is_positive = lexicon.is_positive.astype(np.float64)
+    # 上書き・無効化の語は表記ゆれ違いでも同じ語として扱う（正規形で突き合わせる）
+    canonical = [normalize_text(t) for t in hits.terms]
+    if term_weights:
+        overrides = {normalize_text(t): w for t, w in term_weights.items()}
+        weights = np.array([overrides.get(c, w) for c, w in zip(canonical, weights)], dtype=np.float64)
+    if disabled_terms:
+        disabled = np.isin(canonical, [normalize_text(t) for t in disabled_terms])
+        weights[disabled] = 0.0
+        is_positive[disabled] = 0.0
+
+    final_score = (
+        hits.base_score
+        + hits.dot(weights)
+        + hype_risk_adjustment(hits.base_score, hits.dot(is_positive), lexicon)
+        + _missing_info_adjustment(hits.missing_info, lexicon)
+    )
+    if noise:
+        final_score += _uncertainty(None, seed, hashes=hits.input_hash)
+    ai_score = np.round(np.clip(final_score, 0.0, 5.0), 1)
+
+    ldr = _ldr_values(hits.base_score, ai_score)
+    return pd.DataFrame({
+        'ai_real_score': ai_score,
+        'ldr': ldr,
+        'status': _label_status(ldr, warning_threshold, high_risk_threshold),
+    })
@@ -1,9 +1,16 @@
+import random
+import time
+
 import streamlit as st
-import pandas as pd
-import pydeck as pdk
-import numpy as np
-from scraper import fetch_yokohama_data
-from analyzer import calculate_ldr
+from store import ShopStore
+
+# 重い依存（スクレイパー/Playwright/BeautifulSoup・スコアリング・pydeck）は、
+# それを使う操作（同期ボタン・ヒートマップ表示）の中で読み込む。
+# 同期済みデータを見るだけの表示はストアの latest_records()（sqlite3 のみ）で描き、pandas も読み込まない。
+# 起動時の読み込み時間は benchmark.py の check_import_budget で計測・監視する。
+
+# スコアの揺らぎ（不確実性ノイズ）のシード。固定しておけば、入力が同じ店舗は同期のたびに同じスコアになる
+SCORE_SEED = 0
 
 # ページ設定: ワイドモードで"没入感"を演出
 st.set_page_config(page_title="ZERO-DEVIL Utsunomiya", layout="wide")
@@ -15,109 +22,148 @@ st.markdown("""
 > 餃子の街に潜む欲望の歪みを、AIスナイパーが狙い撃つ。
 """)
 
+@st.cache_resource
+def get_browser():
+    """ブラウザはセッション・再実行をまたいで起動したまま共有する（同期ごとに起動しない）"""
+    from browser_service import get_browser_service
+    return get_browser_service()
+
+
+@st.cache_resource
+def get_store():
+    """同期結果のストア（data/zero_devil.sqlite3）はセッション・再実行をまたいで共有する"""
+    return ShopStore()
+
+
+def render_heatmap(final_data):
+    """全店舗のLDRヒートマップ（pydeck はここで初めて読み込む）"""
+    import pydeck as pdk
+    
+    # ダミー座標の生成（可視化用）
+    base_lat = 36.5590
+    base_lon = 139.8985
+    
+    points = [
+        {**row, 'lat': random.gauss(base_lat, 0.008), 'lon': random.gauss(base_lon, 0.008)}
+        for row in final_data
+    ]
+    
+    # 色分け: カテゴリごとに微妙に色を変えるなどの高度化も可能だが
+    # まずは危険度(LDR)で赤くする方針を維持
+    
+    view_state = pdk.ViewState(
+        latitude=base_lat,
+        longitude=base_lon,
+        zoom=13.0,
+        pitch=45,
+    )
+    
+    # レイヤー定義
+    layer = pdk.Layer(
+        "ScatterplotLayer",
+        points,
+        get_position="[lon, lat]",
+        get_fill_color="[ldr * 5, 255 - (ldr * 5), 50, 200]", # LDRが高いと赤(Red)成分が増える計算
+        get_radius="ldr * 8", # 乖離が大きいほど円が大きくなる
+        pickable=True,
+        opacity=0.8,
+        stroked=True,
+        filled=True,
+        radius_min_pixels=5,
+        radius_max_pixels=50,
+    )
+    
+    # ツールチップ設定
+    tooltip = {
+        "html": "<b>{name}</b><br/>公式: {official_rating}<br/>真実: {ai_real_score}<br/>LDR: {ldr}%<br/>判定: {status}",
+        "style": {"backgroundColor": "steelblue", "color": "white"}
+    }
+    
+    st.pydeck_chart(pdk.Deck(
+        layers=[layer], 
+        initial_view_state=view_state,
+        tooltip=tooltip
+    ))
+
+
 # アクションボタン
 # 意図: ユーザーが能動的に「真実を知る」行動を起こさせるUX
+store = get_store()
 if st.button('宇都宮全域の真実を同期する', type="primary"):
     with st.spinner('Visual Sniper v2.0起動中... ターゲット: 宇都宮 (ソープ/デリヘル/メンエス)'):
+        from analyzer import calculate_ldr_incremental
+        from lexicon import load_lexicon
+        from scraper import fetch_yokohama_data
+        
         # 1. データ収集 (Pillar A)
-        raw_data = fetch_yokohama_data()
+        browser = get_browser()
+        raw_data = fetch_yokohama_data(service=browser)
         
         if raw_data.empty:
             st.error("データの取得に失敗しました。ターゲットサイトの構造が変更された可能性があります。")
         else:
             # 2. 分析実行 (Pillar B)
-            final_data = calculate_ldr(raw_data)
-            
-            # カテゴリ別タブ作成
-            categories = list(final_data['category'].unique()) if 'category' in final_data.columns else ['All']
-            tabs = st.tabs([f"📁 {cat}" for cat in categories] + ["🔥 全店舗ヒートマップ"])
+            # 前回の同期結果（ストアの最新）から入力が変わっていない店舗はスコアを引き継ぐ
+            lexicon = load_lexicon()
+            scored = calculate_ldr_incremental(raw_data, previous=store.latest(), lexicon=lexicon,
+                                               seed=SCORE_SEED)
+            store.record_run(scored, lexicon_version=lexicon.version, source="scrape")
+            st.caption(f"🔁 再計算: {scored.attrs.get('recomputed_rows', len(scored))} / {len(scored)} 店舗"
+                       f"　🌐 ブラウザ起動: {browser.launches} 回 (再起動 {browser.restarts})")
+            st.success("同期完了: 市場の歪みを検知しました。")
+
+# 3. 表示: 最新の同期結果をストアから読む（起動直後や再実行ではスクレイピングせずに表示する）
+# （カテゴリは初めて同期された順、カテゴリ内は LDR の高い順に並んで返る）
+final_data = store.latest_records()
+if not final_data:
+    st.info("まだ同期結果がありません。上のボタンで同期してください。")
+else:
+    last_run = store.last_run()
+    st.caption(f"🗄️ 最終同期: {time.strftime('%Y-%m-%d %H:%M', time.localtime(last_run['run_at']))}"
+               f"（{len(final_data)} 店舗）")
+    
+    # カテゴリ別タブ作成
+    categories = list(dict.fromkeys(row['category'] for row in final_data))
+    tabs = st.tabs([f"📁 {cat}" for cat in categories] + ["🔥 全店舗ヒートマップ"])
+    
+    for i, cat in enumerate(categories):
+        with tabs[i]:
+            st.subheader(f"{cat} のLDRランキング")
+            cat_rows = [row for row in final_data if row['category'] == cat]
             
-            for i, cat in enumerate(categories):
-                with tabs[i]:
-                    st.subheader(f"{cat} のLDRランキング")
-                    cat_df = final_data[final_data['category'] == cat]
-                    
-                    # 表示用カラムの整理 (エビデンスがあれば表示)
-                    cols_to_show = ['name', 'official_rating', 'ai_real_score', 'ldr', 'status']
+            # データをリッチ化して表示
+            # Dataframeだと文字数制限で見にくいので、危険度順にExpanderで展開
+            for row in cat_rows:
+                # ステータスに応じた色分け
+                status_color = "red" if "ハズレ" in row['status'] else "orange" if "注意" in row['status'] else "green"
+                
+                with st.expander(f"[{row['status']}] {row['name']} (LDR: {row['ldr']}%)"):
+                    c1, c2, c3 = st.columns(3)
+                    with c1:
+                        st.metric("公式評価", row['official_rating'])
+                    with c2:
+                        st.metric("AI真実スコア", row['ai_real_score'])
+                    with c3:
+                        st.markdown(f":{status_color}[{row['status']}]")
                     
-                    # データをリッチ化して表示
-                    # Dataframeだと文字数制限で見にくいので、危険度順にExpanderで展開
-                    sorted_df = cat_df.sort_values(by='ldr', ascending=False)
+                    st.markdown("---")
+                    st.markdown("**🕵️‍♂️ AI捜査エビデンス**")
                     
-                    for _, row in sorted_df.iterrows():
-                        # ステータスに応じた色分け
-                        status_color = "red" if "ハズレ" in row['status'] else "orange" if "注意" in row['status'] else "green"
-                        
-                        with st.expander(f"[{row['status']}] {row['name']} (LDR: {row['ldr']}%)"):
-                            c1, c2, c3 = st.columns(3)
-                            with c1:
-                                st.metric("公式評価", row['official_rating'])
-                            with c2:
-                                st.metric("AI真実スコア", row['ai_real_score'])
-                            with c3:
-                                st.markdown(f":{status_color}[{row['status']}]")
-                            
-                            st.markdown("---")
-                            st.markdown("**🕵️‍♂️ AI捜査エビデンス**")
-                            
-                            ec1, ec2 = st.columns(2)
-                            with ec1:
-                                st.caption("💬 公式口コミ (CityHeaven)")
-                                st.info(row.get('official_review', '取得なし'))
-                            with ec2:
-                                st.caption("💣 爆サイ/裏情報リーク (Bakusai Probe)")
-                                leak = row.get('bakusai_leak', '---')
-                                if leak != '---' and leak != '情報なし':
-                                    st.warning(leak)
-                                else:
-                                    st.markdown(f"*{leak}*")
-            
-            with tabs[-1]:
-                st.subheader("🔥 闇のヒートマップ (全ジャンル統合)")
-                
-                # ダミー座標の生成（可視化用）
-                base_lat = 36.5590
-                base_lon = 139.8985
-                
-                rows = len(final_data)
-                final_data['lat'] = np.random.normal(base_lat, 0.008, rows)
-                final_data['lon'] = np.random.normal(base_lon, 0.008, rows)
-                
-                # 色分け: カテゴリごとに微妙に色を変えるなどの高度化も可能だが
-                # まずは危険度(LDR)で赤くする方針を維持
-                
-                view_state = pdk.ViewState(
-                    latitude=base_lat,
-                    longitude=base_lon,
-                    zoom=13.0,
-                    pitch=45,
-                )
-                
-                # レイヤー定義
-                layer = pdk.Layer(
-                    "ScatterplotLayer",
-                    final_data,
-                    get_position="[lon, lat]",
-                    get_fill_color="[ldr * 5, 255 - (ldr * 5), 50, 200]", # LDRが高いと赤(Red)成分が増える計算
-                    get_radius="ldr * 8", # 乖離が大きいほど円が大きくなる
-                    pickable=True,
-                    opacity=0.8,
-                    stroked=True,
-                    filled=True,
-                    radius_min_pixels=5,
-                    radius_max_pixels=50,
-                )
-                
-                # ツールチップ設定
-                tooltip = {
-                    "html": "<b>{name}</b><br/>公式: {official_rating}<br/>真実: {ai_real_score}<br/>LDR: {ldr}%<br/>判定: {status}",
-                    "style": {"backgroundColor": "steelblue", "color": "white"}
-                }
-                
-                st.pydeck_chart(pdk.Deck(
-                    layers=[layer], 
-                    initial_view_state=view_state,
-                    tooltip=tooltip
-                ))
-                
-            st.success("同期完了: 市場の歪みを検知しました。")
+                    ec1, ec2 = st.columns(2)
+                    with ec1:
+                        st.caption("💬 公式口コミ (CityHeaven)")
+                        st.info(row.get('official_review') or '取得なし')
+                    with ec2:
+                        st.caption("💣 爆サイ/裏情報リーク (Bakusai Probe)")
+                        leak = row.get('bakusai_leak') or '---'
+                        if leak != '---' and leak != '情報なし':
+                            st.warning(leak)
+                        else:
+                            st.markdown(f"*{leak}*")
+    
+    with tabs[-1]:
+        st.subheader("🔥 闇のヒートマップ (全ジャンル統合)")
+        
+        # 描画に pydeck を読み込むため、開いたときだけ描く
+        if st.toggle("ヒートマップを描画する"):
+            render_heatmap(final_data)
@@ -0,0 +1,1404 @@
+"""
+LDR Engine Benchmark Suite
+==========================
+analyzer.calculate_ldr の等価性チェックとスループット計測。
+
+合成した日本語口コミコーパス（実データに近い文字数・レキシコンヒット密度。爆サイリークは
+実データと同じく行ごとに異なる）で複数の行数について rows/sec・ピークメモリ・ステージ別時間
+（感情分析 / LDR / ラベル付与）を旧来の行単位実装のスループットと並べて計測し、
+ベースラインJSONとの比較で性能劣化を検出する。
+
+使い方:
+    python benchmark.py                               # 等価性チェック + 1k/100k/1M行の計測
+    python benchmark.py --sizes 1000 100000           # 行数を指定
+    python benchmark.py --check-only                  # 等価性・回帰チェックだけを実行（計測しない）
+    python benchmark.py --unique-texts 20000          # テキストを2万件のプールから引く（重複テキストの多いデータ）
+    python benchmark.py --save-baseline base.json     # 結果をベースラインとして保存
+    python benchmark.py --baseline base.json          # ベースラインと比較（劣化時は終了コード1）
+    python benchmark.py --workers 8                   # 1〜8コアのスケーリング計測
+    python benchmark.py --memory                      # 省メモリモードのメモリレポート
+    python benchmark.py --score-cache                 # 永続スコアキャッシュのコールド/ウォーム計測
+    python benchmark.py --polars                      # polars backend（LazyFrame）のスループット計測
+    python benchmark.py --scorer ngram                # スコアラー単体（score_batch）のスループット計測
+    python benchmark.py --replay [DIR]                # フィクスチャ再生で取得→分析→保存→描画を計測（DIR省略時は合成）
+    python benchmark.py --parser [DIR]                # 一覧ページパーサー bs4 / lxml の計測（DIR: 保存済みページ）
+    python benchmark.py --bulk-parse                  # 保存済みページ一括再解析（プロセスプール）の計測
+
+polars がインストールされていれば、polars backend と pandas 版の一致も毎回確認する。
+"""
+
+import argparse
+import ast
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import analyzer
+from analyzer import RESULT_COLUMNS, calculate_ldr
+from lexicon import LEXICON_PATH, load_lexicon
+from score_cache import ScoreCache, text_hash
+from scorers import KeywordScorer, NgramScorer
+from store import STORE_ENV, ShopStore, shop_id
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+# スコアラー単体のスループット目標（テキスト/秒）
+SCORER_TARGET_TEXTS_PER_SEC = 100_000
+REGRESSION_TOLERANCE = 0.10  # ベースライン比でこれ以上遅くなったら劣化とみなす
+REFERENCE_MAX_ROWS = 100_000  # 旧来の行単位実装のスループットはこの行数までで計測する（1M行は遅すぎる）
+
+# app.py の起動時（同期・ヒートマップ表示の前）の読み込み予算
+APP_ENTRY = "app.py"
+IMPORT_BUDGET_MS = 100       # 起動時 import の合計（streamlit 本体を除く。表示は sqlite3 だけで動く）
+# 起動時に読み込まれてはいけない（使う操作の中で遅延読み込みする）モジュール
+APP_LAZY_MODULES = ("scraper", "browser_service", "score_cache", "shop_parser", "page_cache", "polars_backend",
+                    "analyzer", "scorers", "lexicon", "text_normalizer",
+                    "playwright", "bs4", "lxml", "pydeck", "polars", "pandas", "numpy")
+
+# 合成データ用の語彙（レキシコン語は lexicon.json から一定密度で混ぜる）
+_PHRASES = [
+    "受付の対応は普通だった", "駅から近いので通いやすい", "また行きたいと思う", "写真通りの子が来た",
+    "時間が短く感じた", "料金は相場くらい", "部屋は清潔で綺麗", "指名した子がおすすめしてくれた",
+    "初めて利用したけど", "予約が取りやすい", "平日の昼なら空いてる", "ホテル代込みで考えると",
+    "フリーで入ったら", "延長したくなった", "スタッフの電話対応が丁寧", "待ち時間は15分くらい",
+]
+_LEAK_FALLBACKS = ["", "スレッド未発見", "アクセス失敗: Timeout", "情報なし", "スレッド内容取得失敗"]
+_LEAK_MAX_CHARS = 600    # scraper._search_bakusai_direct の切り詰め長
+_REVIEW_MAX_CHARS = 50   # 公式口コミサンプルの切り詰め長
+_LEAK_FALLBACK_RATE = 0.05  # リーク取得失敗（定型文）の行の割合
+_COMMENT_POOL = 50_000   # 合成コメントのプール
+
+
+def _raw_lexicon_terms() -> list:
+    """
+    合成データに混ぜる語。lexicon.json の語に加え、旧来実装の語（表記ゆれ違いの重複 "ババァ" を含む）も使う
+    （lexicon.json から消した重複語もデータに現れないと、等価性チェックでその挙動の変化が見えない）。
+    """
+    with open(LEXICON_PATH, encoding="utf-8") as f:
+        spec = json.load(f)
+    return list(dict.fromkeys(spec["negative"] + spec["positive"] + _REFERENCE_NEGATIVE + _REFERENCE_POSITIVE))
+
+
+def _synthetic_comment(rng: random.Random, terms: list, hit_density: float) -> str:
+    parts = rng.choices(_PHRASES, k=rng.randint(1, 3))
+    if rng.random() < hit_density:
+        parts.insert(rng.randrange(len(parts) + 1), rng.choice(terms))
+    return "、".join(parts) + rng.choice(["。", "！", "w", "…"])
+
+
+def make_synthetic_frame(rows: int, seed: int = 0, hit_density: float = 0.3,
+                         unique_texts: int = None) -> pd.DataFrame:
+    """
+    fetch_yokohama_data と同じスキーマの合成店舗データを生成する。
+
+    Args:
+        rows: 行数。
+        seed: 乱数シード（同じ引数なら同じデータ）。
+        hit_density: 1コメントにレキシコン語が含まれる確率。
+        unique_texts: 省略時は実データと同じく爆サイリークが行ごとに異なる（取得失敗の定型文を除く）。
+            数を指定すると、リーク・口コミをそのサイズのプールから重複を許して引く
+            （重複テキストをまとめて処理する経路の計測用）。
+    """
+    rng = random.Random(seed)
+    terms = _raw_lexicon_terms()
+    # コメント自体は定型文の組み合わせなので、プールから引いて連結する（行ごとに生成すると1M行で遅すぎる）
+    comments = [_synthetic_comment(rng, terms, hit_density) for _ in range(_COMMENT_POOL)]
+
+    def leak(row: int) -> str:
+        # 爆サイスレッドの最新レス（最大15件）を " || " で連結して切り詰めたもの。
+        # 先頭のアンカー（>>レス番号）で行ごとに一意になる
+        text = f">>{row} " + " || ".join(rng.choices(comments, k=rng.randint(1, 15)))
+        return text[:_LEAK_MAX_CHARS] + "..." if len(text) > _LEAK_MAX_CHARS else text
+
+    np_rng = np.random.default_rng(seed)
+    if unique_texts is None:
+        fallback = np_rng.random(rows) < _LEAK_FALLBACK_RATE
+        fallbacks = np.asarray(_LEAK_FALLBACKS, dtype=object)[np_rng.integers(0, len(_LEAK_FALLBACKS), rows)]
+        leaks = np.where(fallback, fallbacks, np.asarray([leak(i) for i in range(rows)], dtype=object))
+        reviews = np.asarray([c[:_REVIEW_MAX_CHARS] + "..." for c in comments], dtype=object)
+        official_reviews = reviews[np_rng.integers(0, len(reviews), rows)]
+    else:
+        pool_size = min(rows, unique_texts)
+        review_pool = np.asarray([comments[i % _COMMENT_POOL][:_REVIEW_MAX_CHARS] + "..."
+                                  for i in range(pool_size)], dtype=object)
+        leak_pool = np.asarray([leak(i) for i in range(pool_size)] + _LEAK_FALLBACKS, dtype=object)
+        official_reviews = review_pool[np_rng.integers(0, len(review_pool), rows)]
+        leaks = leak_pool[np_rng.integers(0, len(leak_pool), rows)]
+
+    return pd.DataFrame({
+        "name": [f"店舗{i}" for i in range(rows)],
+        "official_rating": np_rng.integers(0, 6, rows).astype(float),
+        "official_review": official_reviews,
+        "category": np.asarray(["ソープ", "デリヘル", "メンエス"], dtype=object)[np_rng.integers(0, 3, rows)],
+        "bakusai_leak": leaks,
+    })
+
+
+def _synthetic_list_page(rng: random.Random, category: str, comment, shops: int) -> str:
+    """CityHeaven店舗一覧ページ風のHTML（ナビ・広告・スクリプトなど店舗以外の要素も多く含む）"""
+    nav = "".join(f'<li class="gnav_item"><a href="/tochigi/menu{i}/">メニュー{i}</a></li>' for i in range(60))
+    ads = "".join(
+        f'<div class="banner"><a href="/ad/{i}/"><img src="/img/banner{i}.jpg" alt="広告{i}"></a></div>'
+        for i in range(30)
+    )
+    items = []
+    for i in range(shops):
+        stars = rng.randint(0, 5)
+        star_imgs = "".join(
+            f'<img src="/img/star_{"on" if k < stars else "off"}.png">' for k in range(5)
+        )
+        items.append(
+            f'<li class="shop_list_item">'
+            f'<div class="shop_thumb"><a href="/shop/{category}{i}/"><img src="/img/shop{i}.jpg"></a></div>'
+            f'<div class="shop_info"><a class="shop_title_shop" href="/shop/{category}{i}/">{category}店舗{i}</a>'
+            f'<p class="shop_area">宇都宮 / {rng.randint(9, 12)}:00〜LAST</p>'
+            f'<div class="shop_star">{star_imgs}</div>'
+            f'<p class="shop_comment">{comment()}{comment()}</p>'
+            f'<ul class="shop_tags">' + "".join(f"<li>タグ{k}</li>" for k in range(8)) + "</ul>"
+            f'</div></li>'
+        )
+    script = "<script>" + "var x=1;" * 5000 + "</script>"
+    return (
+        f'<html><head><title>{category} | 宇都宮</title>{script}</head><body>'
+        f'<header><ul class="gnav">{nav}</ul></header>{ads}'
+        f'<main><ul class="shop_list">{"".join(items)}</ul></main>'
+        f'<footer><ul class="footer_list">{nav}</ul></footer></body></html>'
+    )
+
+
+def _synthetic_thread_page(rng: random.Random, comment, responses: int) -> str:
+    """爆サイスレッド風のHTML（レス本文は div.res_body.response_body）"""
+    body = "".join(
+        f'<article class="res" id="res{n}"><div class="res_meta">#{n} 2026/10/{rng.randint(1, 16):02d}</div>'
+        f'<div class="res_body response_body">{comment()}</div></article>'
+        for n in range(1, responses + 1)
+    )
+    return f"<html><head><title>スレッド</title></head><body>{body}</body></html>"
+
+
+def write_synthetic_fixtures(fixture_dir: str, shops_per_page: int = 40, seed: int = 0,
+                             hit_density: float = 0.3) -> None:
+    """
+    scraper の再生モード用に、TARGET_URLS の一覧ページと、深堀り対象店舗の
+    Bakusai検索結果・スレッドページの合成フィクスチャを書き出す（実サイトの録画の代わり）。
+    """
+    from page_cache import PageCache
+    import scraper
+
+    rng = random.Random(seed)
+    terms = _raw_lexicon_terms()
+
+    def comment() -> str:
+        return _synthetic_comment(rng, terms, hit_density)
+
+    cache = PageCache(fixture_dir)
+    for category, url in scraper.TARGET_URLS.items():
+        cache.put(url, _synthetic_list_page(rng, category, comment, shops_per_page), "cityheaven")
+        # 深堀り対象（各カテゴリの上位2店舗）の検索結果とスレッド
+        for i in range(2):
+            thread_path = f"/thr_res/acode={scraper.BAKUSAI_AREA_CODE}/ctgid=103/bid=1/tid={rng.randint(1, 10**8)}/"
+            search_html = (f'<html><body><ul class="sch_result"><li><a href="{thread_path}">'
+                           f'{category}店舗{i}★宇都宮</a></li></ul></body></html>')
+            cache.put(scraper._bakusai_search_url(f"{category}店舗{i}"), search_html, "bakusai_search")
+            cache.put(f"https://bakusai.com{thread_path}",
+                      _synthetic_thread_page(rng, comment, rng.randint(5, 50)), "bakusai_thread")
+
+
+# 一覧ページの構造バリエーション（フォールバックのdiv一覧・求人枠・gold星・別名の口コミ欄・XML宣言・入れ子・空ページなど）
+_PARSER_EDGE_PAGES = [
+    '<?xml version="1.0" encoding="utf-8"?><html><body><ul>'
+    + "".join(f'<li class="shopList"><h2><a href="/s{i}"> 店舗 {i} </a></h2><img src="/star_gold.png">'
+              f'<img src="/star_gray.png"><div class="comment_body"> 口コミ <b>本文{i}</b> </div></li>'
+              for i in range(4))
+    + '</ul></body></html>',
+    '<html><body><div class="shop_list"><span itemprop="name">求人募集中</span></div>'
+    '<div class="shop-item"><p class="shop-name"><a>店舗A</a></p><div class="review_text">よかった</div></div>'
+    '<div class="shop-item"><h3><a> </a></h3><div class="shop_name"><a>店舗B</a></div></div></body></html>',
+    '<html><body><ul>' + "".join(
+        f'<li class="list_item">口コミ{i}<a href="/x">詳細</a><ul><li class="shop_sub"><a>入れ子</a><img src="a"></li></ul>'
+        f'<a class="shop_title_shop">店舗{i}</a><span class="shop_comment">' + "長い口コミ" * 20 + '</span></li>'
+        for i in range(12)) + '</ul></body></html>',
+    # 取得に失敗したスナップショット（空・空白だけ・コメントだけ・XML宣言だけ）
+    '',
+    ' \n\t',
+    '<!-- 503 Service Unavailable -->',
+    '<?xml version="1.0" encoding="utf-8"?>',
+]
+
+
+# クライアント側で一覧を描画するページの描画前の状態（ナビ・メニュー・フッターの li[class*='list'] だけ）
+_UNRENDERED_LIST_PAGE = (
+    '<html><body><header><ul>'
+    + "".join(f'<li class="menu_list_item"><a href="/m{i}"><img src="/icon{i}.png">メニュー{i}</a></li>'
+              for i in range(12))
+    + '</ul></header><main><ul class="shop_list" id="app"></ul></main><footer><ul>'
+    + "".join(f'<li class="footer_list"><a href="/f{i}">口コミ投稿{i}</a></li>' for i in range(6))
+    + '</ul></footer></body></html>'
+)
+
+
+def _saved_list_pages(fixture_dir: str = None) -> list:
+    """計測用の一覧ページHTML。fixture_dir 指定時は保存済みスナップショットの cityheaven ページ。"""
+    if fixture_dir:
+        pages = []
+        for name in sorted(os.listdir(fixture_dir)):
+            if name.endswith(".json"):
+                with open(os.path.join(fixture_dir, name), encoding="utf-8") as f:
+                    snapshot = json.load(f)
+                if snapshot.get("source") == "cityheaven":
+                    pages.append(snapshot["html"])
+        return pages
+
+    rng = random.Random(0)
+    terms = _raw_lexicon_terms()
+    return [_synthetic_list_page(rng, category, lambda: _synthetic_comment(rng, terms, 0.3), 40)
+            for category in ("ソープ", "デリヘル", "メンエス")]
+
+
+def check_parser_equivalence(fixture_dir: str = None) -> None:
+    """
+    lxml版の一覧パーサーが従来の BeautifulSoup 版と同じレコードを返すことと、
+    スクレイパーの描画待ちの条件（SHOP_ITEM_READY_XPATH）がパーサーが店舗を取れるページでだけ成り立つことを確認する。
+    """
+    import shop_parser
+
+    if not shop_parser._HAS_LXML:
+        print("⏭️ lxml not installed: parser equivalence check skipped")
+        return
+    from lxml import etree, html as lxml_html
+
+    # スクレイパーが一覧の描画を待つ条件（ブラウザの document.evaluate と同じ XPath 1.0）
+    ready = etree.XPath(shop_parser.SHOP_ITEM_READY_XPATH)
+    pages = _saved_list_pages(fixture_dir) + _PARSER_EDGE_PAGES + [_UNRENDERED_LIST_PAGE]
+    for i, html in enumerate(pages):
+        expected = shop_parser.parse_shop_list(html, backend="bs4")
+        actual = shop_parser.parse_shop_list(html, backend="lxml")
+        if actual != expected:
+            raise AssertionError(f"page {i}: lxml parser records differ from bs4\n{expected}\n{actual}")
+        try:
+            is_ready = bool(ready(lxml_html.fromstring(html.encode("utf-8"))))
+        except etree.ParserError:
+            is_ready = False   # 空のページ（ブラウザでは要素の無い文書）
+        if is_ready != bool(expected):
+            raise AssertionError(f"page {i}: readiness condition disagrees with the parser ({len(expected)} shops)")
+    print(f"✅ Parser equivalence check passed ({len(pages)} pages)")
+
+
+def _header_thread_page(responses: list, head: str = "") -> str:
+    """
+    レスのコンテナに id が無い爆サイスレッド風のHTML（番号は見出しの "#123" だけ）。
+    responses は (見出し, 本文) のリスト。見出しが None のレスは見出し要素を持たない。
+    """
+    body = "".join(
+        '<div class="res">' + (f'<div class="res_head">{heading}</div>' if heading is not None else "")
+        + f'<div class="res_body response_body">{text}</div></div>'
+        for heading, text in responses
+    )
+    return f'<html><head>{head}</head><body><div class="res_list">{body}</div></body></html>'
+
+
+def check_comment_records() -> None:
+    """
+    スレッドHTMLからのレス抽出（_extract_comment_records）が、各レスのコンテナ内の見出しだけから
+    レス番号を取り、<style>/<script> や前のレスの本文の "#123" を番号と取り違えないことを確認する。
+    番号が取り違えられると保存済みの最大レス番号（last_res_no）が飛び、以後の実際のレスが読み飛ばされる。
+    """
+    import scraper
+
+    style = "<style>.res_head { color:#333 }</style>"
+    script = '<script>var latest = "#999";</script>'
+    cases = [
+        # (説明, HTML, after, 期待するレス番号)
+        ("res id", _synthetic_thread_page(random.Random(0), lambda: "本文テキストです", 6), 0, [1, 2, 3, 4, 5, 6]),
+        ("res id, after", _synthetic_thread_page(random.Random(0), lambda: "本文テキストです", 6), 4, [5, 6]),
+        ("heading", _header_thread_page(
+            [("#1 2026/10/01 10:00", "最初のレスです"), ("#2 2026/10/02", "#88 の話は本当ですか"),
+             (f"{script}#3 2026/10/03 09:05", "三番目のレスです")], head=style), 0, [1, 2, 3]),
+        ("heading, after", _header_thread_page(
+            [("#10", "最初のレスです"), ("#11", "二番目のレスです"), ("#12", "三番目のレスです")]), 11, [12]),
+        # 見出しの無いレス: 前のレスの本文の "#88" を拾ってはいけない
+        ("no heading after body", _header_thread_page(
+            [("#1", "#88 の店の話です"), (None, "見出しの無いレスです")]), 0, []),
+        # 見出しの無いレス: <style> の color:#333 を拾ってはいけない
+        ("no heading after style", _header_thread_page([(None, "見出しの無いレスです")], head=style), 0, []),
+        ("not increasing", _header_thread_page(
+            [("#5", "五番目のレスです"), ("#3", "三番目のレスです"), ("#6", "六番目のレスです")]), 0, []),
+    ]
+    for label, html, after, expected in cases:
+        records = scraper._extract_comment_records(html, after=after)
+        actual = [record["res_no"] for record in records]
+        if actual != expected:
+            raise AssertionError(f"{label}: expected res_no {expected}, got {actual}")
+    posted = [r["posted_at"] for r in scraper._extract_comment_records(cases[2][1])]
+    if posted != ["2026-10-01 10:00", "2026-10-02", "2026-10-03 09:05"]:
+        raise AssertionError(f"posted_at: got {posted}")
+    print(f"✅ Comment records check passed ({len(cases)} pages)")
+
+
+def _entry_imports(path: str) -> list:
+    """スクリプトのモジュールレベルの import 文が読み込むトップレベルのモジュール名"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module.split(".")[0])
+    return list(dict.fromkeys(modules))
+
+
+def _import_times(modules: list) -> list:
+    """新しいプロセスで modules を import し、python -X importtime の (self µs, 累積 µs, 名前) を返す"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            rows.append((int(self_us), int(cumulative_us), name))
+    return rows
+
+
+def check_import_budget(entry: str = APP_ENTRY, budget_ms: float = IMPORT_BUDGET_MS) -> dict:
+    """
+    エントリスクリプトの起動時の import を python -X importtime で計測し、
+    APP_LAZY_MODULES が読み込まれていないことと、読み込み時間の合計が予算内であることを
+    確認する（streamlit 本体は計測対象外）。
+    """
+    modules = [m for m in _entry_imports(entry) if m != "streamlit"]
+    rows = _import_times(modules)
+    root = os.path.dirname(os.path.abspath(entry))
+    loaded = {name.strip() for _, _, name in rows}
+    eager = sorted(m for m in APP_LAZY_MODULES if any(n == m or n.startswith(m + ".") for n in loaded))
+    def depth(name):
+        return (len(name) - len(name.lstrip()) - 1) // 2
+
+    total_ms = sum(cum for _, cum, name in rows if depth(name) == 0) / 1000
+    # 重い順の直下の依存（累積時間）
+    top = sorted(((cum, name.strip()) for _, cum, name in rows if depth(name) == 1), reverse=True)[:4]
+    own_ms = sum(self_us for self_us, _, name in rows
+                 if os.path.exists(os.path.join(root, name.strip() + ".py"))) / 1000
+    heaviest = ", ".join(f"{name} {cum / 1000:.0f}ms" for cum, name in top)
+    print(f"📦 {entry} cold-start imports ({', '.join(modules)}): {total_ms:.0f}ms / budget {budget_ms:.0f}ms "
+          f"(repo modules self {own_ms:.0f}ms; heaviest deps: {heaviest})")
+    if eager:
+        raise AssertionError(f"{entry} imports deferred modules at startup: {eager}")
+    if total_ms > budget_ms:
+        raise AssertionError(f"{entry} cold-start import time {total_ms:.0f}ms exceeds budget {budget_ms:.0f}ms")
+    return {"total_ms": total_ms, "own_ms": own_ms, "modules": sorted(loaded)}
+
+
+def check_resource_policy() -> None:
+    """既定のリソースポリシーが、スクレイパーが読むリクエストを中断しないことを確認する。"""
+    from resource_policy import REASON_THIRD_PARTY, ResourcePolicy
+
+    policy = ResourcePolicy()
+    cases = [
+        ("https://www.cityheaven.net/tochigi/A0901/A090101/shop-list/biz4/", "document", None),
+        ("https://bakusai.com/thr_res/acode=15/tid=1/", "document", None),
+        ("https://www.cityheaven.net/js/common.js", "script", None),
+        ("https://img.cityheaven.net/img/star_on.png", "image", None),
+        ("https://challenges.cloudflare.com/turnstile/v0/api.js", "script", None),
+        ("data:image/png;base64,AAAA", "image", "image"),
+        ("https://img.cityheaven.net/shop/photo_1.jpg", "image", "image"),
+        ("https://bakusai.com/font/icon.woff2", "font", "font"),
+        ("https://www.googletagmanager.com/gtm.js", "script", REASON_THIRD_PARTY),
+        ("https://ads.example.net/frame.html", "document", REASON_THIRD_PARTY),
+        ("https://ads.example.net/star_banner.png", "image", REASON_THIRD_PARTY),
+        ("https://cdn.example.com/starter.js", "script", REASON_THIRD_PARTY),
+        ("https://img.cityheaven.net/img/icon.png?rating=star", "image", "image"),
+    ]
+    for url, resource_type, expected in cases:
+        actual = policy.block_reason(url, resource_type)
+        if actual != expected:
+            raise AssertionError(f"{url} ({resource_type}): expected {expected}, got {actual}")
+
+    # 通常運用（中断あり）でも、サイズ計測用に通した分の実サイズから削減量が推定されること
+    size_calls = []
+
+    class FakeRequest:
+        def __init__(self, url, resource_type, size):
+            self.url, self.resource_type, self._size = url, resource_type, size
+
+        def sizes(self):
+            # 実際のブラウザではプロトコルの往復が1回かかる
+            size_calls.append(self.url)
+            return {"responseBodySize": self._size}
+
+    class FakeRoute:
+        def __init__(self, request):
+            self.request, self.action = request, None
+
+        def continue_(self):
+            self.action = "continue"
+
+        def abort(self, error_code=None):
+            self.action = "abort"
+
+    def load(policy, requests) -> list:
+        actions = []
+        for request in requests:
+            route = FakeRoute(request)
+            policy._handle(route)
+            actions.append(route.action)
+            if route.action == "continue":
+                policy._finished(request)
+        return actions
+
+    pages = [FakeRequest(f"https://www.cityheaven.net/page_{i}/", "document", 50_000) for i in range(5)]
+    photos = [FakeRequest(f"https://img.cityheaven.net/shop/photo_{i}.jpg", "image", 1000 * (i + 1)) for i in range(10)]
+    policy = ResourcePolicy(sample_size=2)
+    policy.start_run()
+    actions = load(policy, pages + photos)[len(pages):]
+    run = policy.finish_run()
+    if actions != ["continue"] * 2 + ["abort"] * 8 or run.blocked["image"] != 8:
+        raise AssertionError(f"sampling: expected 2 continued / 8 aborted, got {actions} {dict(run.blocked)}")
+    if run.saved_bytes != 8 * 1500 or run.unmeasured:
+        raise AssertionError(f"estimated saved bytes: expected {8 * 1500}, got {run.saved_bytes} {run.unmeasured}")
+    # サイズを問い合わせるのはサイズ計測に通した2件だけ（通常のリクエストでは往復しない）
+    if size_calls != [photos[0].url, photos[1].url] or run.loaded_requests != len(pages) + 2:
+        raise AssertionError(f"sizes() called for {size_calls}, loaded {run.loaded_requests}")
+
+    # dry_run では中断対象だったリクエストだけサイズを測る
+    size_calls.clear()
+    dry = ResourcePolicy(dry_run=True)
+    dry.start_run()
+    load(dry, pages + photos)
+    dry_run = dry.finish_run()
+    if size_calls != [p.url for p in photos] or dry_run.saved_bytes != sum(p._size for p in photos):
+        raise AssertionError(f"dry run: sizes() called for {size_calls}, saved {dry_run.saved_bytes}")
+    print(f"✅ Resource policy check passed ({len(cases)} requests, sampled estimate {run.saved_bytes:,} bytes)")
+
+
+def run_parser_benchmark(fixture_dir: str = None, repeat: int = 5) -> dict:
+    """一覧ページ解析のページ/秒を bs4（従来）と lxml で比較する。"""
+    import shop_parser
+
+    pages = _saved_list_pages(fixture_dir)
+    results = {}
+    for backend in ("bs4", "lxml"):
+        if backend == "lxml" and not shop_parser._HAS_LXML:
+            continue
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for html in pages:
+                shop_parser.parse_shop_list(html, backend=backend)
+        results[backend] = len(pages) * repeat / (time.perf_counter() - start)
+    size_kb = sum(len(html) for html in pages) / len(pages) / 1000
+    summary = " / ".join(f"{backend} {pages_per_sec:,.1f} pages/sec" for backend, pages_per_sec in results.items())
+    speedup = f" (x{results['lxml'] / results['bs4']:.1f})" if "lxml" in results else ""
+    print(f"🧩 List parser ({len(pages)} pages, avg {size_kb:.0f} KB): {summary}{speedup}")
+    return results
+
+
+def run_bulk_parse_benchmark(days: int = 60, workers: int = None) -> dict:
+    """
+    日付別アーカイブを模した合成スナップショット（days日 × 3カテゴリ）を一括再解析し、
+    1プロセスとプロセスプールの所要時間・結果の一致を比較する。
+    """
+    import scraper
+    from page_cache import PageCache
+
+    rng = random.Random(0)
+    terms = _raw_lexicon_terms()
+    workers = workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as tmp:
+        for day in range(days):
+            cache = PageCache(os.path.join(tmp, f"day{day:03d}"))
+            for category, url in scraper.TARGET_URLS.items():
+                page = _synthetic_list_page(rng, category, lambda: _synthetic_comment(rng, terms, 0.3), 40)
+                cache.put(url, page, "cityheaven")
+
+        timings, frames = {}, {}
+        for label, n in (("serial", 1), (f"pool x{workers}", workers)):
+            start = time.perf_counter()
+            frames[label] = scraper.reparse_snapshots(tmp, workers=n)
+            timings[label] = time.perf_counter() - start
+
+    serial, pooled = frames.values()
+    if not serial.equals(pooled):
+        raise AssertionError("process-pool reparse differs from serial reparse")
+    summary = " / ".join(f"{label} {seconds * 1000:.0f}ms" for label, seconds in timings.items())
+    print(f"🗄️ Bulk reparse ({days * len(scraper.TARGET_URLS)} pages, {len(serial):,} shops): {summary}")
+    return timings
+
+
+# 旧来実装のキーワード（"ババア" と "ババァ" を別の語として数えていた）
+_REFERENCE_NEGATIVE = [
+    "地雷", "ブス", "ババア", "BBA", "写真詐欺", "パネマジ", "態度悪い",
+    "金ドブ", "二度と行かない", "ゴミ", "最悪", "微妙", "ハズレ",
+    "ババァ", "修正", "詐欺"
+]
+_REFERENCE_POSITIVE = [
+    "神", "リピ確", "最高", "当たり", "可愛い", "よかった",
+    "優良", "レベル高い", "本物", "エロい"
+]
+
+
+def reference_calculate_ldr(df: pd.DataFrame, negative_signals: list = None) -> pd.DataFrame:
+    """
+    旧来の行単位(apply)実装。揺らぎ無しで等価性チェックの基準として使う。
+    negative_signals を渡すとネガティブ語だけ差し替える（表記ゆれ違いの重複語をまとめた場合の基準用）。
+    """
+    result_df = df.copy()
+    negative_signals = _REFERENCE_NEGATIVE if negative_signals is None else negative_signals
+    positive_signals = _REFERENCE_POSITIVE
+
+    def analyze_sentiment(row):
+        base_score = float(row.get('official_rating', 3.0))
+        leak_text = str(row.get('bakusai_leak', ""))
+        official_text = str(row.get('official_review', ""))
+        full_text = leak_text + " " + official_text
+        adjustment = 0.0
+        hit_positives = 0
+        for word in negative_signals:
+            if word in full_text:
+                adjustment -= 0.8
+        for word in positive_signals:
+            if word in full_text:
+                hit_positives += 1
+                adjustment += 0.5
+        if base_score >= 4.5 and hit_positives == 0:
+            adjustment -= 1.0
+        if "アクセス遮断" in leak_text or "失敗" in leak_text or "nan" in leak_text:
+            adjustment -= 0.5
+        final_score = base_score + adjustment
+        return round(max(0.0, min(5.0, final_score)), 1)
+
+    result_df['ai_real_score'] = result_df.apply(analyze_sentiment, axis=1)
+    result_df['ldr'] = result_df.apply(lambda x:
+        ((abs(x['official_rating'] - x['ai_real_score']) / x['official_rating'] * 100)
+         if x['official_rating'] > 0 else 0), axis=1).round(1)
+
+    def label_status(ldr):
+        if ldr >= 50:
+            return '💀ハズレ確定'
+        elif ldr >= 30:
+            return '⚠️要注意'
+        else:
+            return '✅優良'
+
+    result_df['status'] = result_df['ldr'].apply(label_status)
+    return result_df
+
+
+def check_equivalence(rows: int = 20000) -> None:
+    """ベクトル化実装が旧来の行単位実装と同一の結果を返すことを確認する。"""
+    df = make_synthetic_frame(rows, seed=1)
+    # 情報不在の定型文がリークでなく公式口コミ側にある行・リークと口コミの境目にまたがる行
+    df.loc[df.index[:3], 'official_review'] = ["取得失敗", "nan", "アクセス遮断されました"]
+    df.loc[df.index[3:5], 'bakusai_leak'] = ["普通のリーク失", "普通のリークna"]
+    df.loc[df.index[3:5], 'official_review'] = ["敗", "n"]
+    expected = reference_calculate_ldr(df)
+    # 仕様変更: 表記ゆれ違いの重複語（ババア/ババァ）は1語にまとめたため、両方を含む行の減点は1回分になる。
+    # その行だけは重複語を除いた旧来実装を基準にする（check_duplicate_spellings で変化そのものも確認する）
+    full_text = df['bakusai_leak'].astype(str) + " " + df['official_review'].astype(str)
+    both = (full_text.str.contains("ババア", regex=False) & full_text.str.contains("ババァ", regex=False)).to_numpy()
+    if not both.any():
+        raise AssertionError("synthetic data has no row with both ババア and ババァ")
+    merged = reference_calculate_ldr(df[both], negative_signals=[t for t in _REFERENCE_NEGATIVE if t != "ババァ"])
+    expected.loc[both, ['ai_real_score', 'ldr', 'status']] = merged[['ai_real_score', 'ldr', 'status']]
+    actual = calculate_ldr(df, noise=False)
+    for col in ['ai_real_score', 'ldr', 'status']:
+        mismatch = int((expected[col].to_numpy() != actual[col].to_numpy()).sum())
+        if mismatch:
+            raise AssertionError(f"{col}: {mismatch}/{rows} rows differ from reference")
+    print(f"✅ Equivalence check passed ({rows:,} rows, {int(both.sum())} with both ババア/ババァ)")
+
+
+def check_duplicate_spellings() -> None:
+    """
+    旧来実装の語彙で、表記ゆれ違いの重複語の扱いが変わったことを確認する（仕様変更の記録）。
+    "ババア" と "ババァ" を両方含むリークは旧来 -1.6（2語）、現在は -0.8（1語）。
+    片方だけなら -0.8 で変わらず、半角の "ﾊﾞﾊﾞｱ" は旧来ヒットしなかったが現在は -0.8。
+    """
+    df = pd.DataFrame({
+        "official_rating": [3.0, 3.0, 3.0, 3.0],
+        "official_review": ["普通", "普通", "普通", "普通"],
+        "bakusai_leak": ["ババアだった || 完全にババァ", "ババァだった", "ババアだった", "ﾊﾞﾊﾞｱだった"],
+    })
+    want_reference = [1.4, 2.2, 2.2, 3.0]
+    want_current = [2.2, 2.2, 2.2, 2.2]
+    reference = reference_calculate_ldr(df)['ai_real_score'].tolist()
+    current = calculate_ldr(df, noise=False)['ai_real_score'].tolist()
+    if reference != want_reference or current != want_current:
+        raise AssertionError(f"duplicate spellings: reference {reference} (expected {want_reference}), "
+                             f"current {current} (expected {want_current})")
+    print("✅ Duplicate spelling check passed (ババア+ババァ: -1.6 → -0.8)")
+
+
+def _find_all(text: str, sub: str) -> list:
+    """text 中の sub の出現位置（重なりを含む）"""
+    starts, i = [], text.find(sub)
+    while i >= 0:
+        starts.append(i)
+        i = text.find(sub, i + 1)
+    return starts
+
+
+def check_spelling_variants(rows: int = 5000) -> None:
+    """
+    表記ゆれ（半角・全角・小書き仮名）の綴りで書かれたテキストに対し、綴りを展開したマッチャーが
+    テキストを正規化してから正規形の語で走査した場合と同じヒットを返すことを確認する
+    （pyahocorasick / 純Python / polars backend）。
+    """
+    from keyword_matcher import NO_HIT, KeywordMatcher
+    from lexicon import term_spellings
+    from text_normalizer import normalize_text
+
+    lexicon = load_lexicon()
+    rng = random.Random(3)
+    terms = [rng.choice(term_spellings(t)) for t in lexicon.terms for _ in range(4)]
+    texts = [_synthetic_comment(rng, terms, 0.8).replace("、", rng.choice(["、", "，", "！", "ｗ"]))
+             for _ in range(rows)]
+    # 一部のテキストには情報不在の定型文（literals）も混ぜる
+    texts = [text + rng.choice(lexicon.missing_info_markers) + text[:5] if rng.random() < 0.1 else text
+             for text in texts]
+
+    canonical = KeywordMatcher([normalize_text(t) for t in lexicon.terms])
+    python = KeywordMatcher(lexicon.terms, native=False, variants=term_spellings,
+                            literals=lexicon.missing_info_markers)
+    expected_counts = []
+    for text in texts:
+        expected = canonical.count(normalize_text(text))
+        expected_counts.append(expected)
+        for matcher in (lexicon.matcher, python):
+            actual = matcher.count(text)
+            actual = {term_id: n for term_id, n in actual.items() if term_id < len(lexicon.terms)}
+            if actual != expected:
+                raise AssertionError(f"{text!r}: expected hits {expected}, got {actual}")
+
+    # まとめて走査した CSR（scan_batch）と literals の終端が、1テキストずつの走査と一致すること
+    for matcher in (lexicon.matcher, python):
+        indptr, term_ids, counts, literal_end = matcher.scan_batch(texts, literal_ends=True)
+        for i, (text, expected) in enumerate(zip(texts, expected_counts)):
+            actual = dict(zip(term_ids[indptr[i]:indptr[i + 1]].tolist(), counts[indptr[i]:indptr[i + 1]].tolist()))
+            ends = [start + len(m) for m in lexicon.missing_info_markers for start in _find_all(text, m)]
+            if actual != expected or literal_end[i] != min(ends, default=NO_HIT):
+                raise AssertionError(f"{text!r}: scan_batch {actual} / {literal_end[i]}, "
+                                     f"expected {expected} / {min(ends, default=NO_HIT)}")
+
+    try:
+        import polars as pl
+    except ImportError:
+        pl = None
+    if pl is not None:
+        df = pd.DataFrame({"official_rating": np.full(rows, 4.5), "official_review": texts,
+                           "bakusai_leak": texts[::-1]})
+        expected = calculate_ldr(df, noise=False)["ai_real_score"].to_numpy()
+        actual = calculate_ldr(pl.from_pandas(df), noise=False)["ai_real_score"].to_numpy()
+        if not np.array_equal(expected, actual):
+            raise AssertionError(f"polars: {int((expected != actual).sum())}/{rows} rows differ on variant spellings")
+    print(f"✅ Spelling variant check passed ({rows:,} texts)")
+
+
+def _reference_ngram_adjustment(scorer: NgramScorer, text: str) -> float:
+    """NgramScorer の予測を1テキストずつ、n-gram ごとに FNV-1a を計算して求める（check_ngram_scorer の基準）"""
+    shift = 32 - int(np.log2(scorer.n_features))
+    total, count = 0.0, 0
+    for n in range(scorer.ngram_range[0], scorer.ngram_range[1] + 1):
+        for i in range(len(text) - n + 1):
+            h = 0x811C9DC5
+            for ch in text[i:i + n]:
+                h = ((h ^ ord(ch)) * 0x01000193) & 0xFFFFFFFF
+            total += scorer.weights[((h * 0x9E3779B1) & 0xFFFFFFFF) >> shift]
+            count += 1
+    return scorer.bias + total / np.sqrt(max(count, 1))
+
+
+def check_ngram_scorer(rows: int = 300) -> None:
+    """NgramScorer の配列演算による予測が、1テキストずつの素朴な計算と一致することを確認する（空・短いテキストを含む）。"""
+    texts, _ = _scorer_inputs(make_synthetic_frame(rows, seed=4))
+    texts = np.concatenate([texts, np.array(["", "神", "", "地雷", "ﾊﾞﾊﾞｱ", texts[0]], dtype=object)])
+    # 学習済みの重みは学習に出てこない（行をまたぐ）n-gram で0になり差が見えないため、乱数の重みで比べる
+    scorer = NgramScorer()
+    scorer.weights = np.random.default_rng(4).normal(size=scorer.n_features)
+    scorer.bias = 0.3
+    expected = np.array([_reference_ngram_adjustment(scorer, t) for t in texts])
+    actual = scorer.predict_adjustment(texts)
+    if not np.allclose(expected, actual, rtol=0, atol=1e-9):
+        raise AssertionError(f"ngram scorer: {int((~np.isclose(expected, actual, rtol=0, atol=1e-9)).sum())}"
+                             f"/{len(texts)} texts differ from the per-text reference")
+    print(f"✅ Ngram scorer check passed ({len(texts):,} texts)")
+
+
+def check_lexicon_reload() -> None:
+    """
+    レキシコンの再読み込みが書きかけ（途中で切れた JSON）のファイルで失敗しても、警告を出して
+    直前のレキシコンを返し続けること、ファイルが次に変わったら読み込み直すことを確認する。
+    """
+    import warnings
+
+    with open(LEXICON_PATH, "rb") as f:
+        raw = f.read()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "lexicon.json")
+
+        def write(data: bytes, mtime_ns: int) -> None:
+            with open(path, "wb") as f:
+                f.write(data)
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+
+        write(raw, 1_000_000_000)
+        good = load_lexicon(path)
+        write(raw[:len(raw) // 2], 2_000_000_000)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            first, second = load_lexicon(path), load_lexicon(path)
+        if first is not good or second is not good:
+            raise AssertionError("truncated lexicon replaced the last good lexicon")
+        if len(caught) != 1:
+            raise AssertionError(f"truncated lexicon warned {len(caught)} times, expected once per file change")
+
+        spec = json.loads(raw)
+        spec["negative"].append("出禁")
+        write(json.dumps(spec, ensure_ascii=False).encode("utf-8"), 3_000_000_000)
+        reloaded = load_lexicon(path)
+    if "出禁" not in reloaded.terms:
+        raise AssertionError("lexicon was not reloaded after the file was fixed")
+    print("✅ Lexicon reload check passed")
+
+
+def _collect_polars(result) -> pd.DataFrame:
+    """polars backend の結果（LazyFrame / DataFrame）を比較用の pandas DataFrame にする。"""
+    if hasattr(result, "collect"):
+        result = result.collect()
+    return result.to_pandas()
+
+
+def check_polars_equivalence(rows: int = 20000) -> None:
+    """polars backend が DataFrame / LazyFrame のどちらでも pandas 版と同一の結果を返すことを確認する。"""
+    try:
+        import polars as pl
+    except ImportError:
+        print("⏭️ polars not installed: polars equivalence check skipped")
+        return
+
+    df = make_synthetic_frame(rows, seed=2)
+    # 欠損・0評価・リーク欠損の行も混ぜる
+    df.loc[df.index[0:5], 'official_rating'] = np.nan
+    df.loc[df.index[5:10], 'official_rating'] = 0.0
+    df.loc[df.index[10:15], 'bakusai_leak'] = None
+    frame = pl.from_pandas(df)
+
+    for kwargs in ({'noise': False}, {'seed': 0}, {'seed': 0, 'lean': True}):
+        expected = calculate_ldr(df, **kwargs)
+        for source in (frame, frame.lazy()):
+            actual = _collect_polars(calculate_ldr(source, **kwargs))
+            for col in RESULT_COLUMNS:
+                if col == 'status':
+                    same = expected[col].astype(str).to_numpy() == actual[col].astype(str).to_numpy()
+                else:
+                    same = np.isclose(expected[col].to_numpy(dtype=np.float64),
+                                      actual[col].to_numpy(dtype=np.float64), rtol=0, atol=0, equal_nan=True)
+                mismatch = int((~same).sum())
+                if mismatch:
+                    raise AssertionError(f"polars {type(source).__name__} {kwargs} {col}: "
+                                         f"{mismatch}/{rows} rows differ from pandas")
+    print(f"✅ Polars equivalence check passed ({rows:,} rows)")
+
+
+def run_polars_benchmark(rows: int) -> dict:
+    """同じデータで pandas 版と polars backend（LazyFrame）のスループットを比較する。"""
+    import polars as pl
+
+    df = make_synthetic_frame(rows)
+    frame = pl.from_pandas(df)
+    results = {}
+    for name, run in (("pandas", lambda: calculate_ldr(df, seed=0, lean=True)),
+                      ("polars", lambda: calculate_ldr(frame.lazy(), seed=0, lean=True).collect())):
+        start = time.perf_counter()
+        run()
+        results[name] = rows / (time.perf_counter() - start)
+    print(f"🐻‍❄️ Polars ({rows:,} rows): pandas {results['pandas']:,.0f} rows/sec / "
+          f"polars {results['polars']:,.0f} rows/sec (x{results['polars'] / results['pandas']:.2f})")
+    return results
+
+
+def _scorer_inputs(df: pd.DataFrame) -> tuple:
+    """calculate_ldr がスコアラーに渡すのと同じ (テキスト配列, 公式評価)"""
+    texts = (df['bakusai_leak'].astype(str) + " " + df['official_review'].astype(str)).to_numpy(dtype=object)
+    return texts, df['official_rating'].to_numpy(dtype=np.float64)
+
+
+def _fit_ngram_scorer(texts, samples: int = 5000) -> NgramScorer:
+    """先頭 samples 件の KeywordScorer の補正値を教師にした NgramScorer"""
+    sample = texts[:samples]
+    targets = KeywordScorer().score_batch(sample, np.zeros(len(sample)))
+    return NgramScorer().fit(sample, targets, epochs=20)
+
+
+def run_scorer_benchmark(rows: int, name: str = "ngram", repeat: int = 3) -> dict:
+    """スコアラー単体（score_batch）のスループットを目標（SCORER_TARGET_TEXTS_PER_SEC）と並べて計測する。"""
+    df = make_synthetic_frame(rows)
+    texts, base_ratings = _scorer_inputs(df)
+    scorer = _fit_ngram_scorer(texts) if name == "ngram" else KeywordScorer()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scorer.score_batch(texts, base_ratings)
+        best = min(best, time.perf_counter() - start)
+    rate = rows / best
+    mark = "✅" if rate >= SCORER_TARGET_TEXTS_PER_SEC else "⚠️"
+    print(f"🧮 Scorer {name} ({rows:,} texts): {rate:,.0f} texts/sec "
+          f"{mark} target {SCORER_TARGET_TEXTS_PER_SEC:,} texts/sec")
+    return {"scorer": name, "rows": rows, "texts_per_sec": rate}
+
+
+def _time_stages(df: pd.DataFrame) -> dict:
+    """calculate_ldr と同じ処理をステージごとに計時する。"""
+    timings = {}
+    start = time.perf_counter()
+    ai_score = analyzer._sentiment_scores(df, seed=0)
+    timings["sentiment"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ldr = analyzer._ldr_values(df['official_rating'].to_numpy(dtype=np.float64), ai_score)
+    timings["ldr"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analyzer._label_status(ldr)
+    timings["labeling"] = time.perf_counter() - start
+    return timings
+
+
+def run_benchmark(rows: int, repeat: int = 3, hit_density: float = 0.3, unique_texts: int = None) -> dict:
+    """
+    1サイズ分の計測。ステージ別時間はrepeat回中の最速値、
+    ピークメモリは tracemalloc で計測した calculate_ldr 1回分の追加確保量。
+    比較用に旧来の行単位実装（reference_calculate_ldr）のスループットも
+    先頭 REFERENCE_MAX_ROWS 行で1回計測する。
+    """
+    df = make_synthetic_frame(rows, hit_density=hit_density, unique_texts=unique_texts)
+
+    best_total = float("inf")
+    best_stages = None
+    for _ in range(repeat):
+        stages = _time_stages(df)
+        start = time.perf_counter()
+        calculate_ldr(df, seed=0)
+        total = time.perf_counter() - start
+        if total < best_total:
+            best_total, best_stages = total, stages
+
+    tracemalloc.start()
+    calculate_ldr(df, seed=0)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    reference_rows = min(rows, REFERENCE_MAX_ROWS)
+    start = time.perf_counter()
+    reference_calculate_ldr(df.iloc[:reference_rows])
+    reference_seconds = time.perf_counter() - start
+
+    result = {
+        "rows": rows,
+        "seconds": best_total,
+        "rows_per_sec": rows / best_total,
+        "reference_rows_per_sec": reference_rows / reference_seconds,
+        "unique_leaks": int(df["bakusai_leak"].nunique()),
+        "peak_mb": peak / 1e6,
+        "stages": best_stages,
+    }
+    stage_text = " / ".join(f"{k} {v * 1000:.0f}ms" for k, v in best_stages.items())
+    print(f"⏱️ {rows:>9,} rows: {result['rows_per_sec']:>10,.0f} rows/sec  "
+          f"(reference {result['reference_rows_per_sec']:,.0f} rows/sec, "
+          f"x{result['rows_per_sec'] / result['reference_rows_per_sec']:.1f})  "
+          f"peak {result['peak_mb']:7.1f} MB  ({stage_text})  unique leaks {result['unique_leaks']:,}")
+    return result
+
+
+def run_suite(sizes: list, repeat: int = 3, hit_density: float = 0.3, unique_texts: int = None) -> dict:
+    """全サイズを計測し、ベースラインとして保存できる形式で返す。"""
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "lexicon_version": load_lexicon().version,
+        "hit_density": hit_density,
+        "unique_texts": unique_texts,
+        "results": [run_benchmark(rows, repeat, hit_density, unique_texts) for rows in sizes],
+    }
+
+
+def compare_with_baseline(report: dict, baseline: dict, tolerance: float = REGRESSION_TOLERANCE) -> bool:
+    """ベースラインと同じ行数同士でスループットを比較する。劣化が無ければTrue。"""
+    base_by_rows = {r["rows"]: r for r in baseline["results"]}
+    ok = True
+    print(f"📏 Baseline comparison (created {baseline.get('created_at', '?')}, tolerance {tolerance:.0%})")
+    if baseline.get("unique_texts") != report.get("unique_texts"):
+        print(f"    ⚠️ text uniqueness differs (baseline unique_texts={baseline.get('unique_texts')}, "
+              f"now {report.get('unique_texts')}): throughput is not comparable")
+    for result in report["results"]:
+        base = base_by_rows.get(result["rows"])
+        if base is None:
+            continue
+        ratio = result["rows_per_sec"] / base["rows_per_sec"]
+        regressed = ratio < 1 - tolerance
+        ok = ok and not regressed
+        mark = "❌" if regressed else "✅"
+        print(f"    {mark} {result['rows']:>9,} rows: {base['rows_per_sec']:,.0f} -> "
+              f"{result['rows_per_sec']:,.0f} rows/sec (x{ratio:.2f}), "
+              f"peak {base['peak_mb']:.1f} -> {result['peak_mb']:.1f} MB")
+    return ok
+
+
+def run_scaling_benchmark(rows: int, max_workers: int) -> dict:
+    """workers=1〜max_workers でのスループットとスピードアップを計測する。"""
+    df = make_synthetic_frame(rows)
+    results = {}
+    for workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        calculate_ldr(df, seed=0, workers=workers)
+        results[workers] = rows / (time.perf_counter() - start)
+        print(f"⚙️ workers={workers}: {results[workers]:,.0f} rows/sec "
+              f"(x{results[workers] / results[1]:.2f})")
+    return results
+
+
+def run_cache_benchmark(rows: int) -> dict:
+    """
+    永続スコアキャッシュ（一時ファイル）でのコールド/ウォーム実行時間をキャッシュ無しと並べて計測し、
+    キャッシュ無しと結果が一致することを確認する。
+    """
+    df = make_synthetic_frame(rows)
+    start = time.perf_counter()
+    expected = calculate_ldr(df, seed=0)['ai_real_score'].to_numpy()
+    results = {"uncached": time.perf_counter() - start}
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ScoreCache(os.path.join(tmp, "score_cache.sqlite3"))
+        for run in ("cold", "warm"):
+            start = time.perf_counter()
+            scored = calculate_ldr(df, seed=0, scorer=KeywordScorer(cache=cache))
+            results[run] = time.perf_counter() - start
+            if not np.array_equal(scored['ai_real_score'].to_numpy(), expected):
+                raise AssertionError(f"score cache ({run}) changed ai_real_score")
+        stats = cache.stats()
+        cache.close()
+    print(f"💾 Score cache ({rows:,} rows): uncached {results['uncached'] * 1000:.0f}ms / "
+          f"cold {results['cold'] * 1000:.0f}ms / warm {results['warm'] * 1000:.0f}ms  "
+          f"(hits {stats['hits']:,} / misses {stats['misses']:,})")
+    return results
+
+
+def check_score_cache() -> None:
+    """
+    スコアキャッシュが計算結果を返し直せること、ミスだけを計算すること、
+    計算中に SQLite の書き込みロックもインスタンスのロックも持っていないこと、
+    上限を超えたら最終参照が古いものから追い出すことを確認する。
+    """
+    import sqlite3
+    import threading
+
+    texts = ["地雷だった", "最高、リピ確", "普通", "ＢＢＡ"]
+    expected = KeywordScorer._scan_unique_texts(texts, load_lexicon())
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ScoreCache(os.path.join(tmp, "score_cache.sqlite3"))
+        computed = []
+
+        def compute(misses):
+            computed.append(list(misses))
+            # 計算中に別の接続が書き込めること（書き込みトランザクションの外で計算している）
+            other = sqlite3.connect(cache.path, timeout=0)
+            with other:
+                other.execute("UPDATE scores SET last_used = last_used")
+            other.close()
+            # 同じインスタンスを別スレッド（別セッション）から使えること
+            worker = threading.Thread(target=len, args=(cache,))
+            worker.start()
+            worker.join(timeout=5)
+            if worker.is_alive():
+                raise AssertionError("score cache holds its lock while computing misses")
+            return KeywordScorer._scan_unique_texts(misses, load_lexicon())
+
+        first = cache.get_or_compute(texts[:2], "v", compute)
+        # 最終参照時刻の更新対象（古いエントリ）のヒットとミスが混ざった参照
+        with sqlite3.connect(cache.path) as conn:
+            conn.execute("UPDATE scores SET last_used = 0")
+        conn.close()
+        second = cache.get_or_compute(texts, "v", compute)
+        cache.close()
+
+        # 追い出し: 上限3件に1件ずつ足していき、常に新しい3件だけが残ること
+        small = ScoreCache(os.path.join(tmp, "evict.sqlite3"), max_entries=3)
+        for i, text in enumerate(texts + ["店員さん優しい"]):
+            small.get_or_compute([text], "v", lambda misses: KeywordScorer._scan_unique_texts(misses, load_lexicon()))
+            with sqlite3.connect(small.path) as conn:
+                conn.execute("UPDATE scores SET last_used = ? WHERE text_hash = ?", (i, text_hash(text)))
+            conn.close()
+        with sqlite3.connect(small.path) as conn:
+            kept = {row[0] for row in conn.execute("SELECT text_hash FROM scores")}
+        conn.close()
+        small.close()
+    want_kept = {text_hash(t) for t in (texts + ["店員さん優しい"])[-3:]}
+    if kept != want_kept:
+        raise AssertionError(f"score cache kept {len(kept)} entries, expected the 3 most recently used")
+    if computed != [texts[:2], texts[2:]]:
+        raise AssertionError(f"score cache computed {computed}, expected only the misses")
+    for got in (first, second):
+        for values, want in zip(got, expected):
+            if not np.array_equal(values, want[:len(values)]):
+                raise AssertionError(f"score cache returned {got}, expected {expected}")
+    print("✅ Score cache check passed")
+
+
+class _OfflineBrowserService:
+    """ブラウザを起動しない BrowserService の代わり（スナップショットだけで同期が完結するかの確認用）"""
+    policy = None
+
+    def call(self, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    def new_page(self):
+        raise AssertionError("browser page requested")
+
+
+def check_page_archive() -> None:
+    """
+    日付別アーカイブが書き込み時に保持日数より古い日のディレクトリを削除すること、
+    保持期間内の日と日付でないディレクトリは残すことを確認する。
+    """
+    from page_cache import PageCache
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = os.path.join(tmp, "archive")
+        now = time.time()
+        days = {offset: time.strftime("%Y%m%d", time.localtime(now - offset * 24 * 60 * 60)) for offset in (3, 10)}
+        for name in (*days.values(), "manual"):
+            os.makedirs(os.path.join(archive, name))
+        cache = PageCache(os.path.join(tmp, "cache"), archive_dir=archive, archive_days=7)
+        cache.put("https://example.com/a", "<html></html>", "cityheaven")
+        # 同じ日の2回目以降の書き込みではディレクトリを走査し直さない
+        os.makedirs(os.path.join(archive, "20000101"))
+        cache.put("https://example.com/b", "<html></html>", "cityheaven")
+        kept = set(os.listdir(archive))
+    today = time.strftime("%Y%m%d", time.localtime(now))
+    want = {today, days[3], "manual", "20000101"}
+    if kept != want:
+        raise AssertionError(f"page archive kept {sorted(kept)}, expected {sorted(want)}")
+    print("✅ Page archive retention check passed")
+
+
+def check_record_fixtures() -> None:
+    """
+    録画（record_fixtures）がスレッドURLの記録を使わないことを確認する。
+    記録済みの店舗は検索ページを経ずにスレッドへ直行するので、記録を使うと検索ページが録画されず、
+    記録を持たない再生が失敗する。本番の記録（ZERO_DEVIL_STORE）が書き換わらないことも確かめる。
+    """
+    from page_cache import PageCache
+    import scraper
+
+    calls = []
+    fetch = scraper.fetch_yokohama_data
+    scraper.fetch_yokohama_data = lambda **kwargs: calls.append(kwargs)
+    try:
+        scraper.record_fixtures(tempfile.gettempdir())
+    finally:
+        scraper.fetch_yokohama_data = fetch
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_fixtures(tmp)
+        # 本番の記録には、録画しようとしているページとは別のスレッドが記録済み
+        live = ShopStore(os.path.join(tmp, "live.sqlite3"))
+        shops = [(category, f"{category}店舗{i}") for category in scraper.TARGET_URLS for i in range(2)]
+        for category, name in shops:
+            live.remember_thread(shop_id(category, name), name, "https://bakusai.com/thr_res/acode=15/tid=0/")
+        before = [live.thread_url(shop_id(category, name)) for category, name in shops]
+        os.environ[STORE_ENV] = live.path
+        try:
+            # 録画時と同じ引数で、取得済みのページ（TTL内）だけから同期する
+            cache = PageCache(tmp)
+            result = fetch(cache=cache, service=_OfflineBrowserService(), store=calls[0].get("store"))
+        finally:
+            del os.environ[STORE_ENV]
+        after = [live.thread_url(shop_id(category, name)) for category, name in shops]
+        live.close()
+
+    leaks = [leak for leak in result["bakusai_leak"] if leak]
+    failed = [leak for leak in leaks if leak.startswith("アクセス失敗")]
+    if len(leaks) != len(shops) or failed:
+        raise AssertionError(f"recording sync did not load every search/thread page: {failed}")
+    if before != after:
+        raise AssertionError("recording sync modified the live thread store")
+    print(f"✅ Record fixtures check passed ({cache.hits} pages, live store untouched)")
+
+
+def check_store_roundtrip() -> None:
+    """
+    ShopStore の保存と読み出しが往復で一致することを確認する
+    （record_run → latest / latest_records / last_run / runs / history、差分計算への previous の受け渡し、
+    スレッドURLの記録、レスの追記と重複除去）。
+    """
+    from analyzer import calculate_ldr_incremental
+
+    frame = make_synthetic_frame(300, seed=1)
+    first = calculate_ldr_incremental(frame, seed=0)
+    columns = ["name", "category", "official_rating", "official_review", "bakusai_leak",
+               "ai_real_score", "ldr", "status", "input_hash"]
+
+    def rows(df: pd.DataFrame) -> list:
+        df = df.astype({"category": str, "status": str}).sort_values("name")
+        return [tuple(None if pd.isna(v) else v for v in row) for row in df[columns].itertuples(index=False)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ShopStore(os.path.join(tmp, "store.sqlite3"))
+        run_id = store.record_run(first, lexicon_version="v1", source="check", run_at=1000.0)
+        latest = store.latest()
+        if rows(latest) != rows(first):
+            raise AssertionError("latest() differs from the recorded result")
+        records = store.latest_records()
+        if [(r["name"], r["ldr"]) for r in records] != list(zip(latest["name"], latest["ldr"])):
+            raise AssertionError("latest_records() differs from latest()")
+        last = store.last_run()
+        if (last["run_id"], last["shop_count"], last["lexicon_version"], last["source"]) != (run_id, 300, "v1", "check"):
+            raise AssertionError(f"last_run() returned {last}")
+
+        # 2回目の同期: 1店舗のリークだけ変わる → その店舗だけ再計算され、履歴が2件になる
+        changed = frame.copy()
+        changed.loc[0, "bakusai_leak"] = "最悪の地雷店でした。二度と行かない"
+        second = calculate_ldr_incremental(changed, previous=latest, seed=0)
+        if second.attrs.get("recomputed_rows") != 1:
+            raise AssertionError(f"incremental sync recomputed {second.attrs.get('recomputed_rows')} rows, expected 1")
+        store.record_run(second, run_at=2000.0)
+        history = store.history(shop_id(changed.loc[0, "category"], changed.loc[0, "name"]))
+        if history["run_at"].tolist() != [1000.0, 2000.0] or history["bakusai_leak"].iloc[-1] != changed.loc[0, "bakusai_leak"]:
+            raise AssertionError(f"history() returned\n{history}")
+        if len(store.runs()) != 2 or rows(store.latest()) != rows(second):
+            raise AssertionError("second run was not recorded as the latest")
+
+        # スレッドURLの記録とレスの追記
+        thread = "https://bakusai.com/thr_res/acode=15/tid=1/"
+        store.remember_thread("shop", "店舗", thread)
+        comments = [{"res_no": n, "posted_at": None, "text": f"レス{n}"} for n in range(1, 21)]
+        added = [store.add_comments(thread, comments[:12]), store.add_comments(thread, comments[8:])]
+        if store.thread_url("shop") != thread or added != [12, 8] or store.last_res_no(thread) != 20:
+            raise AssertionError(f"thread store: url {store.thread_url('shop')}, added {added}, "
+                                 f"last {store.last_res_no(thread)}")
+        if store.recent_comments(thread, limit=3) != ["レス18", "レス19", "レス20"]:
+            raise AssertionError(f"recent_comments() returned {store.recent_comments(thread, limit=3)}")
+        store.forget_thread("shop")
+        if store.thread_url("shop") is not None:
+            raise AssertionError("forget_thread() did not remove the mapping")
+        store.close()
+    print("✅ Store round-trip check passed")
+
+
+def check_record_replay() -> None:
+    """
+    録画 → 再生の往復で同じ店舗データになることを確認する。
+    録画と同じ引数（スレッドURLの記録なし）で取得済みページから同期し、そのページを replay_fixtures で再生する。
+    再生でスレッドURLの記録を使う場合は、2回目（記録済みスレッドへ直行・新着レスなし）も同じ結果になること。
+    """
+    from page_cache import PageCache
+    import scraper
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture_dir = os.path.join(tmp, "fixtures")
+        write_synthetic_fixtures(fixture_dir)
+        recorded = scraper.fetch_yokohama_data(cache=PageCache(fixture_dir), service=_OfflineBrowserService(),
+                                               store=False)
+        replayed = scraper.replay_fixtures(fixture_dir)
+        if not replayed.equals(recorded):
+            raise AssertionError("replayed shops differ from the recording sync")
+
+        store = ShopStore(os.path.join(tmp, "store.sqlite3"))
+        synced = [scraper.replay_fixtures(fixture_dir, store=store) for _ in range(2)]
+        store.close()
+        if not synced[1].equals(synced[0]):
+            raise AssertionError("replay with remembered threads differs from the first replay")
+        if any(leak.startswith("アクセス失敗") for frame in synced for leak in frame["bakusai_leak"]):
+            raise AssertionError("replay with the thread store failed to load a page")
+    print(f"✅ Record/replay check passed ({len(recorded)} shops)")
+
+
+def run_pipeline_benchmark(fixture_dir: str = None) -> dict:
+    """
+    再生モードで 取得（フィクスチャのHTML解析）→ calculate_ldr → ストア保存・読み出し
+    →（streamlitがあれば）app.py 描画
+    の全パイプラインをブラウザ・ネットワーク無しで計測する。
+    fixture_dir 省略時は合成フィクスチャを一時ディレクトリに生成して使う。
+    """
+    from page_cache import ReplayCache
+    import scraper
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if fixture_dir is None:
+            fixture_dir = tmp
+            write_synthetic_fixtures(fixture_dir)
+
+        timings = {}
+        start = time.perf_counter()
+        shops = scraper.replay_fixtures(fixture_dir)
+        timings["fetch"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scored = calculate_ldr(shops, seed=0)
+        timings["analyze"] = time.perf_counter() - start
+
+        # 同期結果の保存と、アプリ起動時の読み出し（スクレイピング無しの表示）
+        store_path = os.path.join(tmp, "store.sqlite3")
+        store = ShopStore(store_path)
+        start = time.perf_counter()
+        store.record_run(scored, source="replay")
+        timings["store"] = time.perf_counter() - start
+        start = time.perf_counter()
+        store.latest()
+        timings["load"] = time.perf_counter() - start
+
+        # スレッドURLの記録: 1回目は検索結果→スレッド、2回目は記録済みスレッドへ直行する
+        lookups = []
+        for _ in range(2):
+            cache = ReplayCache(fixture_dir)
+            scraper.fetch_yokohama_data(cache=cache, store=store)
+            lookups.append(cache.hits)
+        store.close()
+
+        try:
+            from streamlit.testing.v1 import AppTest
+        except ImportError:
+            print("⏭️ streamlit not installed: app rendering skipped")
+        else:
+            os.environ[scraper.REPLAY_ENV] = fixture_dir
+            os.environ[STORE_ENV] = store_path
+            try:
+                start = time.perf_counter()
+                app = AppTest.from_file("app.py", default_timeout=120)
+                app.run()
+                app.button[0].click().run()
+                timings["render"] = time.perf_counter() - start
+            finally:
+                del os.environ[scraper.REPLAY_ENV]
+                del os.environ[STORE_ENV]
+
+    stages = " / ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in timings.items())
+    print(f"▶️ Replay pipeline ({len(shops)} shops): {stages}")
+    print(f"🔗 Page loads per sync: {lookups[0]} → {lookups[1]} with remembered Bakusai threads")
+    return timings
+
+
+def _frame_bytes(df: pd.DataFrame) -> int:
+    # object列は文字列オブジェクトを列ごとに数える（pandasの deep=True 計上）
+    return int(df.memory_usage(deep=True).sum())
+
+
+def report_memory(rows: int) -> dict:
+    """
+    従来構成（objectテキスト + 全列コピーの結果）と省メモリ構成
+    （Arrow文字列 + categorical + leanモード）のメモリ使用量を比較する。
+    """
+    legacy_input = make_synthetic_frame(rows)
+    lean_input = legacy_input.astype({
+        "name": "string[pyarrow]",
+        "official_review": "string[pyarrow]",
+        "bakusai_leak": "string[pyarrow]",
+        "category": "category",
+    })
+
+    legacy_output = calculate_ldr(legacy_input, seed=0)
+    legacy_output['status'] = legacy_output['status'].astype(object)
+    lean_output = calculate_ldr(lean_input, seed=0, lean=True)
+
+    report = {
+        "legacy_input": _frame_bytes(legacy_input),
+        "legacy_output": _frame_bytes(legacy_output),
+        "lean_input": _frame_bytes(lean_input),
+        "lean_output": _frame_bytes(lean_output),
+    }
+    legacy_total = report["legacy_input"] + report["legacy_output"]
+    lean_total = report["lean_input"] + report["lean_output"]
+    print(f"🧠 Memory ({rows:,} rows)")
+    for key, value in report.items():
+        print(f"    {key:<14} {value / 1e6:10.1f} MB")
+    print(f"    total          {legacy_total / 1e6:10.1f} MB -> {lean_total / 1e6:.1f} MB "
+          f"(-{(1 - lean_total / legacy_total) * 100:.0f}%)")
+    return report
+
+
+def run_checks() -> None:
+    """全ての check_*（等価性・回帰チェック）を実行する。失敗すると AssertionError。"""
+    check_equivalence()
+    check_duplicate_spellings()
+    check_spelling_variants()
+    check_lexicon_reload()
+    check_ngram_scorer()
+    check_polars_equivalence()
+    check_parser_equivalence()
+    check_comment_records()
+    check_resource_policy()
+    check_score_cache()
+    check_store_roundtrip()
+    check_page_archive()
+    check_record_fixtures()
+    check_record_replay()
+    check_import_budget()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check-only", action="store_true", help="等価性・回帰チェックだけを実行して終了する")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--hit-density", type=float, default=0.3, help="1コメントあたりのレキシコンヒット確率")
+    parser.add_argument("--unique-texts", type=int, default=None, metavar="N",
+                        help="テキストをN件のプールから重複を許して引く（省略時はリークが行ごとに一意）")
+    parser.add_argument("--save-baseline", metavar="PATH", help="計測結果をベースラインJSONとして保存する")
+    parser.add_argument("--baseline", metavar="PATH", help="ベースラインJSONと比較する")
+    parser.add_argument("--workers", type=int, default=0, help="スケーリング計測の最大ワーカー数")
+    parser.add_argument("--memory", action="store_true", help="メモリレポートを出力する")
+    parser.add_argument("--score-cache", action="store_true", help="永続スコアキャッシュを計測する")
+    parser.add_argument("--polars", action="store_true", help="polars backend のスループットを計測する")
+    parser.add_argument("--scorer", choices=("keyword", "ngram"), help="スコアラー単体のスループットを計測する")
+    parser.add_argument("--parser", nargs="?", const="", metavar="DIR",
+                        help="一覧ページパーサーを計測する（DIR省略時は合成ページ）")
+    parser.add_argument("--bulk-parse", action="store_true", help="スナップショット一括再解析を計測する")
+    parser.add_argument("--replay", nargs="?", const="", metavar="DIR",
+                        help="フィクスチャ再生でパイプライン全体を計測する（DIR省略時は合成フィクスチャ）")
+    args = parser.parse_args()
+
+    run_checks()
+    if args.check_only:
+        sys.exit(0)
+    report = run_suite(args.sizes, args.repeat, args.hit_density, args.unique_texts)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Baseline saved: {args.save_baseline}")
+
+    if args.workers:
+        run_scaling_benchmark(max(args.sizes), args.workers)
+    if args.memory:
+        report_memory(max(args.sizes))
+    if args.score_cache:
+        run_cache_benchmark(max(args.sizes))
+    if args.polars:
+        run_polars_benchmark(max(args.sizes))
+    if args.scorer:
+        run_scorer_benchmark(max(args.sizes), args.scorer, args.repeat)
+    if args.parser is not None:
+        if args.parser:
+            check_parser_equivalence(args.parser)
+        run_parser_benchmark(args.parser or None)
+    if args.bulk_parse:
+        run_bulk_parse_benchmark(workers=args.workers or None)
+    if args.replay is not None:
+        run_pipeline_benchmark(args.replay or None)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            if not compare_with_baseline(report, json.load(f)):
+                sys.exit(1)
@@ -0,0 +1,239 @@
+"""
+Shared Browser Service
+======================
+同期のたびに Chromium を起動・終了せず、プロセス内で1つの persistent context を
+使い回すためのブラウザサービス。Streamlit のセッション・再実行をまたいで温まったまま残る。
+
+Playwright の sync API は起動したスレッドでしか使えないため、サービスは専用スレッドを1本持ち、
+ブラウザ操作を含む処理はすべて call() でそのスレッドに投げて実行する
+（同期処理はキューで直列化されるので、複数セッションが同時に押しても同時アクセスにならない）。
+
+- ページの払い出し: new_page()（サービススレッド上で呼ぶ）
+- ヘルスチェック: 払い出しのたびに常駐のプローブページで evaluate し、応答が無ければ再起動
+- 自動再起動: ヘルスチェック失敗・new_page 失敗時にロックを掃除して起動し直す
+- アイドル停止: idle_timeout 秒ジョブが無ければブラウザを閉じる（次のジョブで再起動）
+- リソース中断: 起動時に ResourcePolicy をコンテキストに取り付ける（画像・フォント・第三者ホスト等）
+"""
+
+import atexit
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+from resource_policy import ResourcePolicy
+
+USER_DATA_DIR = "./user_data_dir"
+
+# launch_persistent_context の引数（slow_mo は付けない: 全操作に一律の遅延が入るため）
+LAUNCH_OPTIONS = dict(
+    headless=False,
+    args=["--disable-blink-features=AutomationControlled"],
+    user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+    viewport={'width': 1280, 'height': 800},
+    locale='ja-JP',
+    ignore_https_errors=True,
+    timeout=15000,
+)
+
+# WebDriver偽装
+_INIT_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+"""
+
+_STOP = object()
+
+
+def _kill_zombie_chromium(user_data_dir: str = USER_DATA_DIR):
+    """
+    起動前にゾンビChromiumプロセスを駆逐（ディレクトリロック回避）
+
+    注意: pkill chromiumは他のChromiumプロセス（Antigravityブラウザ等）も殺す危険がある。
+    代わりにuser_data_dirのロックファイルを確認し、必要に応じて削除する。
+    """
+    # ロックファイルのパス（Chromiumが使用中のディレクトリに作成される）
+    lock_files = [
+        os.path.join(user_data_dir, "SingletonLock"),
+        os.path.join(user_data_dir, "SingletonCookie"),
+        os.path.join(user_data_dir, "SingletonSocket"),
+    ]
+
+    try:
+        for lock_file in lock_files:
+            if os.path.lexists(lock_file):
+                try:
+                    os.remove(lock_file)
+                    print(f"🧹 Removed stale lock: {lock_file}")
+                except Exception as e:
+                    print(f"⚠️ Could not remove {lock_file}: {e}")
+
+        print("🧹 Lock cleanup completed.")
+    except Exception as e:
+        print(f"⚠️ Cleanup warning (non-fatal): {e}")
+
+
+class BrowserService:
+    """
+    専用スレッドで persistent context を保持するブラウザサービス。
+
+    Args:
+        user_data_dir: Chromium のプロファイルディレクトリ（Cookie・年齢確認状態を保持）。
+        launch_options: launch_persistent_context に渡す引数（LAUNCH_OPTIONS を上書き）。
+        idle_timeout: この秒数ジョブが無ければブラウザを閉じる（None なら閉じない）。
+        policy: 起動のたびにコンテキストへ取り付けるリクエスト中断ポリシー
+            （省略時は既定の ResourcePolicy、False なら何も中断しない）。
+    """
+
+    def __init__(self, user_data_dir: str = USER_DATA_DIR, launch_options: dict = None,
+                 idle_timeout: float = 30 * 60, policy: ResourcePolicy = None):
+        self.user_data_dir = user_data_dir
+        self.launch_options = {**LAUNCH_OPTIONS, **(launch_options or {})}
+        self.idle_timeout = idle_timeout
+        self.policy = ResourcePolicy() if policy is None else (policy or None)
+        self.launches = 0
+        self.restarts = 0
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._playwright = None
+        self._context = None
+        self._probe = None
+
+    # --- 呼び出し側スレッドから使うAPI ---
+
+    def call(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs) をサービススレッドで実行して結果を返す（例外はそのまま送出）。"""
+        if threading.current_thread() is self._thread:
+            return fn(*args, **kwargs)
+        self._ensure_thread()
+        future = Future()
+        self._jobs.put((fn, args, kwargs, future))
+        return future.result()
+
+    def close(self) -> None:
+        """ブラウザを閉じてサービススレッドを止める。"""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._jobs.put(_STOP)
+            thread.join(timeout=30)
+
+    @property
+    def running(self) -> bool:
+        return self._context is not None
+
+    # --- サービススレッド上で使うAPI ---
+
+    def new_page(self):
+        """ヘルスチェック済みのコンテキストから新しいページを払い出す（使い終わったら close する）。"""
+        self._assert_service_thread()
+        self._ensure_browser()
+        try:
+            return self._context.new_page()
+        except Exception as e:
+            print(f"⚠️ new_page failed ({e}) - restarting browser")
+            self._restart()
+            return self._context.new_page()
+
+    def healthy(self) -> bool:
+        """ブラウザが応答するか（常駐プローブページで式を評価できるか）"""
+        self._assert_service_thread()
+        if self._context is None or self._probe is None:
+            return False
+        try:
+            return self._probe.evaluate("1 + 1") == 2
+        except Exception:
+            return False
+
+    # --- 内部 ---
+
+    def _ensure_thread(self) -> None:
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="browser-service", daemon=True)
+                self._thread.start()
+
+    def _assert_service_thread(self) -> None:
+        if threading.current_thread() is not self._thread:
+            raise RuntimeError("BrowserService: browser objects may only be used via call()")
+
+    def _run(self) -> None:
+        while True:
+            try:
+                job = self._jobs.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                if self._context is not None:
+                    print("💤 Browser idle - closing")
+                    self._shutdown()
+                continue
+            if job is _STOP:
+                self._shutdown()
+                return
+            fn, args, kwargs, future = job
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def _ensure_browser(self) -> None:
+        if self._context is None:
+            self._launch()
+        elif not self.healthy():
+            print("⚠️ Browser health check failed - restarting")
+            self._restart()
+
+    def _launch(self) -> None:
+        from playwright.sync_api import sync_playwright
+
+        # Phase 0: プレクリーンアップ
+        _kill_zombie_chromium(self.user_data_dir)
+        print("🎯 Devil's DX Sniper v2.0 - Launching...")
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        self._context = self._playwright.chromium.launch_persistent_context(
+            user_data_dir=self.user_data_dir, **self.launch_options
+        )
+        self._context.add_init_script(_INIT_SCRIPT)
+        if self.policy is not None:
+            self.policy.install(self._context)
+        self._probe = self._context.pages[0] if self._context.pages else self._context.new_page()
+        self.launches += 1
+
+    def _restart(self) -> None:
+        self.restarts += 1
+        self._close_context()
+        self._launch()
+
+    def _close_context(self) -> None:
+        if self._context is not None:
+            try:
+                self._context.close()
+                print("🔒 Browser context closed.")
+            except Exception as e:
+                print(f"⚠️ Context close warning: {e}")
+        self._context = None
+        self._probe = None
+
+    def _shutdown(self) -> None:
+        self._close_context()
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_browser_service() -> BrowserService:
+    """プロセス共有のブラウザサービス（初回呼び出しで作成し、終了時に閉じる）"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = BrowserService()
+            atexit.register(_service.close)
+        return _service
@@ -0,0 +1,98 @@
+"""
+Keyword Hit Matrix
+==================
+行 × レキシコン語 のヒット回数を疎行列（CSR）として保持するアーティファクト。
+
+テキスト走査の結果をこの形で保存しておけば、重みの調整・語の無効化・閾値変更による
+再スコアリングはテキストを再走査せず、疎行列×ベクトル積（数ミリ秒）で済む。
+scipy は必須ではない（to_scipy() で変換可能）。
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass(eq=False)
+class HitMatrix:
+    """
+    CSR形式のヒット行列と、再スコアリングに必要な行ごとの入力。
+
+    i行目のヒットは indices[indptr[i]:indptr[i+1]]（term_id）と
+    data[indptr[i]:indptr[i+1]]（ヒット回数）。
+    """
+    indptr: np.ndarray        # int64, 長さ n_rows + 1
+    indices: np.ndarray       # int64, term_id
+    data: np.ndarray          # int64, ヒット回数
+    terms: list               # term_id -> 正規化済みキーワード
+    base_score: np.ndarray    # 行ごとの公式評価（ベーススコア）
+    missing_info: np.ndarray  # 行ごとの情報不在フラグ
+    input_hash: np.ndarray    # 行ごとの入力ハッシュ（seed付き揺らぎの再現用）
+    lexicon_version: str = ""
+    _row_ids: np.ndarray = field(default=None, repr=False)
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def shape(self) -> tuple:
+        return (self.n_rows, len(self.terms))
+
+    @property
+    def row_ids(self) -> np.ndarray:
+        """非ゼロ要素ごとの行番号（初回のみ展開してキャッシュ）"""
+        if self._row_ids is None:
+            self._row_ids = np.repeat(np.arange(self.n_rows), np.diff(self.indptr))
+        return self._row_ids
+
+    def dot(self, term_values: np.ndarray, counts: bool = False) -> np.ndarray:
+        """
+        行列×ベクトル積。既定では語の有無（1語1回）で計算する。
+
+        Args:
+            term_values: term_id ごとの値（重み、または0/1マスク）。
+            counts: Trueならヒット回数で重み付けする。
+        """
+        weights = np.asarray(term_values, dtype=np.float64)[self.indices]
+        if counts:
+            weights = weights * self.data
+        return np.bincount(self.row_ids, weights=weights, minlength=self.n_rows)
+
+    def term_vector(self, values: dict, default: float = 0.0) -> np.ndarray:
+        """{語: 値} の辞書を term_id 順のベクトルに変換する。"""
+        return np.array([values.get(t, default) for t in self.terms], dtype=np.float64)
+
+    def to_scipy(self):
+        """scipy.sparse.csr_matrix に変換する（scipyが必要）。"""
+        from scipy.sparse import csr_matrix
+        return csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
+
+    def save(self, path: str) -> None:
+        """npz形式で保存する。"""
+        np.savez_compressed(
+            path,
+            indptr=self.indptr,
+            indices=self.indices,
+            data=self.data,
+            terms=np.array(self.terms, dtype=str),
+            base_score=self.base_score,
+            missing_info=self.missing_info,
+            input_hash=self.input_hash,
+            lexicon_version=np.array(self.lexicon_version),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "HitMatrix":
+        """save() で保存したnpzを読み込む。"""
+        with np.load(path, allow_pickle=False) as npz:
+            return cls(
+                indptr=npz["indptr"],
+                indices=npz["indices"],
+                data=npz["data"],
+                terms=npz["terms"].tolist(),
+                base_score=npz["base_score"],
+                missing_info=npz["missing_info"],
+                input_hash=npz["input_hash"],
+                lexicon_version=str(npz["lexicon_version"]),
+            )
@@ -0,0 +1,259 @@
+"""
+Aho-Corasick Keyword Matcher
+============================
+レキシコン全語を1本のオートマトンにコンパイルし、テキストを1回走査するだけで
+全キーワードのヒット位置・ヒット回数を求める。
+
+語数が増えても走査コストはテキスト長にほぼ比例するだけなので、
+スラングを数百語追加してもスコアリングは遅くならない。
+同じ理由で、1語の表記ゆれ（半角・全角・小書き仮名の綴り）も別キーとしてオートマトンに
+展開し、同じ term_id にヒットさせる（テキスト側を正規化する必要がない）。
+表記ゆれを展開しない語（リーク取得失敗の定型文など）も literals として同じオートマトンに載せ、
+1回の走査でまとめて判定する。
+
+オートマトンは pyahocorasick（requirements.txt）のC実装を使う。まとめて走査するときは
+テキストを区切り文字で連結して1回の iter に通し、ヒットを (テキスト番号, 終端, term_id) の
+配列に直接集計する（テキストごとの Python ループや dict を作らない）。
+純Python実装は pyahocorasick をビルドできない環境向けのフォールバックで、結果は同一だが
+1文字ずつPythonで遷移するため、旧来の語ごとの部分文字列検索より遅い。
+"""
+
+import warnings
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+try:
+    import ahocorasick  # pyahocorasick
+except ImportError:
+    warnings.warn("pyahocorasick is not installed: keyword matching falls back to a slow pure-Python automaton",
+                  RuntimeWarning)
+    ahocorasick = None
+
+# まとめて走査するときのテキストの区切り（どの綴りにも含まれない文字）
+_SEPARATOR = "\x00"
+# 1回の iter に通すテキスト数（連結文字列のメモリを抑える）
+_CHUNK_TEXTS = 4096
+# literals のヒットが無いテキストの literal_end
+NO_HIT = np.iinfo(np.int64).max
+
+
+class KeywordMatcher:
+    """
+    複数キーワードの同時マッチャー（レキシコンごとに1回だけ構築する）。
+
+    term_id は terms の並び順（0始まり）、literals はその後ろに続く。
+    重なり合うヒット（例: "写真詐欺" と "詐欺"）もすべて報告する。
+
+    Args:
+        terms: キーワードのリスト。
+        native: pyahocorasick を使うか（省略時は入っていれば使う）。
+        variants: 語 → その語としてヒットさせる綴りのリストを返す関数
+            （例: text_normalizer.spelling_variants）。省略時は語そのものだけ。
+        literals: 表記ゆれを展開せずにそのままヒットさせる追加の語。
+            scan_batch / scan_unique の語ごとの集計には含まれず、literal_end で判定する。
+    """
+
+    def __init__(self, terms: list, native: bool = None, variants=None, literals=()):
+        self.terms = list(terms)
+        self.literals = list(literals)
+        if any(len(t) == 0 for t in self.terms + self.literals):
+            raise ValueError("KeywordMatcher: empty term is not allowed")
+        if any(_SEPARATOR in t for t in self.terms + self.literals):
+            raise ValueError("KeywordMatcher: terms must not contain NUL")
+        self.n_terms = len(self.terms)
+        self.spellings = self._term_ids_by_spelling(variants)
+
+        # 綴り番号 → (綴りの長さ, term_id 群)。term_id 群は配列でも CSR で持つ
+        self._spelling_lengths = [len(spelling) for spelling in self.spellings]
+        self._spelling_ids = list(self.spellings.values())
+        sizes = [len(term_ids) for term_ids in self._spelling_ids]
+        self._spelling_indptr = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+        self._spelling_terms = np.fromiter((t for ids in self._spelling_ids for t in ids), dtype=np.int64,
+                                           count=int(self._spelling_indptr[-1]))
+        self._single_spelling_term = all(size == 1 for size in sizes)
+
+        self.native = (ahocorasick is not None) if native is None else native
+        if self.native and ahocorasick is None:
+            raise ImportError("pyahocorasick is not installed")
+
+        if self.native:
+            self._build_native()
+        else:
+            self._build_python()
+
+    # --- 構築 ---
+
+    def _term_ids_by_spelling(self, variants) -> dict:
+        """綴り → term_id のタプル"""
+        # 同じ語が複数回登録されていても、それぞれ別の term_id としてヒットさせる
+        ids = {}
+        for term_id, term in enumerate(self.terms):
+            spellings = dict.fromkeys(variants(term)) if variants else (term,)
+            for spelling in spellings:
+                ids.setdefault(spelling, []).append(term_id)
+        for literal_id, literal in enumerate(self.literals, start=self.n_terms):
+            ids.setdefault(literal, []).append(literal_id)
+        return {spelling: tuple(term_ids) for spelling, term_ids in ids.items()}
+
+    def _build_native(self):
+        self._automaton = ahocorasick.Automaton(ahocorasick.STORE_INTS, ahocorasick.KEY_STRING)
+        for index, spelling in enumerate(self.spellings):
+            self._automaton.add_word(spelling, index)
+        self._automaton.make_automaton()
+
+    def _build_python(self):
+        # goto: 状態ごとの遷移表, fail: 失敗遷移, out: その状態で確定する綴り番号群
+        goto = [{}]
+        out = [()]
+        for index, spelling in enumerate(self.spellings):
+            state = 0
+            for ch in spelling:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                state = nxt
+            out[state] = out[state] + (index,)
+
+        # 深さ1の状態の失敗遷移はルート。そこから幅優先で失敗遷移を張る
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                # 失敗遷移先で確定する語もこの状態の出力に含める
+                out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    # --- 走査 ---
+
+    def _iter_spellings(self, text: str):
+        """テキストを1回走査し、(終端オフセット（その文字を含む）, 綴り番号) をヒットの終端位置順に返す。"""
+        if self.native:
+            if text:
+                yield from self._automaton.iter(text)
+            return
+
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index in out[state]:
+                yield i, index
+
+    def finditer(self, text: str):
+        """
+        テキストを1回走査し、(開始オフセット, term_id) をヒットの終端位置順に返す。
+        """
+        lengths, spelling_ids = self._spelling_lengths, self._spelling_ids
+        for end, index in self._iter_spellings(text):
+            for term_id in spelling_ids[index]:
+                yield end - lengths[index] + 1, term_id
+
+    def find_all(self, text: str) -> list:
+        """全ヒットを (開始オフセット, term_id) のリストで返す。"""
+        return list(self.finditer(text))
+
+    def count(self, text: str) -> dict:
+        """term_id ごとのヒット回数を返す（ヒットしなかった語は含まない）。"""
+        counts = {}
+        for _, term_id in self.finditer(text):
+            counts[term_id] = counts.get(term_id, 0) + 1
+        return counts
+
+    def hits(self, texts) -> tuple:
+        """
+        複数テキストをまとめて走査し、全ヒットを配列で返す（literals を含む）。
+
+        Returns:
+            tuple: (rows, ends, term_ids)。ヒットしたテキストの番号、テキスト内の終端オフセット
+            （ヒットの直後の位置）、term_id。テキスト番号順。
+        """
+        texts = list(texts)
+        found = []
+        if self.native:
+            # テキストを区切り文字で連結して1回の iter に通す（区切りをまたぐ綴りは無い）
+            for chunk_start in range(0, len(texts), _CHUNK_TEXTS):
+                chunk = texts[chunk_start:chunk_start + _CHUNK_TEXTS]
+                hits = np.array(list(self._automaton.iter(_SEPARATOR.join(chunk))), dtype=np.int64).reshape(-1, 2)
+                lengths = np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk))
+                offsets = np.concatenate([[0], np.cumsum(lengths + 1)[:-1]])
+                rows = np.searchsorted(offsets, hits[:, 0], side="right") - 1
+                found.append((rows + chunk_start, hits[:, 0] - offsets[rows] + 1, hits[:, 1]))
+        else:
+            for row, text in enumerate(texts):
+                pairs = np.array(list(self._iter_spellings(text)), dtype=np.int64).reshape(-1, 2)
+                found.append((np.full(len(pairs), row, dtype=np.int64), pairs[:, 0] + 1, pairs[:, 1]))
+        if not found:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        rows, ends, spellings = (np.concatenate(parts) for parts in zip(*found))
+
+        if self._single_spelling_term:
+            return rows, ends, self._spelling_terms[spellings]
+        # 複数の term_id に対応する綴り（重複登録された語）は term_id ごとのヒットに展開する
+        sizes = np.diff(self._spelling_indptr)[spellings]
+        gather = np.repeat(self._spelling_indptr[spellings] - np.cumsum(sizes) + sizes, sizes) + np.arange(sizes.sum())
+        return np.repeat(rows, sizes), np.repeat(ends, sizes), self._spelling_terms[gather]
+
+    def scan_batch(self, texts, literal_ends: bool = False) -> tuple:
+        """
+        複数テキストをまとめて走査し、CSR形式（texts × terms）のヒット回数を返す。
+
+        Args:
+            literal_ends: True なら、各テキストで最初に終わる literals のヒットの終端オフセット
+                （ヒットが無ければ NO_HIT）も同じ走査で求め、4番目の要素として返す。
+
+        Returns:
+            tuple: (indptr, term_ids, counts[, literal_end])。i番目のテキストのヒットは
+            term_ids[indptr[i]:indptr[i+1]] と counts[indptr[i]:indptr[i+1]]（literals は含まない）。
+        """
+        texts = list(texts)
+        rows, ends, term_ids = self.hits(texts)
+        is_term = term_ids < self.n_terms
+        keys, counts = np.unique(rows[is_term] * self.n_terms + term_ids[is_term], return_counts=True)
+        indptr = np.searchsorted(keys // max(self.n_terms, 1), np.arange(len(texts) + 1))
+        scan = (indptr.astype(np.int64), keys % max(self.n_terms, 1), counts.astype(np.int64))
+        if not literal_ends:
+            return scan
+        literal_end = np.full(len(texts), NO_HIT, dtype=np.int64)
+        np.minimum.at(literal_end, rows[~is_term], ends[~is_term])
+        return scan + (literal_end,)
+
+    def scan_unique(self, texts, literal_ends: bool = False) -> tuple:
+        """
+        テキスト列を走査する。同一テキストは一度だけ走査する。
+
+        Returns:
+            tuple: (codes, indptr, term_ids, counts[, literal_end])。ユニークテキスト単位のCSR
+            （scan_batch の結果）と、各テキスト→ユニークテキストの対応 codes。
+        """
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object))
+        return (codes,) + self.scan_batch(uniques, literal_ends=literal_ends)
+
+
+def sum_hits(scan: tuple, term_values: np.ndarray) -> np.ndarray:
+    """
+    scan_unique の結果から、各テキストに含まれる語（1語1回）の term_values を合計する。
+    term_values に重みを渡せば加減点、0/1のマスクを渡せばヒット語数になる。
+    """
+    codes, indptr, term_ids = scan[:3]
+    n_unique = len(indptr) - 1
+    owners = np.repeat(np.arange(n_unique), np.diff(indptr))
+    totals = np.bincount(owners, weights=np.asarray(term_values, dtype=np.float64)[term_ids],
+                         minlength=n_unique)
+    return totals[codes]
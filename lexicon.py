@@ -0,0 +1,136 @@
+"""
+Sentiment Lexicon Loader
+========================
+感情分析レキシコン（キーワードと重み）を lexicon.json から読み込み、
+キーワードマッチャーへコンパイルしてモジュールレベルでキャッシュする。
+キーワードは text_normalizer の規則で正規形に揃えて照合するため、表記ゆれ違いの重複エントリは
+1語（先に書かれた表記）にまとまる。terms には lexicon.json の表記をそのまま残し（表示用）、
+正規形は照合と重複判定にだけ使う。
+マッチャーには各語の正規形の半角・全角・小書き仮名の綴りも同じ term_id として登録するので、
+テキスト側を正規化しなくても表記ゆれにヒットする。
+リーク取得失敗の定型文（missing_info_markers）も同じマッチャーに literals として載せ、
+キーワードと同じ1回の走査で判定する。
+
+ファイルの mtime / サイズが変わっていれば次の呼び出しで再コンパイルするため、
+常駐しているアプリプロセスも再起動なしで新しい語彙を拾える。
+変わっていなければ os.stat 1回分のコストしかかからない。
+編集途中・書きかけのファイルで再読み込みに失敗した場合は警告を出して直前のレキシコンを使い続け、
+ファイルが次に変わったときに読み込み直す（初回の読み込みの失敗はそのまま例外になる）。
+
+lexicon.json の形式:
+    negative / positive: キーワードのリスト
+    missing_info_markers: リーク取得失敗を示す文字列のリスト
+    weights: negative / positive（1語あたり）, hype_risk, missing_info
+    term_weights: 語ごとの重みの上書き（任意）
+    hype_risk_rating: 「盛ってる」リスクを疑う公式評価の下限
+"""
+
+import hashlib
+import json
+import os
+import threading
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+
+from keyword_matcher import KeywordMatcher
+from text_normalizer import normalize_text, spelling_variants
+
+LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicon.json")
+
+
+@dataclass(frozen=True, eq=False)
+class Lexicon:
+    """コンパイル済みレキシコン。terms の並びが term_id になる。"""
+    terms: list                   # キーワード（lexicon.json の表記のまま）
+    term_weights: np.ndarray      # 語ごとの加減点
+    is_positive: np.ndarray       # ポジティブ語なら1（リスク係数の判定に使う）
+    matcher: KeywordMatcher       # terms（表記ゆれ込み）+ missing_info_markers（literals）
+    missing_info_markers: list
+    hype_risk_penalty: float
+    hype_risk_rating: float
+    missing_info_penalty: float
+    version: str                  # ファイル内容のハッシュ（キャッシュキー用）
+
+
+_cache = {}
+# 再読み込みに失敗したファイルの stamp（同じ stamp のうちは読み直さない）
+_failed = {}
+_lock = threading.Lock()
+
+
+def _canonical_terms(terms: list) -> list:
+    """正規形が同じになる語は先頭の1語（の表記）にまとめる。"""
+    first = {}
+    for t in terms:
+        first.setdefault(normalize_text(t), t)
+    return list(first.values())
+
+
+def term_spellings(term: str) -> list:
+    """語をマッチャーに登録する綴り（表記そのものと、正規形の表記ゆれ）に展開する。"""
+    return list(dict.fromkeys([term] + spelling_variants(normalize_text(term))))
+
+
+def compile_lexicon(spec: dict, version: str = "") -> Lexicon:
+    """dict形式のレキシコン定義をコンパイルする。"""
+    weights = spec["weights"]
+    overrides = {normalize_text(t): w for t, w in spec.get("term_weights", {}).items()}
+    negative = _canonical_terms(spec["negative"])
+    positive = _canonical_terms(spec["positive"])
+    terms = negative + positive
+
+    term_weights = np.array(
+        [overrides.get(normalize_text(t), weights["negative"]) for t in negative]
+        + [overrides.get(normalize_text(t), weights["positive"]) for t in positive],
+        dtype=np.float64,
+    )
+    is_positive = np.array([0] * len(negative) + [1] * len(positive), dtype=np.int64)
+    markers = list(spec["missing_info_markers"])
+
+    return Lexicon(
+        terms=terms,
+        term_weights=term_weights,
+        is_positive=is_positive,
+        matcher=KeywordMatcher(terms, variants=term_spellings, literals=markers),
+        missing_info_markers=markers,
+        hype_risk_penalty=float(weights["hype_risk"]),
+        hype_risk_rating=float(spec.get("hype_risk_rating", 4.5)),
+        missing_info_penalty=float(weights["missing_info"]),
+        version=version,
+    )
+
+
+def load_lexicon(path: str = LEXICON_PATH) -> Lexicon:
+    """
+    レキシコンファイルを読み込んでコンパイル済みのLexiconを返す。
+    ファイルが前回から変わっていなければキャッシュを返す。
+    """
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(path)
+    if cached and (cached[0] == stamp or _failed.get(path) == stamp):
+        return cached[1]
+
+    with _lock:
+        cached = _cache.get(path)
+        if cached and (cached[0] == stamp or _failed.get(path) == stamp):
+            return cached[1]
+
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            version = hashlib.sha1(raw).hexdigest()[:12]
+            lexicon = compile_lexicon(json.loads(raw.decode("utf-8")), version=version)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # JSONDecodeError / UnicodeDecodeError は ValueError。初回は使えるレキシコンが無いのでそのまま送出する
+            if not cached:
+                raise
+            _failed[path] = stamp
+            warnings.warn(f"lexicon reload failed ({path}): {e!r}; keeping version {cached[1].version}",
+                          RuntimeWarning)
+            return cached[1]
+        _cache[path] = (stamp, lexicon)
+        _failed.pop(path, None)
+        return lexicon
@@ -0,0 +1,197 @@
+"""
+Page Snapshot Cache
+===================
+スクレイパーが取得したページHTML（page.content()）を URL 単位でディスクに保存し、
+TTL 内の再同期ではブラウザを使わずにスナップショットを返す。
+
+TTL は取得元（source）ごとに設定する。
+    cityheaven:     店舗一覧（掲載順・評価の変化は緩やか）
+    bakusai_search: 爆サイ検索結果（スレッドの新設は稀）
+    bakusai_thread: 爆サイスレッド本文（書き込みが頻繁）
+
+1URLにつき1つのJSONファイル（ファイル名はURLのSHA-1）に、HTML と取得メタデータ
+（取得元・取得時刻・リダイレクト後のURL・タイトル）をまとめて書く。
+書き込みは一時ファイル経由の置き換えなので、読み手が書きかけのファイルを見ることはない。
+
+同じ形式のディレクトリをフィクスチャとしても使う。
+    録画: PageCache(FIXTURE_DIR, refresh=True) で同期すると、取得した全ページが保存される
+    再生: ReplayCache(FIXTURE_DIR) は TTL を無視して保存済みページだけを返し、
+          無いページは ReplayMiss を送出する（ブラウザ・ネットワークは一切使わない）
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import asdict, dataclass
+
+PAGE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "page_cache")
+PAGE_ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "page_archive")
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pages")
+
+# 日付別アーカイブの保持日数（これより古い日のディレクトリは書き込み時に削除する）
+ARCHIVE_RETENTION_DAYS = 30
+
+# 取得元ごとのTTL（秒）
+DEFAULT_TTLS = {
+    "cityheaven": 6 * 60 * 60,
+    "bakusai_search": 60 * 60,
+    "bakusai_thread": 15 * 60,
+}
+
+
+@dataclass
+class PageSnapshot:
+    """1ページ分のスナップショット"""
+    url: str            # キャッシュキー（ナビゲーションを要求したURL）
+    html: str           # page.content()
+    source: str         # 取得元（TTLの区分）
+    fetched_at: float   # 取得時刻（UNIX秒）
+    final_url: str = "" # リダイレクト・フォーム遷移後のURL
+    title: str = ""
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class PageCache:
+    """
+    URL をキーにしたページスナップショットのディスクキャッシュ。
+
+    Args:
+        root: 保存先ディレクトリ。
+        ttls: 取得元ごとのTTL（秒）。DEFAULT_TTLS を上書きする分だけ渡せばよい。
+        refresh: True なら読み出しは常にミス扱い（書き込みは行う）。強制再取得用。
+        archive_dir: 指定すると put() のたびに archive_dir/YYYYMMDD/ にも同じ形式で残す
+            （キャッシュ本体はURLごとに上書きされるため、過去ページの再解析用に日付別で蓄積する）。
+        archive_days: アーカイブの保持日数。その日の最初の書き込みで、これより古い日のディレクトリを
+            削除する（None なら削除しない）。
+    """
+
+    def __init__(self, root: str = PAGE_CACHE_DIR, ttls: dict = None, refresh: bool = False,
+                 archive_dir: str = None, archive_days: int = ARCHIVE_RETENTION_DAYS):
+        self.root = root
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.refresh = refresh
+        self.archive_dir = archive_dir
+        self.archive_days = archive_days
+        self.hits = 0
+        self.misses = 0
+        # 保持期限切れの削除を最後に行った日（YYYYMMDD）。日が変わるまで再実行しない
+        self._pruned_day = None
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.root, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _read(self, url: str) -> PageSnapshot:
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                return PageSnapshot(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def get(self, url: str, source: str) -> PageSnapshot:
+        """TTL 内のスナップショットがあれば返す（無い・期限切れなら None）。"""
+        snapshot = None if self.refresh else self._read(url)
+        if snapshot is not None and snapshot.age <= self.ttls.get(source, 0):
+            self.hits += 1
+            return snapshot
+        self.misses += 1
+        return None
+
+    def put(self, url: str, html: str, source: str, final_url: str = "", title: str = "") -> PageSnapshot:
+        """スナップショットを保存して返す。"""
+        snapshot = PageSnapshot(url=url, html=html, source=source, fetched_at=time.time(),
+                                final_url=final_url or url, title=title)
+        self._write(self._path(url), snapshot)
+        if self.archive_dir:
+            day = time.strftime("%Y%m%d", time.localtime(snapshot.fetched_at))
+            self._write(os.path.join(self.archive_dir, day, os.path.basename(self._path(url))), snapshot)
+            if self.archive_days is not None and day != self._pruned_day:
+                self.prune_archive(snapshot.fetched_at)
+                self._pruned_day = day
+        return snapshot
+
+    def prune_archive(self, now: float = None) -> int:
+        """
+        保持日数より古い日付別アーカイブのディレクトリを削除し、削除した日数を返す。
+        YYYYMMDD の名前のディレクトリだけを対象にする。
+        """
+        if not self.archive_dir or self.archive_days is None or not os.path.isdir(self.archive_dir):
+            return 0
+        now = time.time() if now is None else now
+        oldest = time.strftime("%Y%m%d", time.localtime(now - self.archive_days * 24 * 60 * 60))
+        removed = 0
+        for name in os.listdir(self.archive_dir):
+            path = os.path.join(self.archive_dir, name)
+            if len(name) == 8 and name.isdigit() and name < oldest and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        return removed
+
+    @staticmethod
+    def _write(path: str, snapshot: PageSnapshot) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(snapshot), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def put_page(self, url: str, page, source: str) -> PageSnapshot:
+        """Playwright の page の現在の内容を保存する。"""
+        return self.put(url, page.content(), source, final_url=page.url, title=page.title())
+
+    def invalidate(self, url: str) -> None:
+        try:
+            os.remove(self._path(url))
+        except FileNotFoundError:
+            pass
+
+    def purge_expired(self) -> int:
+        """期限切れのスナップショットを削除し、削除件数を返す。"""
+        if not os.path.isdir(self.root):
+            return 0
+        removed = 0
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    meta = json.load(f)
+                expired = time.time() - meta["fetched_at"] > self.ttls.get(meta["source"], 0)
+            except (OSError, ValueError, KeyError):
+                expired = True
+            if expired:
+                os.remove(path)
+                removed += 1
+        return removed
+
+
+class ReplayMiss(LookupError):
+    """再生モードで、要求されたURLのフィクスチャが無い"""
+
+
+class ReplayCache(PageCache):
+    """
+    録画済みフィクスチャを TTL 無しで返す再生専用キャッシュ。
+    フィクスチャに無いURLは ReplayMiss を送出し、呼び出し側がブラウザへ進まないようにする
+    （misses には数えず、missing に記録する）。
+    """
+
+    def __init__(self, root: str = FIXTURE_DIR):
+        super().__init__(root)
+        self.missing = []
+
+    def get(self, url: str, source: str) -> PageSnapshot:
+        snapshot = self._read(url)
+        if snapshot is None:
+            self.missing.append(url)
+            raise ReplayMiss(f"no fixture for {url}")
+        self.hits += 1
+        return snapshot
+
+    def put(self, url: str, html: str, source: str, final_url: str = "", title: str = "") -> PageSnapshot:
+        raise ReplayMiss("ReplayCache is read-only")
@@ -0,0 +1,147 @@
+"""
+Polars Backend for calculate_ldr
+================================
+analyzer.calculate_ldr に polars の DataFrame / LazyFrame が渡されたときの実装。
+
+キーワード判定・リスク係数・揺らぎ・LDR・ラベル付与を1つの LazyFrame の
+クエリプランとして組み立て、polars のマルチスレッド実行に任せる。
+キーワード判定はレキシコンの全綴り（表記ゆれ込み）に対する str.extract_many（Aho-Corasick）の1パスで、
+行ごとのPython呼び出しが無い。
+Pythonに戻るのは seed 付き揺らぎの入力ハッシュ（pandas と同じハッシュ関数を使うため）だけ。
+
+結果は pandas 版と同じ値になる（benchmark.py の check_polars_equivalence で検証）。
+欠損値は polars の流儀どおり null のまま扱う（pandas 版の NaN に相当）。
+"""
+
+import numpy as np
+import polars as pl
+
+from analyzer import (
+    HIGH_RISK_THRESHOLD, RESULT_COLUMNS, STATUS_HIGH_RISK, STATUS_LABELS, STATUS_SAFE,
+    STATUS_WARNING, UNCERTAINTY_RANGE, WARNING_THRESHOLD, _hash_to_unit, _row_hashes,
+)
+from lexicon import Lexicon, load_lexicon
+
+STATUS_DTYPE = pl.Enum(STATUS_LABELS)
+
+# クエリ内部で使う作業カラム（最後に落とす）
+_KEYWORDS = "__ldr_keywords"
+_OFFICIAL = "__ldr_official"
+
+
+def _text(columns: list, column: str) -> pl.Expr:
+    """テキストカラムの式。カラムが無ければ空文字、欠損値は pandas 版と同じく "nan"。"""
+    if column not in columns:
+        return pl.lit("")
+    return pl.col(column).cast(pl.String).fill_null("nan")
+
+
+def _uncertainty_expr(columns: list, seed: int) -> pl.Expr:
+    """揺らぎの式。seed指定時は pandas 版と同じ入力ハッシュから導出する。"""
+    if seed is None:
+        return pl.int_range(pl.len()).map_batches(
+            lambda s: pl.Series(np.random.default_rng().uniform(-UNCERTAINTY_RANGE, UNCERTAINTY_RANGE, len(s))),
+            return_dtype=pl.Float64,
+        )
+
+    base = pl.col("official_rating").cast(pl.Float64) if "official_rating" in columns else pl.lit(3.0)
+
+    def from_hashes(inputs: pl.Series) -> pl.Series:
+        hashes = _row_hashes(
+            inputs.struct.field("base").to_numpy().astype(np.float64),
+            inputs.struct.field("official").to_numpy().astype(object),
+            inputs.struct.field("leak").to_numpy().astype(object),
+        )
+        return pl.Series((_hash_to_unit(hashes, seed) * 2.0 - 1.0) * UNCERTAINTY_RANGE)
+
+    return pl.struct(
+        base.alias("base"),
+        _text(columns, "official_review").alias("official"),
+        _text(columns, "bakusai_leak").alias("leak"),
+    ).map_batches(from_hashes, return_dtype=pl.Float64)
+
+
+def ldr_plan(frame, noise: bool = True, seed: int = None, lean: bool = False,
+             lexicon: Lexicon = None) -> pl.LazyFrame:
+    """
+    calculate_ldr と同じ処理を LazyFrame のクエリプランとして返す（collect はしない）。
+
+    Args:
+        frame: 店舗データの polars DataFrame / LazyFrame。'official_rating'カラム必須。
+        noise, seed, lean, lexicon: calculate_ldr と同じ。
+
+    Returns:
+        pl.LazyFrame: ai_real_score / ldr / status を加えたクエリ（lean なら3カラムだけ）。
+    """
+    if lexicon is None:
+        lexicon = load_lexicon()
+    lf = frame.lazy()
+    columns = lf.collect_schema().names()
+
+    # 1. エビデンス取得
+    full_text = _text(columns, "bakusai_leak") + " " + _text(columns, "official_review")
+    # 2. キーワードマッチング（全綴りを1回の走査で抽出して term_id に寄せ、1語1回として数える）
+    # （マッチャーに同居している missing_info_markers の綴りは除く。情報不在は下の contains_any で判定する）
+    n_terms = len(lexicon.terms)
+    spelling_ids = {spelling: ids[0] for spelling, ids in lexicon.matcher.spellings.items() if ids[0] < n_terms}
+    spellings = list(spelling_ids)
+    spelling_terms = list(spelling_ids.values())
+    keywords = full_text.str.extract_many(spellings, overlapping=True).list.eval(
+        pl.element().replace_strict(spellings, spelling_terms, return_dtype=pl.Int64)
+    ).list.unique()
+
+    def term_sum(values: np.ndarray) -> pl.Expr:
+        return pl.col(_KEYWORDS).list.eval(
+            pl.element().replace_strict(list(range(len(lexicon.terms))), values.tolist(), return_dtype=pl.Float64)
+        ).list.sum()
+
+    # 公式評価（NaN も欠損として扱い、比較が常に偽になるようにする）
+    official = pl.col("official_rating").cast(pl.Float64).fill_nan(None)
+    base_score = pl.col(_OFFICIAL) if "official_rating" in columns else pl.lit(3.0)
+
+    # 3. リスク係数 (公式評価が高すぎる場合の「盛ってる」リスク)
+    hype_risk = (base_score >= lexicon.hype_risk_rating) & (term_sum(lexicon.is_positive) == 0)
+    # 4. 情報不在ペナルティ（生テキストで判定）
+    missing_info = _text(columns, "bakusai_leak").str.contains_any(lexicon.missing_info_markers)
+
+    final_score = (
+        base_score
+        + term_sum(lexicon.term_weights)
+        + pl.when(hype_risk).then(lexicon.hype_risk_penalty).otherwise(0.0)
+        + pl.when(missing_info).then(lexicon.missing_info_penalty).otherwise(0.0)
+    )
+    if noise:
+        final_score = final_score + _uncertainty_expr(columns, seed)
+    ai_score = final_score.clip(0.0, 5.0).round(1, mode="half_to_even")
+
+    # LDR計算: (|公式 - 実効| / 公式) * 100（公式が0以下・欠損なら0）
+    ratio = pl.when(pl.col(_OFFICIAL) > 0).then(
+        (pl.col(_OFFICIAL) - pl.col("ai_real_score")).abs() / pl.col(_OFFICIAL)
+    ).otherwise(0.0)
+    ldr = (ratio * 100).round(1, mode="half_to_even")
+
+    status = (
+        pl.when(pl.col("ldr") >= HIGH_RISK_THRESHOLD).then(pl.lit(STATUS_HIGH_RISK))
+        .when(pl.col("ldr") >= WARNING_THRESHOLD).then(pl.lit(STATUS_WARNING))
+        .otherwise(pl.lit(STATUS_SAFE))
+        .cast(STATUS_DTYPE)
+    )
+
+    plan = (
+        lf.with_columns(official.alias(_OFFICIAL), keywords.alias(_KEYWORDS))
+        .with_columns(ai_score.alias("ai_real_score"))
+        .with_columns(ldr.alias("ldr"))
+        .with_columns(status.alias("status"))
+        .drop(_OFFICIAL, _KEYWORDS)
+    )
+    return plan.select(RESULT_COLUMNS) if lean else plan
+
+
+def calculate_ldr_polars(frame, noise: bool = True, seed: int = None, lean: bool = False,
+                         lexicon: Lexicon = None):
+    """
+    polars版 calculate_ldr。LazyFrame を渡せば LazyFrame（未実行のプラン）を、
+    DataFrame を渡せば実行済みの DataFrame を返す。
+    """
+    plan = ldr_plan(frame, noise=noise, seed=seed, lean=lean, lexicon=lexicon)
+    return plan if isinstance(frame, pl.LazyFrame) else plan.collect()
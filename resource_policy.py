@@ -0,0 +1,186 @@
+"""
+Resource Policy for Scraping
+============================
+スクレイパーが読むのはDOMのテキスト（店名・星画像の src 属性・コメント）だけなので、
+画像・フォント・動画の本体や第三者ホスト（広告・解析タグ）の取得はすべて無駄になる。
+Playwright のリクエストルーティングでそれらを中断し、転送量とデコード時間を削る。
+
+- 中断しても要素の src 属性はDOMに残るので、星評価の判定（src に "on"/"gold"）は変わらない。
+  遅延読み込み等で本体が必要なファーストパーティの画像は image_allowlist（URLパスの fnmatch パターン）で通す。
+- Cloudflare チャレンジは第三者ホストから読み込まれるため allowlist（URLの fnmatch パターン）に入れてある。
+- 中断したリクエストはサイズが分からないため、中断理由ごとに最初の sample_size 件だけは
+  通して実際のサイズを測り、その平均から削減量を推定する（ブラウザサービスのプロセスが続く限り再計測しない）。
+- dry_run=True なら何も中断せず、中断対象だったレスポンスの実バイト数を数える
+  （ポリシーで削れる量の実測。ここで得た平均サイズも通常運用時の推定に使われる）。
+- レスポンスサイズの取得（request.sizes()）はブラウザとの往復が1回かかるため、
+  サイズ計測に通したリクエスト（dry_run では中断対象だったもの）だけで呼ぶ。
+  それ以外のリクエストは件数だけを数える。
+
+注意: Playwright はルーティングを有効にしたコンテキストでHTTPキャッシュを使わない。
+"""
+
+import fnmatch
+import urllib.parse
+from collections import Counter
+from dataclasses import dataclass, field
+
+# 中断するリソース種別（Playwright の request.resource_type）
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media"})
+# ファーストパーティ（このドメインとサブドメインは種別の条件だけで判定する）
+FIRST_PARTY_DOMAINS = ("cityheaven.net", "bakusai.com")
+# 常に通すURL（fnmatch パターン。ホストまで固定したものだけを書く）
+ALLOWLIST = (
+    "https://challenges.cloudflare.com/*",   # Cloudflareチャレンジ
+)
+# ファーストパーティの中断対象種別でも通すURLパス（fnmatch パターン。第三者ホストには効かない）
+IMAGE_ALLOWLIST = (
+    "*star*",                                # 星評価アイコン
+)
+# 中断理由ごとに、削減量の推定用にサイズを実測する（中断せずに通す）リクエスト数
+SIZE_SAMPLE_SIZE = 3
+
+REASON_THIRD_PARTY = "third_party"
+
+
+@dataclass
+class RunStats:
+    """1回の同期分のリクエスト集計"""
+    blocked: Counter = field(default_factory=Counter)       # 中断理由（リソース種別 / third_party）ごとの件数
+    sampled: Counter = field(default_factory=Counter)       # サイズ計測のために通した中断対象の件数
+    loaded_requests: int = 0                                # 完了したリクエスト数
+    would_block_bytes: Counter = field(default_factory=Counter)  # dry_run で中断対象だった分の実バイト数
+    saved_bytes: int = 0                                    # 削減量（dry_run なら実測、通常は推定）
+    estimated: bool = False
+    dry_run: bool = False
+    unmeasured: list = field(default_factory=list)          # 平均サイズが未計測で推定に含められなかった理由
+
+    def summary(self) -> str:
+        saved = f"{self.saved_bytes / 1024:,.0f} KB" + (" (推定)" if self.estimated else "")
+        if self.unmeasured:
+            saved += f" ※サイズ未計測: {', '.join(self.unmeasured)}"
+        blocked = ", ".join(f"{reason} {count}" for reason, count in self.blocked.most_common()) or "なし"
+        label = ("削減可能", "中断対象") if self.dry_run else ("削減", "中断")
+        sampled = f"（うちサイズ計測 {sum(self.sampled.values())} 件）" if self.sampled else ""
+        return (f"🚫 リソース{label[0]}: {saved}  {label[1]} {sum(self.blocked.values())} 件 [{blocked}]"
+                f"  受信 {self.loaded_requests} 件{sampled}")
+
+
+class ResourcePolicy:
+    """
+    ブラウザコンテキストに取り付けるリクエストの中断ポリシー。
+
+    Args:
+        blocked_types: 中断するリソース種別。
+        first_party: ファーストパーティのドメイン。それ以外のホストへのリクエストは種別に関係なく中断する。
+        allowlist: 常に通すURLの fnmatch パターン。
+        image_allowlist: ファーストパーティのリクエストで、中断対象の種別でも通すURLパスの fnmatch パターン。
+        sample_size: 中断理由ごとに、サイズを実測するために通すリクエスト数（0 なら通さない）。
+        dry_run: True なら中断せず、削減できたはずのバイト数を実測する。
+    """
+
+    def __init__(self, blocked_types=BLOCKED_RESOURCE_TYPES, first_party=FIRST_PARTY_DOMAINS,
+                 allowlist=ALLOWLIST, image_allowlist=IMAGE_ALLOWLIST, sample_size: int = SIZE_SAMPLE_SIZE,
+                 dry_run: bool = False):
+        self.blocked_types = frozenset(blocked_types)
+        self.first_party = tuple(first_party)
+        self.allowlist = tuple(allowlist)
+        self.image_allowlist = tuple(image_allowlist)
+        self.sample_size = sample_size
+        self.dry_run = dry_run
+        self.run = RunStats()
+        # 中断理由ごとの観測サイズ（合計バイト, 件数）。dry_run とサンプルの実測から平均を出す
+        self._observed = {}
+        # 中断理由ごとの、サイズ計測のために通したリクエスト数（プロセス内の累計）
+        self._samples = Counter()
+        # 完了時にサイズを測るリクエストの URL（未完了の件数）
+        self._measuring = Counter()
+
+    def block_reason(self, url: str, resource_type: str) -> str:
+        """中断するなら理由（リソース種別 / "third_party"）、通すなら None。"""
+        if any(fnmatch.fnmatchcase(url, pattern) for pattern in self.allowlist):
+            return None
+        parts = urllib.parse.urlsplit(url)
+        host = parts.hostname
+        # data: / blob: 等のホストを持たないURLはネットワークに出ない
+        if host and not any(host == d or host.endswith("." + d) for d in self.first_party):
+            return REASON_THIRD_PARTY
+        if resource_type in self.blocked_types:
+            if host and any(fnmatch.fnmatchcase(parts.path, pattern) for pattern in self.image_allowlist):
+                return None
+            return resource_type
+        return None
+
+    def install(self, context) -> None:
+        """コンテキストの全リクエストにポリシーを掛ける（BrowserService が起動時に呼ぶ）。"""
+        context.route("**/*", self._handle)
+        context.on("requestfinished", self._finished)
+        context.on("requestfailed", self._failed)
+
+    def start_run(self) -> RunStats:
+        """同期1回分の集計を始める。"""
+        self.run = RunStats()
+        return self.run
+
+    def finish_run(self) -> RunStats:
+        """同期1回分の集計を締め、削減バイト数を確定して返す。"""
+        run = self.run
+        run.dry_run = self.dry_run
+        if self.dry_run:
+            run.saved_bytes = sum(run.would_block_bytes.values())
+        else:
+            averages = {reason: total / count for reason, (total, count) in self._observed.items() if count}
+            run.saved_bytes = int(sum(averages.get(reason, 0) * n for reason, n in run.blocked.items()))
+            run.estimated = True
+            run.unmeasured = sorted(reason for reason in run.blocked if reason not in averages)
+        return run
+
+    # --- Playwright のイベントハンドラ（ブラウザサービスのスレッド上で呼ばれる） ---
+
+    def _handle(self, route) -> None:
+        request = route.request
+        reason = self.block_reason(request.url, request.resource_type)
+        if reason is None:
+            route.continue_()
+            return
+        if self.dry_run:
+            self._measuring[request.url] += 1
+            route.continue_()
+            return
+        if self._samples[reason] < self.sample_size:
+            # 削減量の推定用に、この理由の最初の数件だけは通して実サイズを測る
+            self._samples[reason] += 1
+            self.run.sampled[reason] += 1
+            self._measuring[request.url] += 1
+            route.continue_()
+            return
+        self.run.blocked[reason] += 1
+        route.abort("blockedbyclient")
+
+    def _unmark(self, request) -> bool:
+        """サイズを測る対象として通したリクエストなら印を外して True"""
+        pending = self._measuring.get(request.url, 0)
+        if not pending:
+            return False
+        if pending == 1:
+            del self._measuring[request.url]
+        else:
+            self._measuring[request.url] = pending - 1
+        return True
+
+    def _finished(self, request) -> None:
+        self.run.loaded_requests += 1
+        if not self._unmark(request):
+            return
+        try:
+            size = request.sizes()["responseBodySize"]
+        except Exception:
+            return
+        reason = self.block_reason(request.url, request.resource_type)
+        total, count = self._observed.get(reason, (0, 0))
+        self._observed[reason] = (total + size, count + 1)
+        if self.dry_run:
+            self.run.blocked[reason] += 1
+            self.run.would_block_bytes[reason] += size
+
+    def _failed(self, request) -> None:
+        self._unmark(request)
@@ -0,0 +1,226 @@
+"""
+Persistent Score Cache
+======================
+キーワードスコアリングの結果を SQLite ファイルに永続化し、実行・プロセスをまたいで再利用する。
+
+キーは (テキストのSHA-1, レキシコンのバージョン)。レキシコンを編集すると
+バージョンが変わるため、古い語彙で計算したエントリが使われることはない
+（古いエントリは参照されなくなり、LRU追い出しで自然に消える）。
+
+値はテキスト単位の
+    adjustment:     キーワード加減点の合計
+    positive_hits:  ヒットしたポジティブ語の数
+    negative_hits:  ヒットしたネガティブ語の数
+で、公式評価に依存する「盛ってる」リスク係数などは保存せずに呼び出し側で毎回計算する。
+
+注意: pyahocorasick による走査はテキスト1件あたり SQLite の参照より速いため、
+ウォームでもキャッシュ無しより速くはならない（benchmark.py --score-cache で比較できる）。
+走査が遅い環境（純Python実装のフォールバック）でだけ時間の節約になる。
+そのためアプリの同期では使わない（同期をまたいだ再利用は calculate_ldr_incremental が
+入力の変わらない店舗のスコアを引き継ぐことで行う）。
+
+エントリ数が max_entries を超えたら、最終参照が古いものから削除する（LRU）。
+WALモードで開くため、Streamlitのスレッドや calculate_ldr(workers=N) のワーカープロセスから
+同じファイルを同時に読み書きできる。ミスしたテキストの計算はロックもトランザクションも
+持たずに行い、書き込みは計算後の短いトランザクション1回だけなので、他のセッション・プロセスを
+走査の間待たせない。
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SCORE_CACHE_PATH = os.path.join(DATA_DIR, "score_cache.sqlite3")
+
+# SQLite の1文あたりのバインド変数上限（古いビルドは999）を超えないように分割する
+_QUERY_CHUNK = 900
+
+# LRUの最終参照時刻はこの間隔より古いエントリだけ更新する。
+# 毎回全ヒットを書き換えると last_used インデックスの更新がスキャン自体より高くつくため。
+_TOUCH_INTERVAL_NS = 60 * 1_000_000_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    text_hash       BLOB    NOT NULL,
+    lexicon_version TEXT    NOT NULL,
+    adjustment      REAL    NOT NULL,
+    positive_hits   INTEGER NOT NULL,
+    negative_hits   INTEGER NOT NULL,
+    last_used       INTEGER NOT NULL,
+    PRIMARY KEY (text_hash, lexicon_version)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used);
+"""
+
+
+def text_hash(text: str) -> bytes:
+    """テキストのキャッシュキー（SHA-1ダイジェスト）"""
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+
+class ScoreCache:
+    """
+    テキスト単位のスコアを保持する SQLite キャッシュ。
+
+    hits / misses はこのインスタンス（プロセス）での累計。
+    pickle 可能で、ワーカープロセス側では同じファイルに接続し直す。
+    """
+
+    def __init__(self, path: str = SCORE_CACHE_PATH, max_entries: int = 500_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # エントリ数の見積もり（初回の追い出し判定で数え、以後は挿入件数を足すだけ。None なら未計数）
+        self._entries = None
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"path": self.path, "max_entries": self.max_entries}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["max_entries"])
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get_or_compute(self, texts, lexicon_version: str, compute) -> tuple:
+        """
+        テキストごとのスコアをキャッシュから引き、無いものだけ compute で計算して保存する。
+
+        Args:
+            texts: ユニークテキスト列。
+            lexicon_version: キャッシュキーに含めるレキシコンのバージョン。
+            compute: ミスしたテキストのリストを受け取り
+                (adjustment, positive_hits, negative_hits) の配列タプルを返す関数。
+
+        Returns:
+            tuple: texts と同じ並びの (adjustment, positive_hits, negative_hits)。
+        """
+        n = len(texts)
+        adjustment = np.zeros(n, dtype=np.float64)
+        positive_hits = np.zeros(n, dtype=np.int64)
+        negative_hits = np.zeros(n, dtype=np.int64)
+        if n == 0:
+            return adjustment, positive_hits, negative_hits
+
+        keys = [text_hash(t) for t in texts]
+
+        # 1. 参照（読み取りだけなので、WALでは他プロセスの書き込みを待たない）
+        with self._lock:
+            conn = self._connection()
+            found = {}
+            for start in range(0, n, _QUERY_CHUNK):
+                chunk = keys[start:start + _QUERY_CHUNK]
+                rows = conn.execute(
+                    "SELECT text_hash, adjustment, positive_hits, negative_hits, last_used FROM scores "
+                    f"WHERE lexicon_version = ? AND text_hash IN ({','.join('?' * len(chunk))})",
+                    [lexicon_version, *chunk],
+                )
+                found.update((row[0], row[1:]) for row in rows)
+
+        missing = []
+        for i, key in enumerate(keys):
+            cached = found.get(key)
+            if cached is None:
+                missing.append(i)
+            else:
+                adjustment[i], positive_hits[i], negative_hits[i] = cached[:3]
+
+        # 2. ミスしたテキストの計算（ロック・トランザクションの外で行い、他のセッションやプロセスを待たせない）
+        if missing:
+            miss_adj, miss_pos, miss_neg = compute([texts[i] for i in missing])
+            adjustment[missing] = miss_adj
+            positive_hits[missing] = miss_pos
+            negative_hits[missing] = miss_neg
+
+        # 3. 最終参照時刻の更新と計算結果の保存だけを短いトランザクションで書き込む
+        now = time.time_ns()
+        hit_keys = [key for key, cached in found.items() if now - cached[3] > _TOUCH_INTERVAL_NS]
+        with self._lock:
+            self.hits += n - len(missing)
+            self.misses += len(missing)
+            if not hit_keys and not missing:
+                return adjustment, positive_hits, negative_hits
+            conn = self._connection()
+            with conn:
+                for start in range(0, len(hit_keys), _QUERY_CHUNK):
+                    chunk = hit_keys[start:start + _QUERY_CHUNK]
+                    conn.execute(
+                        "UPDATE scores SET last_used = ? "
+                        f"WHERE lexicon_version = ? AND text_hash IN ({','.join('?' * len(chunk))})",
+                        [now, lexicon_version, *chunk],
+                    )
+                if missing:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?)",
+                        [(keys[i], lexicon_version, float(adjustment[i]), int(positive_hits[i]),
+                          int(negative_hits[i]), now) for i in missing],
+                    )
+                    self._evict(conn, len(missing))
+
+        return adjustment, positive_hits, negative_hits
+
+    def _evict(self, conn: sqlite3.Connection, inserted: int) -> None:
+        """
+        エントリ数が上限を超えていれば、最終参照が古いものから削除する。
+        エントリ数は挿入件数を足した見積もり（置き換えも1件と数えるので多めになる）で判定し、
+        上限を超えたと見積もったときだけ COUNT(*) で数え直す（書き込みのたびに全件を数えない）。
+        他のプロセスが挿入した分は、このプロセスが次に数え直すときに反映される。
+        """
+        if self._entries is not None:
+            self._entries += inserted
+            if self._entries <= self.max_entries:
+                return
+        (count,) = conn.execute("SELECT COUNT(*) FROM scores").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM scores WHERE (text_hash, lexicon_version) IN "
+                "(SELECT text_hash, lexicon_version FROM scores ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+        self._entries = min(count, self.max_entries)
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection().execute("SELECT COUNT(*) FROM scores").fetchone()
+        return count
+
+    def stats(self) -> dict:
+        """ヒット/ミス数・ヒット率・エントリ数を返す。"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
+
+    def clear(self) -> None:
+        """全エントリとカウンタを消去する。"""
+        with self._lock:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM scores")
+            self._entries = 0
+        self.hits = self.misses = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,239 @@
+"""
+Batched Sentiment Scorers
+=========================
+calculate_ldr から呼ばれるスコアラーの差し替え口。
+
+スコアラーは score_batch(texts, base_ratings) -> ndarray を実装する。
+    texts: テキスト（爆サイリーク + " " + 公式口コミ。表記ゆれは正規化しない）の配列
+    base_ratings: 行ごとの公式評価（ベーススコア）
+    戻り値: 行ごとの補正後スコア（情報不在ペナルティ・揺らぎ・丸めの前）
+
+組み込み実装:
+    KeywordScorer: レキシコンのキーワード加減点 + リスク係数（従来ロジック）
+    NgramScorer:   文字n-gramのハッシュ特徴による線形モデル（オフライン学習、CPUのみ）
+"""
+
+from typing import Protocol
+
+import numpy as np
+import pandas as pd
+
+from keyword_matcher import sum_hits
+from lexicon import Lexicon, load_lexicon
+
+
+class Scorer(Protocol):
+    def score_batch(self, texts, base_ratings: np.ndarray) -> np.ndarray:
+        ...
+
+
+def hype_risk_adjustment(base_ratings: np.ndarray, hit_positives: np.ndarray, lexicon: Lexicon) -> np.ndarray:
+    """
+    リスク係数 (公式評価が高すぎる場合の「盛ってる」リスク)
+    公式が4.5以上で、かつポジティブな裏付けがない場合は怪しいとみなす
+    """
+    hype_risk = (base_ratings >= lexicon.hype_risk_rating) & (hit_positives == 0)
+    return np.where(hype_risk, lexicon.hype_risk_penalty, 0.0)
+
+
+class KeywordScorer:
+    """
+    レキシコンのキーワード加減点によるスコアラー。
+    lexicon未指定なら呼び出しごとに load_lexicon() を引き、ファイル変更に追従する。
+    cache に score_cache.ScoreCache を渡すと、テキスト単位の走査結果を永続キャッシュから再利用する。
+    """
+
+    def __init__(self, lexicon: Lexicon = None, cache=None):
+        self.lexicon = lexicon
+        self.cache = cache
+
+    @staticmethod
+    def _scan_unique_texts(texts, lexicon: Lexicon) -> tuple:
+        """ユニークテキストごとの (加減点, ポジティブ語数, ネガティブ語数) を返す。"""
+        indptr, term_ids, counts = lexicon.matcher.scan_batch(texts)
+        scan = (np.arange(len(texts)), indptr, term_ids, counts)
+        return (
+            sum_hits(scan, lexicon.term_weights),
+            sum_hits(scan, lexicon.is_positive).astype(np.int64),
+            sum_hits(scan, 1 - lexicon.is_positive).astype(np.int64),
+        )
+
+    @staticmethod
+    def score_scan(scan: tuple, base_ratings: np.ndarray, lexicon: Lexicon) -> np.ndarray:
+        """
+        走査済みの結果（lexicon.matcher.scan_unique）から score_batch と同じスコアを計算する。
+        calculate_ldr は情報不在の判定と同じ1回の走査の結果をここに渡す。
+        """
+        base_ratings = np.asarray(base_ratings, dtype=np.float64)
+        keyword_adjustment = sum_hits(scan, lexicon.term_weights)
+        hit_positives = sum_hits(scan, lexicon.is_positive)
+        return base_ratings + keyword_adjustment + hype_risk_adjustment(base_ratings, hit_positives, lexicon)
+
+    def score_batch(self, texts, base_ratings: np.ndarray) -> np.ndarray:
+        lexicon = self.lexicon or load_lexicon()
+        if self.cache is None or not lexicon.version:
+            # キーワードマッチング（全キーワードをユニークテキスト1回の走査で判定）
+            # バージョンを持たない（ファイル由来でない）レキシコンはキャッシュキーを作れない
+            return self.score_scan(lexicon.matcher.scan_unique(texts), base_ratings, lexicon)
+
+        base_ratings = np.asarray(base_ratings, dtype=np.float64)
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object))
+        adjustment, positives, _ = self.cache.get_or_compute(
+            uniques, lexicon.version, lambda misses: self._scan_unique_texts(misses, lexicon))
+        keyword_adjustment = adjustment[codes]
+        hit_positives = positives[codes]
+
+        return base_ratings + keyword_adjustment + hype_risk_adjustment(base_ratings, hit_positives, lexicon)
+
+
+class NgramScorer:
+    """
+    文字n-gramのハッシュ特徴による線形回帰スコアラー。
+
+    テキストをUTF-32のコードポイント配列に連結し、n-gramのハッシュ・バケット集計まで
+    すべてNumPyの配列演算で行う（Pythonの行ループ無し、GPU・ネットワーク不要）。
+    予測値は公式評価に対する補正値で、score = base_rating + bias + Σ w[bucket] / √(n-gram数)。
+
+    学習はオフラインで fit() を呼び、save()/load() でnpzとして持ち回る。
+    教師データには過去の KeywordScorer の補正値や人手ラベルを使う想定。
+    """
+
+    def __init__(self, n_features: int = 1 << 18, ngram_range: tuple = (1, 3)):
+        if n_features & (n_features - 1):
+            raise ValueError("NgramScorer: n_features must be a power of two")
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.weights = np.zeros(n_features, dtype=np.float64)
+        self.bias = 0.0
+
+    # --- 特徴量 ---
+
+    def _ngram_buckets(self, texts, lengths: np.ndarray):
+        """
+        n ごとに (buckets, invalid) を返すジェネレータ。
+
+        全テキストを連結したコードポイント配列上で、位置 i から始まる n-gram を32bit FNV-1a で
+        ハッシュしてバケットに落とす。n-gram のハッシュは (n-1)-gram のハッシュを1文字延長して作る。
+        buckets の長さは連結配列の n-gram 数で、invalid は行末をまたぐ（無効な）n-gram の位置
+        （各行の末尾 n-1 文字から始まる n-gram。短い行では重複して含まれることがある）。
+        ハッシュ・バケットの配列は n をまたいで使い回すので、buckets は次の n に進む前に使い切ること。
+        """
+        codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32)
+        ends = np.cumsum(lengths)
+        shift = np.uint32(32 - int(np.log2(self.n_features)))
+
+        h = np.full(len(codes), 0x811C9DC5, dtype=np.uint32)
+        scratch = np.empty(len(codes), dtype=np.uint32)
+        for n in range(1, self.ngram_range[1] + 1):
+            span = len(codes) - n + 1
+            if span <= 0:
+                break
+            h = h[:span]
+            np.bitwise_xor(h, codes[n - 1:], out=h)
+            np.multiply(h, np.uint32(0x01000193), out=h)
+            if n < self.ngram_range[0]:
+                continue
+            buckets = scratch[:span]
+            np.multiply(h, np.uint32(0x9E3779B1), out=buckets)
+            np.right_shift(buckets, shift, out=buckets)
+            invalid = (ends[:, None] - np.arange(1, n)[None, :]).ravel()
+            yield buckets, invalid[(invalid >= 0) & (invalid < span)]
+
+    def _ngram_counts(self, lengths: np.ndarray) -> np.ndarray:
+        counts = sum(np.maximum(lengths - n + 1, 0) for n in range(self.ngram_range[0], self.ngram_range[1] + 1))
+        return np.sqrt(np.maximum(counts, 1))
+
+    @staticmethod
+    def _as_strings(texts) -> list:
+        texts = list(texts)
+        if all(type(t) is str for t in texts):
+            return texts
+        return [str(t) for t in texts]
+
+    @staticmethod
+    def _lengths(texts) -> np.ndarray:
+        return np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+
+    def _features(self, texts) -> tuple:
+        """
+        学習用に、有効な n-gram だけを並べた特徴を返す。
+
+        Returns:
+            tuple: (row_ids, buckets, norm)。row_ids[k] 行目の n-gram が buckets[k] に落ち、
+            norm は行ごとの正規化係数 √(n-gram数)。
+        """
+        texts = self._as_strings(texts)
+        lengths = self._lengths(texts)
+        char_rows = np.repeat(np.arange(len(texts)), lengths)
+        row_parts, bucket_parts = [], []
+        for buckets, invalid in self._ngram_buckets(texts, lengths):
+            valid = np.ones(len(buckets), dtype=bool)
+            valid[invalid] = False
+            row_parts.append(char_rows[:len(buckets)][valid])
+            bucket_parts.append(buckets[valid].astype(np.int64))
+
+        row_ids = np.concatenate(row_parts) if row_parts else np.zeros(0, dtype=np.int64)
+        buckets = np.concatenate(bucket_parts) if bucket_parts else np.zeros(0, dtype=np.int64)
+        return row_ids, buckets, self._ngram_counts(lengths)
+
+    def _predict_unique(self, texts) -> np.ndarray:
+        texts = self._as_strings(texts)
+        lengths = self._lengths(texts)
+        # 位置ごとに、そこから始まる全 n の重みを足し込んでから、行ごとの連続区間を1回で合計する
+        # （行番号の配列を作って n ごとに bincount するより、メモリを順に読むだけで済む）
+        contributions = np.zeros(int(lengths.sum()), dtype=np.float64)
+        for buckets, invalid in self._ngram_buckets(texts, lengths):
+            weights = np.take(self.weights, buckets)
+            weights[invalid] = 0.0
+            contributions[:len(weights)] += weights
+        linear = np.zeros(len(texts), dtype=np.float64)
+        nonempty = lengths > 0
+        if nonempty.any():
+            starts = (np.cumsum(lengths) - lengths)[nonempty]
+            linear[nonempty] = np.add.reduceat(contributions, starts)
+        return self.bias + linear / self._ngram_counts(lengths)
+
+    def predict_adjustment(self, texts) -> np.ndarray:
+        """公式評価に対する補正値を予測する（同一テキストは1回だけ特徴量化する）。"""
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object))
+        return self._predict_unique(uniques)[codes]
+
+    def score_batch(self, texts, base_ratings: np.ndarray) -> np.ndarray:
+        return np.asarray(base_ratings, dtype=np.float64) + self.predict_adjustment(texts)
+
+    # --- 学習・保存 ---
+
+    def fit(self, texts, targets: np.ndarray, epochs: int = 100, learning_rate: float = 0.5,
+            l2: float = 1e-4) -> "NgramScorer":
+        """
+        補正値 targets への二乗誤差を最小化する（全バッチ勾配法 + AdaGrad）。
+        特徴量は最初に1回だけ作り、各エポックは bincount 2回分の配列演算で済む。
+        """
+        targets = np.asarray(targets, dtype=np.float64)
+        row_ids, buckets, norm = self._features(texts)
+        scale = 1.0 / norm[row_ids]
+        n_rows = len(targets)
+
+        self.bias = float(targets.mean())
+        grad_sq = np.full(self.n_features, 1e-8)
+        for _ in range(epochs):
+            linear = np.bincount(row_ids, weights=self.weights[buckets] * scale, minlength=n_rows)
+            error = self.bias + linear - targets
+            grad = np.bincount(buckets, weights=error[row_ids] * scale, minlength=self.n_features) / n_rows
+            grad += l2 * self.weights
+            grad_sq += grad * grad
+            self.weights -= learning_rate * grad / np.sqrt(grad_sq)
+            self.bias -= learning_rate * float(error.mean())
+        return self
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(path, weights=self.weights, bias=self.bias,
+                            ngram_range=np.array(self.ngram_range))
+
+    @classmethod
+    def load(cls, path: str) -> "NgramScorer":
+        with np.load(path, allow_pickle=False) as npz:
+            scorer = cls(n_features=len(npz["weights"]), ngram_range=tuple(npz["ngram_range"].tolist()))
+            scorer.weights = npz["weights"]
+            scorer.bias = float(npz["bias"])
+        return scorer
@@ -11,14 +11,21 @@ Devil's DX Scraper v2.0 - Strategic Architecture Overhaul
 5. 部分的成功データも返却可能に
 """
 
+import os
 import pandas as pd
-from playwright.sync_api import sync_playwright
 from bs4 import BeautifulSoup
 import time
 import random
+import re
+from collections import Counter
 
 import urllib.parse
 
+from browser_service import BrowserService, get_browser_service
+from page_cache import FIXTURE_DIR, PAGE_ARCHIVE_DIR, PageCache, ReplayCache
+from shop_parser import SHOP_ITEM_READY_XPATH, parse_shop_list, parse_snapshot_dir
+from store import ShopStore, shop_id
+
 # ターゲットURL定義（NightHeaven除外 - 404解消）
 TARGET_URLS = {
     "ソープ": "https://www.cityheaven.net/tochigi/A0901/A090101/shop-list/biz4/",
@@ -26,62 +33,301 @@ TARGET_URLS = {
     "メンエス": "https://www.cityheaven.net/tochigi/A0901/A090101/shop-list/biz7/",
 }
 
+# この環境変数にフィクスチャディレクトリを指定すると、ブラウザを使わず録画済みHTMLで同期する（再生モード）
+REPLAY_ENV = "ZERO_DEVIL_REPLAY"
+
 # Bakusaiエリアコード（北関東 = 栃木/宇都宮含む）
 BAKUSAI_AREA_CODE = 15
 
+# ページ準備完了の待機上限（ミリ秒）。固定sleepではなく条件成立の時点で次に進む
+READY_TIMEOUT_MS = 10000
+# Cloudflareチャレンジの手動解決を待つ上限（ミリ秒）
+CHALLENGE_TIMEOUT_MS = 10000
+# 結果が「無い」ことを確かめる待機の上限（ミリ秒）。sch_all とスレッドはサーバー側で描画されるので
+# domcontentloaded の時点でほぼ揃っており、無い場合に READY_TIMEOUT_MS まで待つのは無駄になる
+EMPTY_RESULT_TIMEOUT_MS = 2000
+
+# 待機条件に使うセレクタ
+THREAD_LINK_SELECTOR = "a[href*='/thr_res/']"
+# 検索結果の描画完了（スレッドリンク・結果一覧の枠・「該当なし」の表示のどれか。ヒット0件でも成立する）
+SEARCH_RESULT_SELECTOR = ", ".join([
+    THREAD_LINK_SELECTOR,
+    "[class*='sch_result']",
+    "[id*='sch_result']",
+    "[class*='search_result']",
+    ":text-matches('見つかりませんでした|該当するスレッドはありません|検索結果はありません')",
+])
+COMMENT_SELECTORS = [
+    "div[class*='response_body']",
+    "div[class*='article_body']",
+    ".comment_text",
+    "article",
+]
+
+# レス番号・投稿日時の抽出パターン（レスのコンテナ要素の id="res123" / 見出しの "#123 2026/10/16 12:34"）
+_RES_ID_RE = re.compile(r"^res_?(\d+)$")
+_RES_NO_RE = re.compile(r"#\s*(\d+)")
+_POSTED_AT_RE = re.compile(r"(\d{4})/(\d{1,2})/(\d{1,2})(?:\s*(?:\([^)]*\))?\s*(\d{1,2}):(\d{2}))?")
+# leak に使う最新レスの件数
+RECENT_COMMENTS = 15
+
+# 返却DataFrameのカラム構成
+SHOP_COLUMNS = ["name", "official_rating", "official_review", "category", "bakusai_leak"]
+_TEXT_COLUMNS = ["name", "official_review", "bakusai_leak"]
+
+
+def _text_dtype():
+    """長文テキスト列の型: pyarrowがあればArrow文字列（Pythonオブジェクトを持たない）"""
+    try:
+        import pyarrow  # noqa: F401
+        return "string[pyarrow]"
+    except ImportError:
+        return object
+
 
-def _kill_zombie_chromium():
+def _build_shop_frame(columns: dict) -> pd.DataFrame:
     """
-    起動前にゾンビChromiumプロセスを駆逐（ディレクトリロック回避）
-    
-    注意: pkill chromiumは他のChromiumプロセス（Antigravityブラウザ等）も殺す危険がある。
-    代わりにuser_data_dirのロックファイルを確認し、必要に応じて削除する。
+    列ごとのリストから店舗DataFrameを組み立てる。
+    categoryはcategorical、テキスト列はArrow文字列で持ち、行dictを経由しない。
     """
-    import os
-    import shutil
-    
-    user_data_dir = "./user_data_dir"
-    
-    # ロックファイルのパス（Chromiumが使用中のディレクトリに作成される）
-    lock_files = [
-        os.path.join(user_data_dir, "SingletonLock"),
-        os.path.join(user_data_dir, "SingletonCookie"),
-        os.path.join(user_data_dir, "SingletonSocket"),
-    ]
-    
+    text_dtype = _text_dtype()
+    data = {}
+    for col, values in columns.items():
+        if col == "category":
+            data[col] = pd.Categorical(values, categories=list(TARGET_URLS))
+        elif col in _TEXT_COLUMNS:
+            data[col] = pd.Series(values, dtype=text_dtype)
+        else:
+            data[col] = pd.Series(values, dtype="float64")
+    return pd.DataFrame(data)
+
+
+class _BrowserSession:
+    """
+    1回の同期で使うページ。共有ブラウザサービスから最初に必要になった時点で払い出す。
+    全ページがスナップショットキャッシュから取れた同期ではブラウザに触れない。
+    ブラウザ本体はサービス側で温めたまま残し、同期の終わりにはページだけを閉じる。
+    """
+
+    def __init__(self, service: BrowserService):
+        self.service = service
+        self._page = None
+
+    @property
+    def page(self):
+        if self._page is None:
+            self._page = self.service.new_page()
+        return self._page
+
+    @property
+    def used(self) -> bool:
+        """この同期でページを払い出したか"""
+        return self._page is not None
+
+    def close(self):
+        if self._page is not None:
+            try:
+                self._page.close()
+            except Exception as e:
+                print(f"⚠️ Page close warning: {e}")
+            self._page = None
+
+
+def _bakusai_search_url(store_name: str) -> str:
+    """店舗名の検索結果ページ（sch_all）のURL。検索結果スナップショットのキーにもなる。"""
+    encoded_query = urllib.parse.quote(f"{store_name} 宇都宮")
+    return f"https://bakusai.com/sch_all/acode={BAKUSAI_AREA_CODE}/word={encoded_query}/"
+
+
+def _thread_links(html: str) -> list:
+    """検索結果HTMLからスレッドへのリンク（href）を出現順に返す"""
+    soup = BeautifulSoup(html, 'html.parser')
+    return [a["href"] for a in soup.select(THREAD_LINK_SELECTOR) if a.get("href")]
+
+
+def _is_cloudflare_challenge(title: str) -> bool:
+    return "challenge" in title.lower() or "attention" in title.lower()
+
+
+def _wait_for(page, selector: str, timeout: int = READY_TIMEOUT_MS) -> bool:
+    """
+    selector に一致する要素がDOMに現れるまで待つ（最大 timeout ミリ秒）。
+    既に存在すれば即座に戻る。期限内に現れなければ False（呼び出し側はそのまま続行する）。
+    """
+    from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
     try:
-        for lock_file in lock_files:
-            if os.path.exists(lock_file):
-                try:
-                    os.remove(lock_file)
-                    print(f"🧹 Removed stale lock: {lock_file}")
-                except Exception as e:
-                    print(f"⚠️ Could not remove {lock_file}: {e}")
-        
-        print("🧹 Lock cleanup completed.")
-    except Exception as e:
-        print(f"⚠️ Cleanup warning (non-fatal): {e}")
+        page.wait_for_selector(selector, state="attached", timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
 
 
-def _search_bakusai_direct(page, store_name: str) -> str:
+def _wait_for_xpath(page, xpath: str, timeout: int = READY_TIMEOUT_MS) -> bool:
     """
-    Bakusaiエリアメニュー経由で検索（Google完全バイパス）
+    XPath に一致する要素がDOMに現れるまで待つ（CSSセレクタでは書けない条件用）。
+    既に存在すれば即座に戻る。期限内に現れなければ False（呼び出し側はそのまま続行する）。
+    """
+    from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+    try:
+        page.wait_for_function(
+            "xpath => document.evaluate(xpath, document, null,"
+            " XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue !== null",
+            arg=xpath, timeout=timeout,
+        )
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+def _wait_for_url_change(page, previous_url: str, timeout: int = READY_TIMEOUT_MS) -> bool:
+    """フォーム送信などで URL が previous_url から変わり、DOMが読み込まれるまで待つ。"""
+    from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+    try:
+        page.wait_for_url(lambda url: url != previous_url, wait_until="domcontentloaded", timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+def _wait_for_challenge_cleared(page, timeout: int = CHALLENGE_TIMEOUT_MS) -> bool:
+    """Cloudflareチャレンジのタイトルが消えるまで待つ（解決された時点で戻る）。"""
+    from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+    try:
+        page.wait_for_function("() => !/challenge|attention/i.test(document.title)", timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+def _extract_comments(html: str) -> list:
+    """スレッドHTMLからコメント本文（最新15件）を抽出する"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    raw_texts = []
+    for selector in COMMENT_SELECTORS:
+        elements = soup.select(selector)
+        if elements:
+            for el in elements[-15:]:  # 最新15件
+                txt = el.get_text("\n", strip=True)
+                if len(txt) > 5:
+                    raw_texts.append(txt)
+            if raw_texts:
+                break
+
+    if not raw_texts and soup.body:
+        # 最終フォールバック: body全体から抽出
+        raw_texts = [soup.body.get_text("\n", strip=True)[-1500:]]
+    return raw_texts
+
+
+def _posted_at(text: str) -> str:
+    """見出し中の投稿日時を "YYYY-MM-DD[ HH:MM]" に（無ければ None）"""
+    m = _POSTED_AT_RE.search(text)
+    if not m:
+        return None
+    year, month, day, hour, minute = m.groups()
+    posted = f"{year}-{int(month):02d}-{int(day):02d}"
+    return f"{posted} {int(hour):02d}:{minute}" if hour else posted
+
+
+def _heading_text(container, body) -> str:
+    """レスのコンテナ内の、本文と script/style 以外のテキスト（レス番号・投稿日時の見出し）"""
+    if container is body:
+        return ""
+    return " ".join(t for t in container.find_all(string=True)
+                    if t.parent.name not in ("script", "style")
+                    and all(parent is not body for parent in t.parents))
+
+
+def _extract_comment_records(html: str, after: int = 0) -> list:
+    """
+    スレッドHTMLからレスを1件ずつ取り出す（レス番号順）。
+
+    レス番号はレスのコンテナ要素の id（res123）か、コンテナ内の本文以外の見出しの "#123" から取る。
+    id が無い場合のコンテナは、本文要素の祖先のうち他のレスの本文を含まない最も外側の要素
+    （前のレスの本文や <style> の "color:#333" を番号と取り違えないよう、その外は見ない）。
+    番号が取れないレスがある、または番号が文書順に狭義単調増加でないページは、
+    同期をまたいだ重複判定ができないので空リストを返す
+    （呼び出し側は従来の _extract_comments にフォールバックする）。
+
+    Args:
+        html: スレッドページのHTML。
+        after: このレス番号以下は本文を取り出さずに読み飛ばす（前回までに保存済みの分）。
+
+    Returns:
+        list: {"res_no", "posted_at", "text"} のdictのリスト。
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    elements = []
+    for selector in COMMENT_SELECTORS:
+        elements = soup.select(selector)
+        if elements:
+            break
+
+    # 複数のレスの本文を含む祖先（レス一覧の枠）は、どのレスのコンテナでもない
+    shared = Counter(id(parent) for el in elements for parent in el.parents)
+    responses = []
+    for el in elements:
+        container = el if _RES_ID_RE.match(el.get("id") or "") else el.find_parent(id=_RES_ID_RE)
+        if container is not None:
+            heading = _heading_text(container, el)
+            res_no = int(_RES_ID_RE.match(container["id"]).group(1))
+        else:
+            container = el
+            for parent in el.parents:
+                if shared[id(parent)] > 1:
+                    break
+                container = parent
+            heading = _heading_text(container, el)
+            m = _RES_NO_RE.search(heading)
+            if m is None:
+                return []
+            res_no = int(m.group(1))
+        if responses and res_no <= responses[-1][0]:
+            return []
+        responses.append((res_no, heading, el))
+
+    records = []
+    for res_no, heading, el in responses:
+        if res_no <= after:
+            continue
+        text = el.get_text("\n", strip=True)
+        if len(text) > 5:
+            records.append({"res_no": res_no, "posted_at": _posted_at(heading), "text": text})
+    return records
+
+
+def _has_comments(html: str) -> bool:
+    """スレッドとして有効なページか（コメント本文の要素がある）"""
+    soup = BeautifulSoup(html, 'html.parser')
+    return soup.select_one(", ".join(COMMENT_SELECTORS)) is not None
+
+
+def _find_thread_url(browser: _BrowserSession, store_name: str, cache: PageCache) -> tuple:
+    """
+    Bakusaiエリアメニュー経由で検索し、最初のスレッドのURLを返す（Google完全バイパス）
     
     戦略:
     1. エリアメニューフレームに直接アクセス
     2. JavaScript注入で検索実行
-    3. 検索結果からスレッドを取得
-    4. スレッドのコメントを抽出
+    3. 検索結果からスレッドを取得（無ければ sch_all に直接アクセス）
     
     Returns:
-        str: 抽出したコメント（失敗時はエラーメッセージ）
+        tuple: (スレッドURL, None) または 失敗時 (None, エラーメッセージ)
     """
-    try:
+    search_url = _bakusai_search_url(store_name)
+    snapshot = cache.get(search_url, "bakusai_search")
+    
+    if snapshot:
+        print("    💾 検索結果スナップショット使用")
+        thread_links = _thread_links(snapshot.html)
+    else:
+        page = browser.page
+        
         # Step 1: エリアメニューにアクセス
         menu_url = f"https://bakusai.com/areamenu/acode={BAKUSAI_AREA_CODE}/"
-        print(f"  📡 Bakusai直接検索: {store_name}")
         page.goto(menu_url, timeout=30000, wait_until="domcontentloaded")
-        time.sleep(2)
+        _wait_for(page, "#idWord")
         
         # Step 2: JavaScript注入で検索実行
         search_script = f"""
@@ -98,79 +344,141 @@ def _search_bakusai_direct(page, store_name: str) -> str:
             return 'input_not_found';
         }})()
         """
+        menu_page_url = page.url
         result = page.evaluate(search_script)
         
         if result == 'input_not_found':
-            return "検索フォーム未検出"
+            return None, "検索フォーム未検出"
         
-        # Step 3: 検索結果ページの読み込み待機
-        time.sleep(3)
-        page.wait_for_load_state("domcontentloaded", timeout=15000)
+        # Step 3: 検索結果ページへの遷移と結果の描画（ヒット0件の表示を含む）を待つ
+        _wait_for_url_change(page, menu_page_url)
+        _wait_for(page, SEARCH_RESULT_SELECTOR)
         
         # Step 4: スレッドリンクを探す
-        thread_links = page.locator("a[href*='/thr_res/']").all()
+        thread_links = _thread_links(page.content())
         
         if not thread_links:
             # フォールバック: sch_allページに直接アクセス
-            encoded_query = urllib.parse.quote(f"{store_name} 宇都宮")
-            fallback_url = f"https://bakusai.com/sch_all/acode={BAKUSAI_AREA_CODE}/word={encoded_query}/"
-            page.goto(fallback_url, timeout=30000)
-            time.sleep(2)
-            thread_links = page.locator("a[href*='/thr_res/']").all()
+            page.goto(search_url, timeout=30000, wait_until="domcontentloaded")
+            _wait_for(page, SEARCH_RESULT_SELECTOR, timeout=EMPTY_RESULT_TIMEOUT_MS)
+            thread_links = _thread_links(page.content())
         
-        if not thread_links:
-            return "スレッド未発見"
+        if thread_links:
+            cache.put_page(search_url, page, "bakusai_search")
+    
+    if not thread_links:
+        return None, "スレッド未発見"
+    
+    href = thread_links[0]
+    print(f"    → スレッド発見: {href[:50]}...")
+    return (f"https://bakusai.com{href}" if href.startswith("/") else href), None
+
+
+def _load_thread(browser: _BrowserSession, thread_url: str, cache: PageCache) -> tuple:
+    """
+    スレッドページのHTMLを取得する（スナップショット優先）。
+
+    Returns:
+        tuple: (html, 有効か)。404/410 やコメントの無いページ（削除・移転済み）は無効。
+        Cloudflareチャレンジが解けなかった場合はスレッドの有無が分からないので有効扱い。
+    """
+    snapshot = cache.get(thread_url, "bakusai_thread")
+    if snapshot:
+        print("    💾 スレッドスナップショット使用")
+        return snapshot.html, _has_comments(snapshot.html)
+    
+    page = browser.page
+    response = page.goto(thread_url, timeout=30000, wait_until="domcontentloaded")
+    if response is not None and response.status in (404, 410):
+        return page.content(), False
+    
+    # Cloudflareチェック（解決された時点で待機を終える）。
+    # 解決後は本来のスレッドへ遷移し直すので描画を待つが、それ以外はコメントが無ければ
+    # 削除・空のスレッドなので短く確かめるだけにする
+    timeout = EMPTY_RESULT_TIMEOUT_MS
+    if _is_cloudflare_challenge(page.title()):
+        print("    ⚠️ Cloudflare検出 - 手動解決待ち")
+        _wait_for_challenge_cleared(page)
+        timeout = READY_TIMEOUT_MS
+    _wait_for(page, ", ".join(COMMENT_SELECTORS), timeout=timeout)
+    
+    thread_html = page.content()
+    # チャレンジページのままならスナップショットにしない
+    if _is_cloudflare_challenge(page.title()):
+        return thread_html, True
+    alive = _has_comments(thread_html)
+    if alive:
+        cache.put_page(thread_url, page, "bakusai_thread")
+    return thread_html, alive
+
+
+def _store_new_comments(store: ShopStore, thread_url: str, thread_html: str) -> list:
+    """
+    前回保存した最大レス番号より新しいレスだけを保存し、保存済みの最新レス本文を返す
+    （レス番号が取れないページでは何も保存せず空リスト）。
+    新着が無ければ返す本文は前回と同じなので、差分計算でその店舗は再スコアされない。
+    """
+    last = store.last_res_no(thread_url)
+    records = _extract_comment_records(thread_html, after=last)
+    if records:
+        added = store.add_comments(thread_url, records)
+        print(f"    🆕 新着レス {added} 件 (#{records[0]['res_no']}〜#{records[-1]['res_no']})")
+    elif last:
+        print(f"    💤 新着レスなし (#{last} まで保存済み)")
+    return store.recent_comments(thread_url, limit=RECENT_COMMENTS) if last or records else []
+
+
+def _search_bakusai_direct(browser: _BrowserSession, store_name: str, cache: PageCache,
+                           store: ShopStore = None, shop: str = None) -> str:
+    """
+    店舗の爆サイスレッドからコメントを抽出する。
+    
+    store に解決済みのスレッドURLがあれば検索を経ずにスレッドへ直行する
+    （メニュー→検索→sch_all→スレッドの3〜4回のナビゲーションが1回になる）。
+    記録したスレッドが無効（削除・404）なら記録を消して検索し直し、見つかったURLを記録する。
+    検索結果とスレッドは page_cache のスナップショットを優先し、TTL内ならブラウザを使わない。
+    
+    Args:
+        store, shop: スレッドURLの記録先と店舗ID（省略時は毎回検索する）。
+    
+    Returns:
+        str: 抽出したコメント（失敗時はエラーメッセージ）
+    """
+    try:
+        print(f"  📡 Bakusai直接検索: {store_name}")
+        thread_html = None
         
-        # Step 5: 最初のスレッドにアクセス
-        first_thread = thread_links[0]
-        href = first_thread.get_attribute("href")
+        known_url = store.thread_url(shop) if store is not None else None
+        if known_url:
+            print(f"    🔗 記録済みスレッドへ直行: {known_url[len('https://bakusai.com'):][:50]}...")
+            thread_html, alive = _load_thread(browser, known_url, cache)
+            if alive:
+                store.remember_thread(shop, store_name, known_url)
+            else:
+                print("    ⚠️ 記録済みスレッドが無効 - 検索し直します")
+                store.forget_thread(shop)
+                thread_html = None
         
-        if href:
-            thread_url = f"https://bakusai.com{href}" if href.startswith("/") else href
-            print(f"    → スレッド発見: {href[:50]}...")
-            page.goto(thread_url, timeout=30000)
-            time.sleep(2)
-            
-            # Cloudflareチェック
-            if "challenge" in page.title().lower() or "attention" in page.title().lower():
-                print("    ⚠️ Cloudflare検出 - 手動解決待ち")
-                time.sleep(10)
-            
-            # Step 6: コメント抽出
-            comment_selectors = [
-                "div[class*='response_body']",
-                "div[class*='article_body']",
-                ".comment_text",
-                "article",
-            ]
-            
-            raw_texts = []
-            for selector in comment_selectors:
-                elements = page.locator(selector).all()
-                if elements:
-                    for el in elements[-15:]:  # 最新15件
-                        try:
-                            txt = el.inner_text()
-                            if len(txt) > 5:
-                                raw_texts.append(txt)
-                        except:
-                            pass
-                    if raw_texts:
-                        break
-            
-            if not raw_texts:
-                # 最終フォールバック: body全体から抽出
-                try:
-                    body_text = page.locator("body").inner_text()
-                    raw_texts = [body_text[-1500:]]
-                except:
-                    pass
-            
-            if raw_texts:
-                full_leak = " || ".join(raw_texts)
-                truncated = full_leak[:600] + "..." if len(full_leak) > 600 else full_leak
-                print(f"    ✅ {len(raw_texts)}件のコメント取得")
-                return truncated
+        if thread_html is None:
+            thread_url, failure = _find_thread_url(browser, store_name, cache)
+            if thread_url is None:
+                return failure
+            thread_html, alive = _load_thread(browser, thread_url, cache)
+            if alive and store is not None:
+                store.remember_thread(shop, store_name, thread_url)
+        else:
+            thread_url = known_url
+        
+        # コメント抽出（store があればレス単位で保存し、前回までに見たレスは読み飛ばす）
+        raw_texts = _store_new_comments(store, thread_url, thread_html) if store is not None else None
+        if not raw_texts:
+            raw_texts = _extract_comments(thread_html)
+        
+        if raw_texts:
+            full_leak = " || ".join(raw_texts)
+            truncated = full_leak[:600] + "..." if len(full_leak) > 600 else full_leak
+            print(f"    ✅ {len(raw_texts)}件のコメント取得")
+            return truncated
         
         return "スレッド内容取得失敗"
         
@@ -179,55 +487,61 @@ def _search_bakusai_direct(page, store_name: str) -> str:
         return f"アクセス失敗: {str(e)[:50]}"
 
 
-def fetch_yokohama_data() -> pd.DataFrame:
+def fetch_yokohama_data(cache: PageCache = None, service: BrowserService = None,
+                        store: ShopStore = None) -> pd.DataFrame:
     """
     宇都宮エリアの店舗データを取得・分析するメイン関数。
     
     アーキテクチャ v2.0:
-    - Phase 0: ゾンビプロセス駆逐
+    - Phase 0: 共有ブラウザサービスからページを借りる（起動・ロック掃除は初回と再起動時のみ）
     - Phase 1: CityHeaven公式データ収集
-    - Phase 2: Bakusai直接検索（Google完全バイパス）
-    """
-    all_stores = []
-    context = None
+    - Phase 2: Bakusai直接検索（Google完全バイパス、記録済みのスレッドへは検索せず直行）
     
-    # Phase 0: プレクリーンアップ
-    _kill_zombie_chromium()
+    各ページはまず page_cache のスナップショットを探し、取得元ごとのTTL内であれば
+    ブラウザでのアクセスを省略する。ブラウザは最初のキャッシュミスで起動し、
+    同期後も閉じずに次の同期（別のStreamlitセッションを含む）で使い回す。
+    
+    Args:
+        cache: ページスナップショットキャッシュ（省略時は既定の保存先・TTLで、取得ページは
+            日付別アーカイブ data/page_archive/ にも ARCHIVE_RETENTION_DAYS 日分残す。
+            環境変数 ZERO_DEVIL_REPLAY が設定されていればそのフィクスチャの ReplayCache）。
+            PageCache(refresh=True) を渡すと全ページを再取得する。
+        service: ブラウザサービス（省略時はプロセス共有の get_browser_service()）。
+        store: 店舗→爆サイスレッドURLの記録先（省略時は既定の ShopStore。
+            再生モードでは記録を残さないよう、明示的に渡された場合だけ使う）。
+            False なら記録を読み書きせず、全店舗を検索から辿る。
+    """
+    if cache is None:
+        replay_dir = os.environ.get(REPLAY_ENV)
+        cache = ReplayCache(replay_dir) if replay_dir else PageCache(archive_dir=PAGE_ARCHIVE_DIR)
+    if store is None and not isinstance(cache, ReplayCache):
+        store = ShopStore()
+    store = store or None
+    service = service or get_browser_service()
+    # Playwright の sync API はサービスのスレッドでしか使えないため、同期処理ごとそこで実行する
+    return service.call(_collect_shops, cache, _BrowserSession(service), store)
+
+
+def _collect_shops(cache: PageCache, browser: _BrowserSession, store: ShopStore) -> pd.DataFrame:
+    shops = {col: [] for col in SHOP_COLUMNS}
+    policy = browser.service.policy
+    if policy is not None:
+        policy.start_run()
     
     try:
-        with sync_playwright() as p:
-            print("🎯 Devil's DX Sniper v2.0 - Launching...")
-            
-            user_data_dir = "./user_data_dir"
-            
-            # Persistent Context起動（タイムアウト短縮でフェイルファスト）
-            context = p.chromium.launch_persistent_context(
-                user_data_dir=user_data_dir,
-                headless=False,
-                slow_mo=50,
-                args=["--disable-blink-features=AutomationControlled"],
-                user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
-                viewport={'width': 1280, 'height': 800},
-                locale='ja-JP',
-                ignore_https_errors=True,
-                timeout=15000
-            )
-            
-            # WebDriver偽装
-            context.add_init_script("""
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-            """)
-            
-            page = context.new_page()
-            age_verified = False
-            
-            # === Phase 1: CityHeaven公式データ収集 ===
-            print("\n📊 Phase 1: CityHeaven Data Collection")
-            for category, url in TARGET_URLS.items():
-                print(f"  🎯 {category}: {url}")
-                try:
+        age_verified = False
+        
+        # === Phase 1: CityHeaven公式データ収集 ===
+        print("\n📊 Phase 1: CityHeaven Data Collection")
+        for category, url in TARGET_URLS.items():
+            print(f"  🎯 {category}: {url}")
+            try:
+                snapshot = cache.get(url, "cityheaven")
+                if snapshot:
+                    print(f"    💾 スナップショット使用 (取得から{snapshot.age / 60:.0f}分)")
+                    html = snapshot.html
+                else:
+                    page = browser.page
                     page.goto(url, timeout=60000, wait_until="domcontentloaded")
                     
                     # 年齢確認突破
@@ -238,112 +552,127 @@ def fetch_yokohama_data() -> pd.DataFrame:
                                     page.click(selector)
                                     age_verified = True
                                     page.wait_for_load_state("domcontentloaded")
-                                    time.sleep(1)
                                     break
                             except:
                                 pass
                     
-                    time.sleep(2)
-                    
-                    # 店舗リスト解析
+                    # 店舗アイテム（パーサーが店名を取り出せるもの）が描画されるまで待つ
+                    _wait_for_xpath(page, SHOP_ITEM_READY_XPATH)
                     html = page.content()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    items = soup.select('li')
-                    shop_items = [
-                        i for i in items 
-                        if ("shop" in " ".join(i.get("class", [])) or "list" in " ".join(i.get("class", []))) 
-                        and (i.find('a') and (i.find('img') or "口コミ" in i.text))
-                    ]
-                    
-                    if len(shop_items) < 3:
-                        shop_items = [
-                            i for i in soup.select('div') 
-                            if "shop_list" in " ".join(i.get("class", [])) or "shop-item" in " ".join(i.get("class", []))
-                        ]
-                    
-                    category_items = shop_items[:10]  # 各カテゴリ最大10店舗
-                    
-                    for item in category_items:
-                        try:
-                            name = ""
-                            for sel in ['a.shop_title_shop', '.shop-name', 'span[itemprop="name"]', 'h2 a', 'h3 a', '.shop_name a']:
-                                el = item.select_one(sel)
-                                if el and el.get_text(strip=True):
-                                    name = el.get_text(strip=True)
-                                    break
-                            
-                            if not name or "求人" in name:
-                                continue
-                            
-                            # 評価取得
-                            rating = 0.0
-                            stars = item.select('img[src*="star"]')
-                            if stars:
-                                real_stars = [s for s in stars if 'on' in s.get('src', '') or 'gold' in s.get('src', '')]
-                                if real_stars:
-                                    rating = float(len(real_stars))
-                            
-                            # 公式口コミサンプル
-                            official_review = ""
-                            review_elem = item.select_one('.shop_comment') or item.select_one('.comment_body') or item.select_one('.review_text')
-                            if review_elem:
-                                official_review = review_elem.get_text(strip=True)[:50] + "..."
-                            
-                            all_stores.append({
-                                "name": name,
-                                "official_rating": rating,
-                                "official_review": official_review,
-                                "category": category,
-                                "bakusai_leak": ""  # Phase 2で埋める
-                            })
-                            
-                        except Exception as e:
-                            continue
-                    
-                    print(f"    ✅ {len(category_items)} shops found")
-                    
-                except Exception as e:
-                    print(f"    ❌ Error: {e}")
-                    continue
-            
-            # === Phase 2: Bakusai直接検索 ===
-            print("\n🕵️ Phase 2: Bakusai Intelligence (Direct Search)")
-            
-            # 各カテゴリから上位2店舗を深堀り
-            deep_targets = []
-            cat_counts = {}
-            for store in all_stores:
-                cat = store['category']
-                if cat not in cat_counts:
-                    cat_counts[cat] = 0
-                if cat_counts[cat] < 2:
-                    deep_targets.append(store)
-                    cat_counts[cat] += 1
-            
-            for store in deep_targets:
-                leak = _search_bakusai_direct(page, store['name'])
-                store['bakusai_leak'] = leak
-                time.sleep(random.uniform(2, 4))  # レートリミット対策
-            
-            print("\n✅ Data collection complete.")
-            return pd.DataFrame(all_stores)
+                
+                # 店舗リスト解析（shop_parser: 店舗アイテムだけを直接選択）
+                records = parse_shop_list(html)
+                
+                # 店舗が取れたページだけスナップショットにする（年齢確認ページ等は保存しない）
+                if not snapshot and records:
+                    cache.put_page(url, page, "cityheaven")
+                
+                for record in records:
+                    shops["name"].append(record["name"])
+                    shops["official_rating"].append(record["official_rating"])
+                    shops["official_review"].append(record["official_review"])
+                    shops["category"].append(category)
+                    shops["bakusai_leak"].append("")  # Phase 2で埋める
+                
+                print(f"    ✅ {len(records)} shops found")
+                
+            except Exception as e:
+                print(f"    ❌ Error: {e}")
+                continue
+        
+        # === Phase 2: Bakusai直接検索 ===
+        print("\n🕵️ Phase 2: Bakusai Intelligence (Direct Search)")
+        
+        # 各カテゴリから上位2店舗を深堀り
+        deep_targets = []
+        cat_counts = {}
+        for i, cat in enumerate(shops["category"]):
+            if cat not in cat_counts:
+                cat_counts[cat] = 0
+            if cat_counts[cat] < 2:
+                deep_targets.append(i)
+                cat_counts[cat] += 1
+        
+        for i in deep_targets:
+            misses = cache.misses
+            leak = _search_bakusai_direct(browser, shops["name"][i], cache, store=store,
+                                          shop=shop_id(shops["category"][i], shops["name"][i]))
+            shops["bakusai_leak"][i] = leak
+            if cache.misses > misses:
+                time.sleep(random.uniform(2, 4))  # レートリミット対策（実際にアクセスした店舗のみ）
+        
+        print(f"\n✅ Data collection complete. (snapshot hits {cache.hits} / misses {cache.misses})")
+        return _build_shop_frame(shops)
     
     except Exception as e:
         print(f"❌ Critical error: {e}")
         # 部分的成功データがあれば返す
-        if all_stores:
-            print(f"⚠️ Returning partial data ({len(all_stores)} stores)")
-            return pd.DataFrame(all_stores)
+        if shops["name"]:
+            print(f"⚠️ Returning partial data ({len(shops['name'])} stores)")
+            return _build_shop_frame(shops)
         return pd.DataFrame()
     
     finally:
-        # 確実にコンテキストをクローズ（欠陥4修正）
-        if context:
-            try:
-                context.close()
-                print("🔒 Browser context closed.")
-            except Exception as e:
-                print(f"⚠️ Context close warning: {e}")
+        used_browser = browser.used
+        browser.close()
+        if policy is not None:
+            run = policy.finish_run()
+            if used_browser:
+                print(run.summary())
+
+
+def record_fixtures(fixture_dir: str = FIXTURE_DIR) -> pd.DataFrame:
+    """
+    実サイトから全ページを取得し直し、fixture_dir にフィクスチャとして録画する。
+    録画したディレクトリは replay_fixtures() や ZERO_DEVIL_REPLAY で再生できる。
+
+    スレッドURLの記録（ShopStore）は使わない。記録済みの店舗は検索ページを経ずにスレッドへ
+    直行するため、その検索ページが録画されず、記録を持たない再生で取得失敗になる。
+    録画のための取得で本番の記録も書き換えない。
+    """
+    print(f"⏺️ Recording fixtures to {fixture_dir}")
+    return fetch_yokohama_data(cache=PageCache(fixture_dir, refresh=True), store=False)
+
+
+def replay_fixtures(fixture_dir: str = FIXTURE_DIR, store: ShopStore = None) -> pd.DataFrame:
+    """
+    録画済みフィクスチャだけで同期する（ブラウザ・ネットワーク不要）。
+    store を渡すとスレッドURLの記録も使う（既定では記録を読み書きしない）。
+    """
+    print(f"▶️ Replaying fixtures from {fixture_dir}")
+    cache = ReplayCache(fixture_dir)
+    shops = fetch_yokohama_data(cache=cache, store=store)
+    if cache.missing:
+        print(f"⚠️ {len(cache.missing)} pages missing from fixtures")
+    return shops
+
+
+def reparse_snapshots(directory: str, workers: int = None) -> pd.DataFrame:
+    """
+    保存済みの一覧ページスナップショット（page_cache / フィクスチャ / PageCache(archive_dir=...) の
+    日付別アーカイブ）を、ブラウザを使わずにプロセスプールで再解析する。
+    セレクタ修正後に過去ページから店舗データを抽出し直す用途。
+    """
+    categories = {url: category for category, url in TARGET_URLS.items()}
+    return parse_snapshot_dir(directory, workers=workers, categories=categories)
+
+
+if __name__ == "__main__":
+    import argparse
 
+    parser = argparse.ArgumentParser(description="CityHeaven / Bakusai scraper")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", nargs="?", const=FIXTURE_DIR, metavar="DIR", help="フィクスチャを録画する")
+    mode.add_argument("--replay", nargs="?", const=FIXTURE_DIR, metavar="DIR", help="フィクスチャから再生する")
+    mode.add_argument("--reparse", metavar="DIR", help="保存済みスナップショットを一括再解析する")
+    args = parser.parse_args()
 
+    if args.reparse:
+        result = reparse_snapshots(args.reparse)
+    elif args.record:
+        result = record_fixtures(args.record)
+    elif args.replay:
+        result = replay_fixtures(args.replay)
+    else:
+        result = fetch_yokohama_data()
+    print(result)
@@ -0,0 +1,260 @@
+"""
+CityHeaven Shop List Parser
+===========================
+店舗一覧ページのHTMLから店舗レコード（店名・評価・公式口コミ抜粋）を取り出す。
+
+バックエンド:
+    lxml: C実装のパーサーでツリーを作り、店舗アイテムを XPath で直接選択する（既定）。
+          li/div 全件を Python で走査してクラス名を連結する処理が無く、大きな一覧ページでも速い。
+    bs4:  BeautifulSoup(html.parser) で全要素を走査する従来実装。
+          lxml が無い環境のフォールバックで、lxml 版の結果検証の基準にもなる。
+
+両バックエンドは同じレコードを返す（benchmark.py の check_parser_equivalence で検証）。
+
+parse_shop_list はHTMLだけを入力に取る純粋関数なので、ブラウザ無しで保存済みページを
+再解析できる。parse_snapshot_dir はスナップショット（page_cache 形式のJSON）の
+ディレクトリ全体をプロセスプールで一括解析する（セレクタ修正後の過去ページの再抽出用）。
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+    _HAS_LXML = True
+except ImportError:
+    _HAS_LXML = False
+
+MAX_SHOPS_PER_PAGE = 10      # 各カテゴリ最大10店舗
+REVIEW_MAX_CHARS = 50        # 公式口コミサンプルの切り詰め長
+
+# 店名の候補セレクタ（先に一致したものを採用）
+NAME_SELECTORS = ['a.shop_title_shop', '.shop-name', 'span[itemprop="name"]', 'h2 a', 'h3 a', '.shop_name a']
+REVIEW_SELECTORS = ['.shop_comment', '.comment_body', '.review_text']
+
+
+
+def _has_class(name: str) -> str:
+    """CSSの .name と同じ判定（class属性を空白で区切った中に name がある）のXPath条件"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# 店舗アイテムの抽出条件（XPath 1.0。lxml バックエンドとブラウザの document.evaluate の両方で使う）
+# class属性を " " で連結した文字列への部分一致（従来実装の "shop" in " ".join(classes) と同じ）
+_SHOP_LI_XPATH = ("//li[contains(@class, 'shop') or contains(@class, 'list')]"
+                  "[.//a][.//img or contains(string(.), '口コミ')]")
+_SHOP_DIV_XPATH = "//div[contains(@class, 'shop_list') or contains(@class, 'shop-item')]"
+# NAME_SELECTORS と同じ順序・意味のXPath
+# （"h2 a" のような子孫結合子は、祖先側がアイテムの外にあっても一致する点も含めて合わせる）
+_NAME_XPATH_EXPRS = (
+    f".//a[{_has_class('shop_title_shop')}]",
+    f".//*[{_has_class('shop-name')}]",
+    ".//span[@itemprop='name']",
+    ".//a[ancestor::h2]",
+    ".//a[ancestor::h3]",
+    f".//a[ancestor::*[{_has_class('shop_name')}]]",
+)
+
+# ブラウザで一覧の描画完了を待つ条件: 店名要素を持つ店舗アイテムが1件以上ある
+# （ナビ・メニュー・フッターの li[class*='list'] だけでは満たさない）
+SHOP_ITEM_READY_XPATH = f"({_SHOP_LI_XPATH} | {_SHOP_DIV_XPATH})[{' or '.join(_NAME_XPATH_EXPRS)}]"
+
+
+def _shop_record(name: str, rating: float, official_review: str) -> dict:
+    return {"name": name, "official_rating": rating, "official_review": official_review}
+
+
+# === bs4 バックエンド（従来実装） ===
+
+def _parse_bs4(html: str) -> list:
+    soup = BeautifulSoup(html, 'html.parser')
+
+    items = soup.select('li')
+    shop_items = [
+        i for i in items
+        if ("shop" in " ".join(i.get("class", [])) or "list" in " ".join(i.get("class", [])))
+        and (i.find('a') and (i.find('img') or "口コミ" in i.text))
+    ]
+
+    if len(shop_items) < 3:
+        shop_items = [
+            i for i in soup.select('div')
+            if "shop_list" in " ".join(i.get("class", [])) or "shop-item" in " ".join(i.get("class", []))
+        ]
+
+    records = []
+    for item in shop_items[:MAX_SHOPS_PER_PAGE]:
+        try:
+            name = ""
+            for sel in NAME_SELECTORS:
+                el = item.select_one(sel)
+                if el and el.get_text(strip=True):
+                    name = el.get_text(strip=True)
+                    break
+
+            if not name or "求人" in name:
+                continue
+
+            # 評価取得
+            rating = 0.0
+            stars = item.select('img[src*="star"]')
+            if stars:
+                real_stars = [s for s in stars if 'on' in s.get('src', '') or 'gold' in s.get('src', '')]
+                if real_stars:
+                    rating = float(len(real_stars))
+
+            # 公式口コミサンプル
+            official_review = ""
+            review_elem = item.select_one('.shop_comment') or item.select_one('.comment_body') or item.select_one('.review_text')
+            if review_elem:
+                official_review = review_elem.get_text(strip=True)[:REVIEW_MAX_CHARS] + "..."
+
+            records.append(_shop_record(name, rating, official_review))
+        except Exception:
+            continue
+    return records
+
+
+# === lxml バックエンド ===
+
+if _HAS_LXML:
+    _SHOP_LI = etree.XPath(_SHOP_LI_XPATH)
+    _SHOP_DIV = etree.XPath(_SHOP_DIV_XPATH)
+    _NAME_XPATHS = [etree.XPath(x) for x in _NAME_XPATH_EXPRS]
+    _REVIEW_XPATHS = [etree.XPath(f".//*[{_has_class(name[1:])}]") for name in REVIEW_SELECTORS]
+    _STAR_SRCS = etree.XPath(".//img[contains(@src, 'star')]/@src")
+    _TEXTS = etree.XPath(".//text()")
+
+
+def _stripped_text(el) -> str:
+    """bs4 の get_text(strip=True) と同じ（各テキストノードを strip して空でないものを連結）"""
+    return "".join(t.strip() for t in _TEXTS(el) if t.strip())
+
+
+def _first(xpath, item):
+    found = xpath(item)
+    return found[0] if found else None
+
+
+def _parse_lxml(html: str) -> list:
+    try:
+        try:
+            root = lxml.html.document_fromstring(html)
+        except ValueError:
+            # XML宣言付きの文字列はバイト列にしないと受け付けない
+            root = lxml.html.document_fromstring(html.encode("utf-8"))
+    except etree.ParserError:
+        # 空・空白だけ・コメントだけのページ（bs4 版と同じく店舗なし）
+        return []
+
+    shop_items = _SHOP_LI(root)
+    if len(shop_items) < 3:
+        shop_items = _SHOP_DIV(root)
+
+    records = []
+    for item in shop_items[:MAX_SHOPS_PER_PAGE]:
+        name = ""
+        for xpath in _NAME_XPATHS:
+            el = _first(xpath, item)
+            if el is not None and _stripped_text(el):
+                name = _stripped_text(el)
+                break
+
+        if not name or "求人" in name:
+            continue
+
+        real_stars = [src for src in _STAR_SRCS(item) if 'on' in src or 'gold' in src]
+        rating = float(len(real_stars)) if real_stars else 0.0
+
+        official_review = ""
+        for xpath in _REVIEW_XPATHS:
+            el = _first(xpath, item)
+            if el is not None:
+                official_review = _stripped_text(el)[:REVIEW_MAX_CHARS] + "..."
+                break
+
+        records.append(_shop_record(name, rating, official_review))
+    return records
+
+
+_BACKENDS = {"bs4": _parse_bs4, "lxml": _parse_lxml}
+
+
+def parse_shop_list(html: str, backend: str = None) -> list:
+    """
+    店舗一覧ページのHTMLから店舗レコードを抽出する（ページ先頭から最大10店舗、求人枠は除外）。
+
+    Args:
+        html: page.content() やスナップショットのHTML。
+        backend: "lxml" / "bs4"。省略時は lxml があれば lxml。
+
+    Returns:
+        list: {"name", "official_rating", "official_review"} のdictのリスト。
+    """
+    if backend is None:
+        backend = "lxml" if _HAS_LXML else "bs4"
+    if backend == "lxml" and not _HAS_LXML:
+        raise ImportError("parse_shop_list: backend='lxml' requires lxml")
+    return _BACKENDS[backend](html)
+
+
+def parse_snapshot_file(path: str, source: str = "cityheaven") -> list:
+    """
+    スナップショット1件（page_cache 形式のJSON）を解析し、レコードに
+    取得元URL・取得時刻を付けて返す。取得元が source でなければ空リスト。
+    """
+    with open(path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    if snapshot.get("source") != source:
+        return []
+    return [
+        {**record, "url": snapshot["url"], "fetched_at": snapshot["fetched_at"]}
+        for record in parse_shop_list(snapshot["html"])
+    ]
+
+
+def _snapshot_paths(directory: str) -> list:
+    paths = []
+    for dirpath, _, filenames in os.walk(directory):
+        paths.extend(os.path.join(dirpath, name) for name in filenames if name.endswith(".json"))
+    return sorted(paths)
+
+
+def parse_snapshot_dir(directory: str, workers: int = None, categories: dict = None) -> pd.DataFrame:
+    """
+    ディレクトリ（サブディレクトリを含む）内の一覧ページスナップショットをまとめて解析する。
+
+    Args:
+        directory: スナップショットJSONの置き場（page_cache / フィクスチャ / 日付別アーカイブ等）。
+        workers: プロセス数（省略時はCPU数、1ならプロセスプールを使わない）。
+        categories: {一覧ページURL: カテゴリ名}（scraper.TARGET_URLS の逆引き）。
+            指定すると category カラムを付ける。
+
+    Returns:
+        pd.DataFrame: name / official_rating / official_review / url / fetched_at
+        （categories 指定時は category も）。ファイル名順・ページ内の掲載順。
+    """
+    paths = _snapshot_paths(directory)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(paths) < 2:
+        results = map(parse_snapshot_file, paths)
+        records = [record for page in results for record in page]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunksize = max(1, len(paths) // (workers * 4))
+            records = [record for page in executor.map(parse_snapshot_file, paths, chunksize=chunksize)
+                       for record in page]
+
+    frame = pd.DataFrame.from_records(
+        records, columns=["name", "official_rating", "official_review", "url", "fetched_at"]
+    )
+    frame["official_rating"] = frame["official_rating"].astype("float64")
+    if categories is not None:
+        frame["category"] = frame["url"].map(categories)
+    return frame
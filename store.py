@@ -0,0 +1,395 @@
+"""
+Shop Store
+==========
+同期結果（店舗・取得エビデンス・スコア）を SQLite ファイルに蓄積する永続化層。
+
+テーブル:
+    shops:       店舗マスタ。ID は (カテゴリ, 正規化した店名) から導く安定ID で、同期のたびに upsert する。
+                 最新の評価・スコアも持ち、(category, ldr) インデックスでカテゴリ別ランキングを直接引ける。
+    scrape_runs: 同期1回ごとの記録（時刻・店舗数・レキシコンのバージョン）。
+    evidence:    同期ごとの取得内容（公式評価・公式口コミ・爆サイリーク）。
+    scores:      同期ごとのスコア（ai_real_score / ldr / status と差分計算用の入力ハッシュ）。
+                 evidence とともに (shop_id, run_at) インデックスで店舗ごとの履歴を時系列に引ける。
+    bakusai_threads: 店舗→爆サイスレッドURLの解決結果。次回以降の同期は検索を経ずにスレッドへ直行する。
+    bakusai_comments: 爆サイのレス1件ごとの記録（スレッドURL・レス番号・投稿日時・本文）。
+                 同期では前回までの最大レス番号より新しいレスだけを追加する。
+
+latest() は各カテゴリの最新同期に載っていた店舗を、calculate_ldr_incremental の結果と
+同じカラム構成の DataFrame で返す（次の同期で previous に渡し、入力が変わった店舗だけを再計算する）。
+latest_records() は同じ内容を dict のリストで返す。アプリは起動時にこれを表示する
+（スクレイピングも pandas の読み込みも不要）。
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# pandas / NumPy / analyzer は DataFrame を扱うメソッドの中で読み込む。
+# アプリの表示（latest_records）は sqlite3 だけで動き、起動時にこれらを読み込まない。
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+STORE_PATH = os.path.join(DATA_DIR, "zero_devil.sqlite3")
+# この環境変数でストアの保存先を差し替えられる（ベンチマーク・再生時に本番のストアを汚さない）
+STORE_ENV = "ZERO_DEVIL_STORE"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shops (
+    shop_id         TEXT    PRIMARY KEY,
+    name            TEXT    NOT NULL,
+    category        TEXT    NOT NULL,
+    first_seen      REAL    NOT NULL,
+    last_seen       REAL    NOT NULL,
+    last_run_id     INTEGER NOT NULL,
+    official_rating REAL,
+    ai_real_score   REAL,
+    ldr             REAL,
+    status          TEXT
+);
+CREATE INDEX IF NOT EXISTS shops_category_ldr ON shops (category, ldr);
+
+CREATE TABLE IF NOT EXISTS scrape_runs (
+    run_id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_at          REAL    NOT NULL,
+    shop_count      INTEGER NOT NULL,
+    recomputed      INTEGER,
+    lexicon_version TEXT    NOT NULL DEFAULT '',
+    source          TEXT    NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS evidence (
+    shop_id         TEXT    NOT NULL REFERENCES shops (shop_id),
+    run_id          INTEGER NOT NULL REFERENCES scrape_runs (run_id),
+    run_at          REAL    NOT NULL,
+    official_rating REAL,
+    official_review TEXT,
+    bakusai_leak    TEXT,
+    PRIMARY KEY (shop_id, run_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS evidence_shop_time ON evidence (shop_id, run_at);
+
+CREATE TABLE IF NOT EXISTS scores (
+    shop_id         TEXT    NOT NULL REFERENCES shops (shop_id),
+    run_id          INTEGER NOT NULL REFERENCES scrape_runs (run_id),
+    run_at          REAL    NOT NULL,
+    ai_real_score   REAL,
+    ldr             REAL,
+    status          TEXT    NOT NULL,
+    input_hash      INTEGER,
+    PRIMARY KEY (shop_id, run_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS scores_shop_time ON scores (shop_id, run_at);
+
+CREATE TABLE IF NOT EXISTS bakusai_threads (
+    shop_id         TEXT    PRIMARY KEY,
+    store_name      TEXT    NOT NULL,
+    thread_url      TEXT    NOT NULL,
+    resolved_at     REAL    NOT NULL,
+    verified_at     REAL    NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS bakusai_comments (
+    thread_url      TEXT    NOT NULL,
+    res_no          INTEGER NOT NULL,
+    posted_at       TEXT,
+    body            TEXT    NOT NULL,
+    first_seen      REAL    NOT NULL,
+    PRIMARY KEY (thread_url, res_no)
+) WITHOUT ROWID;
+"""
+
+# 各カテゴリの最新同期に載っていた店舗（カテゴリは初めて保存された順、カテゴリ内は LDR の高い順）
+_LATEST_COLUMNS = ["shop_id", "name", "official_rating", "official_review", "category", "bakusai_leak",
+                   "ai_real_score", "ldr", "status", "input_hash", "last_seen"]
+_LATEST_SQL = """
+WITH latest AS (
+    SELECT category, MAX(last_run_id) AS run_id, MIN(rowid) AS category_order FROM shops GROUP BY category
+)
+SELECT s.shop_id, s.name, e.official_rating, e.official_review, s.category, e.bakusai_leak,
+       sc.ai_real_score, sc.ldr, sc.status, sc.input_hash, s.last_seen
+FROM shops s
+JOIN latest l ON l.category = s.category AND l.run_id = s.last_run_id
+JOIN evidence e ON e.shop_id = s.shop_id AND e.run_id = s.last_run_id
+JOIN scores sc ON sc.shop_id = s.shop_id AND sc.run_id = s.last_run_id
+{where}
+ORDER BY l.category_order, s.ldr DESC
+"""
+
+_UPSERT_SHOP = """
+INSERT INTO shops (shop_id, name, category, first_seen, last_seen, last_run_id,
+                   official_rating, ai_real_score, ldr, status)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (shop_id) DO UPDATE SET
+    name = excluded.name,
+    last_seen = excluded.last_seen,
+    last_run_id = excluded.last_run_id,
+    official_rating = excluded.official_rating,
+    ai_real_score = excluded.ai_real_score,
+    ldr = excluded.ldr,
+    status = excluded.status
+"""
+
+
+def shop_id(category: str, name: str) -> str:
+    """
+    店舗の安定ID。店名は表記ゆれ（全角/半角・小書き仮名・空白）を正規化してから
+    カテゴリと合わせてハッシュするので、掲載順や表記の揺れで別店舗扱いにならない。
+    """
+    from text_normalizer import normalize_text
+
+    key = "".join(normalize_text(str(name)).split())
+    return hashlib.sha1(f"{category}\x1f{key}".encode("utf-8")).hexdigest()[:16]
+
+
+def _nullable(value):
+    """pandas の欠損値を SQL の NULL に"""
+    import pandas as pd
+
+    return None if pd.isna(value) else value
+
+
+class ShopStore:
+    """
+    店舗・同期・エビデンス・スコアを保持する SQLite ストア。
+    WALモードで開くので、Streamlit の複数セッションから同時に読める。
+    path 省略時は環境変数 ZERO_DEVIL_STORE、無ければ STORE_PATH。
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.environ.get(STORE_ENV) or STORE_PATH
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def record_run(self, result: "pd.DataFrame", lexicon_version: str = "", source: str = "",
+                   run_at: float = None) -> int:
+        """
+        1回の同期結果を保存する（店舗は upsert、エビデンスとスコアは同期ごとに追記）。
+
+        Args:
+            result: calculate_ldr / calculate_ldr_incremental の結果
+                （name / category / official_rating / official_review / bakusai_leak と
+                ai_real_score / ldr / status、あれば input_hash）。
+            lexicon_version: スコア計算に使ったレキシコンのバージョン。
+            source: 同期の種類（"scrape" / "replay" 等、任意）。
+            run_at: 同期時刻（UNIX秒、省略時は現在）。
+
+        Returns:
+            int: 採番した run_id。
+        """
+        import numpy as np
+
+        from analyzer import RESULT_COLUMNS
+
+        missing = [c for c in ["name", "category", *RESULT_COLUMNS] if c not in result.columns]
+        if missing:
+            raise ValueError(f"record_run: result is missing columns {missing}")
+        run_at = time.time() if run_at is None else run_at
+        n = len(result)
+
+        def column(name, default=None):
+            return result[name].to_numpy(dtype=object) if name in result.columns else np.full(n, default, dtype=object)
+
+        categories = column("category").astype(str)
+        names = column("name")
+        ids = [shop_id(category, name) for category, name in zip(categories, names)]
+        official = [_nullable(v) for v in column("official_rating")]
+        ai_score = result["ai_real_score"].to_numpy(dtype=np.float64).tolist()
+        ldr = result["ldr"].to_numpy(dtype=np.float64).tolist()
+        status = [str(s) for s in column("status")]
+        # uint64 のハッシュは SQLite の符号付き64bit整数にビット列のまま入れる
+        if "input_hash" in result.columns:
+            input_hash = result["input_hash"].to_numpy(dtype=np.uint64).view(np.int64).tolist()
+        else:
+            input_hash = [None] * n
+        recomputed = result.attrs.get("recomputed_rows")
+
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                run_id = conn.execute(
+                    "INSERT INTO scrape_runs (run_at, shop_count, recomputed, lexicon_version, source) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (run_at, n, recomputed, lexicon_version, source),
+                ).lastrowid
+                conn.executemany(_UPSERT_SHOP, [
+                    (ids[i], str(names[i]), categories[i], run_at, run_at, run_id,
+                     official[i], ai_score[i], ldr[i], status[i])
+                    for i in range(n)
+                ])
+                conn.executemany(
+                    "INSERT OR REPLACE INTO evidence VALUES (?, ?, ?, ?, ?, ?)",
+                    [(ids[i], run_id, run_at, official[i], _nullable(review), _nullable(leak))
+                     for i, (review, leak) in enumerate(zip(column("official_review"), column("bakusai_leak")))],
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(ids[i], run_id, run_at, ai_score[i], ldr[i], status[i], input_hash[i]) for i in range(n)],
+                )
+        return run_id
+
+    def _latest_rows(self, category: str = None) -> list:
+        where, params = ("WHERE s.category = ?", (category,)) if category is not None else ("", ())
+        with self._lock:
+            return self._connection().execute(_LATEST_SQL.format(where=where), params).fetchall()
+
+    def latest_records(self, category: str = None) -> list:
+        """
+        latest() と同じ内容を dict のリストで返す（pandas を使わない表示用。input_hash は含めない）。
+        欠損値は None。
+        """
+        return [
+            {col: value for col, value in zip(_LATEST_COLUMNS, row) if col != "input_hash"}
+            for row in self._latest_rows(category)
+        ]
+
+    def latest(self, category: str = None) -> "pd.DataFrame":
+        """
+        各カテゴリの最新同期に載っていた店舗の最新結果を返す（スクレイピング不要）。
+
+        Args:
+            category: 指定するとそのカテゴリだけ（(category, ldr) インデックスで引く）。
+
+        Returns:
+            pd.DataFrame: shop_id / name / official_rating / official_review / category /
+            bakusai_leak / ai_real_score / ldr / status / input_hash / last_seen。
+            カテゴリは初めて保存された順、カテゴリ内は LDR の高い順。
+            calculate_ldr_incremental の previous にそのまま渡せる。
+        """
+        import numpy as np
+        import pandas as pd
+
+        from analyzer import STATUS_LABELS
+
+        frame = pd.DataFrame.from_records(self._latest_rows(category), columns=_LATEST_COLUMNS)
+        frame["category"] = pd.Categorical(frame["category"], categories=list(dict.fromkeys(frame["category"])))
+        for column in ("official_rating", "ai_real_score", "ldr"):
+            frame[column] = frame[column].astype("float64")
+        frame["status"] = pd.Categorical(frame["status"], categories=STATUS_LABELS, ordered=True)
+        if frame["input_hash"].notna().all():
+            frame["input_hash"] = frame["input_hash"].astype("int64").to_numpy().view(np.uint64)
+        else:
+            # ハッシュ無しで保存された行がある場合は、差分計算側で入力から計算し直させる
+            frame = frame.drop(columns="input_hash")
+        return frame
+
+    def history(self, shop: str) -> "pd.DataFrame":
+        """
+        店舗の同期ごとの履歴（古い順）。
+
+        Args:
+            shop: shop_id。
+
+        Returns:
+            pd.DataFrame: run_id / run_at / official_rating / ai_real_score / ldr / status / bakusai_leak。
+        """
+        import pandas as pd
+
+        with self._lock:
+            return pd.read_sql_query(
+                "SELECT sc.run_id, sc.run_at, e.official_rating, sc.ai_real_score, sc.ldr, sc.status, "
+                "e.bakusai_leak FROM scores sc "
+                "JOIN evidence e ON e.shop_id = sc.shop_id AND e.run_id = sc.run_id "
+                "WHERE sc.shop_id = ? ORDER BY sc.run_at",
+                self._connection(), params=(shop,),
+            )
+
+    def runs(self, limit: int = 20) -> "pd.DataFrame":
+        """直近の同期の記録（新しい順）。"""
+        import pandas as pd
+
+        with self._lock:
+            return pd.read_sql_query(
+                "SELECT * FROM scrape_runs ORDER BY run_id DESC LIMIT ?", self._connection(), params=(limit,)
+            )
+
+    def last_run(self) -> dict:
+        """直近の同期の記録（無ければ None）。pandas を使わない表示用。"""
+        with self._lock:
+            cursor = self._connection().execute("SELECT * FROM scrape_runs ORDER BY run_id DESC LIMIT 1")
+            row = cursor.fetchone()
+            return None if row is None else dict(zip([c[0] for c in cursor.description], row))
+
+    def thread_url(self, shop: str) -> str:
+        """店舗の解決済み爆サイスレッドURL（未解決なら None）。"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT thread_url FROM bakusai_threads WHERE shop_id = ?", (shop,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def remember_thread(self, shop: str, store_name: str, thread_url: str) -> None:
+        """スレッドURLを記録する（同じURLなら確認時刻だけ更新）。"""
+        now = time.time()
+        with self._lock:
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT INTO bakusai_threads VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (shop_id) DO UPDATE SET store_name = excluded.store_name, "
+                    "thread_url = excluded.thread_url, verified_at = excluded.verified_at, "
+                    "resolved_at = CASE WHEN thread_url = excluded.thread_url THEN resolved_at "
+                    "ELSE excluded.resolved_at END",
+                    (shop, store_name, thread_url, now, now),
+                )
+
+    def forget_thread(self, shop: str) -> None:
+        """スレッドが消えた・無効になった店舗の記録を消す（次回は検索からやり直す）。"""
+        with self._lock:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM bakusai_threads WHERE shop_id = ?", (shop,))
+
+    def last_res_no(self, thread_url: str) -> int:
+        """スレッドで保存済みの最大レス番号（未保存なら 0）。"""
+        with self._lock:
+            (last,) = self._connection().execute(
+                "SELECT MAX(res_no) FROM bakusai_comments WHERE thread_url = ?", (thread_url,)
+            ).fetchone()
+        return last or 0
+
+    def add_comments(self, thread_url: str, comments: list) -> int:
+        """
+        レスを保存する（同じレス番号は既存を残す）。
+
+        Args:
+            thread_url: スレッドURL。
+            comments: {"res_no", "posted_at", "text"} のdictのリスト。
+
+        Returns:
+            int: 新たに保存した件数。
+        """
+        now = time.time()
+        with self._lock:
+            with self._connection() as conn:
+                before = conn.total_changes
+                conn.executemany(
+                    "INSERT OR IGNORE INTO bakusai_comments VALUES (?, ?, ?, ?, ?)",
+                    [(thread_url, c["res_no"], c["posted_at"], c["text"], now) for c in comments],
+                )
+                return conn.total_changes - before
+
+    def recent_comments(self, thread_url: str, limit: int = 15) -> list:
+        """スレッドの保存済みレス本文を、新しい limit 件だけレス番号順で返す。"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT body FROM bakusai_comments WHERE thread_url = ? ORDER BY res_no DESC LIMIT ?",
+                (thread_url, limit),
+            ).fetchall()
+        return [body for (body,) in reversed(rows)]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
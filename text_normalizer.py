@@ -0,0 +1,79 @@
+"""
+Japanese Text Normalizer
+========================
+キーワードの表記ゆれを正規形に寄せ、正規形からその表記ゆれの綴りを展開する。
+
+- NFKC: 半角カナ→全角（ﾊﾞﾊﾞｱ→ババア）、全角英数→半角（ＢＢＡ→BBA）
+- 小書き仮名の畳み込み: ァ→ア, っ→つ など（ババァ→ババア）
+
+レキシコンの語は normalize_text の正規形で突き合わせ（"ババア"/"ババァ" 等の重複エントリは1語になる）、
+正規形を spelling_variants で半角・全角・小書き仮名の綴りに展開してキーワードマッチャーに登録する。
+テキスト側は正規化しない（実データのほぼ全件が ！ や … を含み、全件 NFKC に掛けると
+キーワード走査そのものより高くつくため）。
+"""
+
+import itertools
+import math
+import re
+import unicodedata
+
+_SMALL_KANA = dict(zip(
+    "ぁぃぅぇぉっゃゅょゎゕゖァィゥェォッャュョヮヵヶㇰㇱㇲㇳㇴㇵㇶㇷㇸㇹㇺㇻㇼㇽㇾㇿ",
+    "あいうえおつやゆよわかけアイウエオツヤユヨワカケクシストヌハヒフヘホムラリルレロ",
+))
+# 小書き仮名は疎にしか出現しないため、str.translate より正規表現置換の方が速い
+_SMALL_KANA_RE = re.compile("[" + "".join(_SMALL_KANA) + "]")
+
+# 半角・全角形の区画（全角英数・記号、半角カナ）
+_WIDTH_FORMS = range(0xFF01, 0xFFEF)
+_HALFWIDTH_KATAKANA = range(0xFF66, 0xFF9E)
+_HALFWIDTH_VOICED_MARKS = "ﾞﾟ"   # ﾞ ﾟ
+
+# 1語あたりの綴りの上限（超える長い語は、語全体の幅を揃えた綴りと1文字だけ異なる綴りに絞る）
+_MAX_SPELLINGS = 1024
+
+
+def normalize_text(text: str) -> str:
+    """1テキストを正規化する（NFKC + 小書き仮名の畳み込み）。"""
+    if not unicodedata.is_normalized("NFKC", text):
+        text = unicodedata.normalize("NFKC", text)
+    return _SMALL_KANA_RE.sub(lambda m: _SMALL_KANA[m.group()], text)
+
+
+def _build_variant_table() -> tuple:
+    """
+    正規形の1文字 → その文字に正規化される綴り（半角・全角形、半角カナ+濁点/半濁点、小書き仮名）。
+    半角・全角形の綴りは語全体の幅を揃えるときに使うため別にも返す。
+    """
+    candidates = [chr(cp) for cp in _WIDTH_FORMS]
+    candidates += [chr(cp) + mark for cp in _HALFWIDTH_KATAKANA for mark in _HALFWIDTH_VOICED_MARKS]
+    candidates += list(_SMALL_KANA)
+    variants, width_forms = {}, {}
+    for spelling in candidates:
+        canonical = normalize_text(spelling)
+        if len(canonical) != 1 or canonical == spelling:
+            continue
+        variants.setdefault(canonical, []).append(spelling)
+        # 幅だけが違う綴り（ｱ は ア の半角形だが、ｧ は小書きの半角形）
+        if ord(spelling[0]) in _WIDTH_FORMS and unicodedata.normalize("NFKC", spelling) == canonical:
+            width_forms.setdefault(canonical, spelling)
+    return variants, width_forms
+
+
+_VARIANTS, _WIDTH_VARIANT = _build_variant_table()
+
+
+def spelling_variants(term: str) -> list:
+    """
+    正規形の語を、normalize_text で同じ語に正規化される綴り（半角・全角・小書き仮名）に展開する。
+    先頭は語そのもの。
+
+    例: "BBA" → ["BBA", "BBＡ", ..., "ＢＢＡ"]、"ババア" → ["ババア", ..., "ﾊﾞﾊﾞｱ", "ババァ", ...]
+    """
+    options = [[ch] + _VARIANTS.get(ch, []) for ch in term]
+    if math.prod(len(o) for o in options) <= _MAX_SPELLINGS:
+        return ["".join(p) for p in itertools.product(*options)]
+    # 長い語は組み合わせが爆発するため、語全体を半角（全角）に揃えた綴りと1文字だけ異なる綴りに絞る
+    spellings = [term, "".join(_WIDTH_VARIANT.get(ch, ch) for ch in term)]
+    spellings += [term[:i] + v + term[i + 1:] for i, o in enumerate(options) for v in o[1:]]
+    return list(dict.fromkeys(spellings))